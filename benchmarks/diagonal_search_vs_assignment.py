@@ -0,0 +1,39 @@
+# ===========================================================================
+# Compare the vectorized `diagonal_beam_search` to the exact Hungarian
+# algorithm `diagonal_linear_assignment` on large factor-to-code matrices
+# ===========================================================================
+from __future__ import absolute_import, division, print_function
+
+import time
+
+import numpy as np
+
+from odin.search import (diagonal_beam_search, diagonal_greedy_search,
+                         diagonal_linear_assignment)
+
+np.random.seed(8)
+
+
+def diag_score(matrix, ids):
+  return np.sum(matrix[np.arange(min(matrix.shape)), ids[:min(matrix.shape)]])
+
+
+for n in (16, 64, 128, 256, 512):
+  # mutual information like matrix: sparse, few strong entries
+  mat = np.random.rand(n, n)**8
+  exact = diag_score(mat, np.asarray(diagonal_linear_assignment(mat)))
+  print(f"Matrix {n}x{n}")
+  for name, fn in [
+      ('hungarian', lambda: diagonal_linear_assignment(mat)),
+      ('greedy', lambda: diagonal_greedy_search(mat)),
+      ('beam(1,8)', lambda: diagonal_beam_search(mat, 1, n_candidates=8)),
+      ('beam(8,16)', lambda: diagonal_beam_search(mat, 8, n_candidates=16)),
+      ('beam(32,32)', lambda: diagonal_beam_search(mat, 32, n_candidates=32)),
+      ('beam(full)', lambda: diagonal_beam_search(mat)),
+  ]:
+    start = time.time()
+    ids = np.asarray(fn())
+    duration = time.time() - start
+    assert sorted(ids.tolist()) == list(range(n))
+    print(f" {name:12s} {duration:8.4f}(s)  "
+          f"score-ratio:{diag_score(mat, ids) / exact:.4f}")
@@ -0,0 +1,117 @@
+# ===========================================================================
+# Bytes read and decoding time per minibatch when clipping utterances from
+# a synthetic Kaldi ark: reading the whole matrix then slicing, versus
+# seeking and decoding only the clipped frames.
+# ===========================================================================
+from __future__ import absolute_import, division, print_function
+
+import io
+import os
+import struct
+import tempfile
+import time
+
+import numpy as np
+
+from odin.preprocessing.kaldi_io import _read_ark_rows
+
+np.random.seed(8)
+
+n_utterances = 200
+n_frames = (3000, 30000)  # 30 seconds to 5 minutes at 100 frames/second
+n_dims = 30
+batch_size = 32
+clipping = (200, 400)  # 2 to 4 seconds
+
+
+class CountingFile(io.RawIOBase):
+
+  def __init__(self, f):
+    self.f = f
+    self.nbytes = 0
+
+  def seek(self, offset, whence=0):
+    return self.f.seek(offset, whence)
+
+  def tell(self):
+    return self.f.tell()
+
+  def read(self, n=-1):
+    data = self.f.read(n)
+    self.nbytes += len(data)
+    return data
+
+
+def write_matrix(f, x, token):
+  """ Write a binary Kaldi matrix, the compressed matrices are quantized
+  naively, the goal is only to produce a valid layout """
+  f.write(b'utt ')
+  offset = f.tell()
+  f.write(b'\0B')
+  rows, cols = x.shape
+  if token == 'FM':
+    f.write(b'FM ' + struct.pack('<bi', 4, rows) + struct.pack('<bi', 4, cols))
+    f.write(x.astype('<f4').tobytes())
+    return offset
+  min_value, max_value = float(x.min()), float(x.max())
+  value_range = max(max_value - min_value, 1e-8)
+  f.write(token.encode('ascii') + b' ' +
+          struct.pack('<ffii', min_value, value_range, rows, cols))
+  if token == 'CM2':
+    q = np.round((x - min_value) / value_range * 65535).astype('<u2')
+    f.write(q.tobytes())
+  elif token == 'CM3':
+    q = np.round((x - min_value) / value_range * 255).astype('u1')
+    f.write(q.tobytes())
+  else:  # 'CM' with per-column percentiles, column-major
+    p = np.percentile(x, [0, 25, 75, 100], axis=0).T
+    f.write(
+        np.round((p - min_value) / value_range * 65535).astype('<u2').tobytes())
+    f.write(np.random.randint(0, 256, size=(cols, rows)).astype('u1').tobytes())
+  return offset
+
+
+def benchmark(token):
+  path = os.path.join(tempfile.mkdtemp(), 'feats_%s.ark' % token)
+  lengths = np.random.randint(*n_frames, size=n_utterances)
+  with open(path, 'wb') as f:
+    offsets = [
+        write_matrix(f,
+                     np.random.randn(n, n_dims).astype('float32'), token)
+        for n in lengths
+    ]
+  batches = np.array_split(np.random.permutation(n_utterances),
+                           n_utterances // batch_size)
+  full_bytes, part_bytes = [], []
+  full_time, part_time = 0., 0.
+  with open(path, 'rb') as raw:
+    f = CountingFile(raw)
+    for batch in batches:
+      clip = np.random.randint(clipping[0], clipping[1] + 1)
+      starts = [np.random.randint(0, lengths[i] - clip + 1) for i in batch]
+      # read everything then slice
+      f.nbytes = 0
+      t = time.time()
+      full = [_read_ark_rows(f, offsets[i])[s:s + clip]
+              for i, s in zip(batch, starts)]
+      full_time += time.time() - t
+      full_bytes.append(f.nbytes)
+      # seek and slice
+      f.nbytes = 0
+      t = time.time()
+      part = [_read_ark_rows(f, offsets[i], s, s + clip)
+              for i, s in zip(batch, starts)]
+      part_time += time.time() - t
+      part_bytes.append(f.nbytes)
+      for x, y in zip(full, part):
+        assert np.array_equal(x, y)
+  os.remove(path)
+  print("[%-3s] bytes/batch full:%.2fMB partial:%.2fMB (%.1fx)  "
+        "time full:%.3fs partial:%.3fs" %
+        (token, np.mean(full_bytes) / 1024**2, np.mean(part_bytes) / 1024**2,
+         np.mean(full_bytes) / np.mean(part_bytes), full_time, part_time))
+
+
+if __name__ == '__main__':
+  for token in ('FM', 'CM', 'CM2', 'CM3'):
+    benchmark(token)
@@ -0,0 +1,82 @@
+# ===========================================================================
+# Compare the per-delay `TimeDelayDense` to the shared-projection
+# `TimeDelayFused` on the delay contexts of the x-vector recipes
+# (Kaldi `local/nnet3/xvector/tuning/run_xvector_1a.sh`)
+# ===========================================================================
+from __future__ import absolute_import, division, print_function
+
+import os
+import time
+
+import numpy as np
+
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+np.random.seed(8)
+
+batch_size = 64
+n_timestep = 300
+input_dim = 512
+units = 512
+n_repeat = 20
+contexts = [
+    (-2, -1, 0, 1, 2),  # frame1
+    (-2, 0, 2),  # frame2
+    (-3, 0, 3),  # frame3
+    (-4, 0, 4),  # extended TDNN
+    (0,),  # frame4, frame5
+]
+x = np.random.rand(batch_size, n_timestep, input_dim).astype('float32')
+
+
+def timing(fn):
+  fn()  # warm up and tracing
+  start = time.time()
+  for _ in range(n_repeat):
+    fn()
+  return (time.time() - start) / n_repeat
+
+
+def tensorflow_benchmark():
+  import tensorflow as tf
+  from odin.networks import TimeDelayDense, TimeDelayFused
+  inputs = tf.convert_to_tensor(x)
+  for context in contexts:
+    for activation in ('linear', 'relu'):
+      tdnn = TimeDelayDense(units,
+                            delay_context=context,
+                            activation=activation,
+                            use_bias=True)
+      tdnn(inputs)
+      fused = TimeDelayFused.from_time_delay(tdnn)
+      err = np.max(np.abs(tdnn(inputs).numpy() - fused(inputs).numpy()))
+      t1 = timing(tf.function(lambda: tdnn(inputs)))
+      t2 = timing(tf.function(lambda: fused(inputs)))
+      print(f"[TF]    {str(context):18s} {activation:6s} "
+            f"TimeDelay:{t1:.4f}s  Fused:{t2:.4f}s  "
+            f"speedup:{t1 / t2:.2f}x  max_err:{err:.2e}")
+
+
+def pytorch_benchmark():
+  import torch
+  from odin.networks_torch import TimeDelayDense, TimeDelayFused
+  inputs = torch.from_numpy(x)
+  with torch.no_grad():
+    for context in contexts:
+      for activation in ('linear', 'relu'):
+        tdnn = TimeDelayDense(units,
+                              delay_context=context,
+                              activation=activation,
+                              use_bias=True)
+        tdnn(inputs)
+        fused = TimeDelayFused.from_time_delay(tdnn)
+        err = torch.max(torch.abs(tdnn(inputs) - fused(inputs))).item()
+        t1 = timing(lambda: tdnn(inputs))
+        t2 = timing(lambda: fused(inputs))
+        print(f"[Torch] {str(context):18s} {activation:6s} "
+              f"TimeDelay:{t1:.4f}s  Fused:{t2:.4f}s  "
+              f"speedup:{t1 / t2:.2f}x  max_err:{err:.2e}")
+
+
+if __name__ == '__main__':
+  tensorflow_benchmark()
+  pytorch_benchmark()
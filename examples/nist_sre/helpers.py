@@ -294,8 +294,8 @@ def validating_noise_data(in_path_raw):
   n_exist = 0
   prog = Progbar(target=n_files, print_summary=True,
                  name="Validating noise dataset")
-  prog.set_summarizer(key='#Non-exist', fn=lambda x: x[-1])
-  prog.set_summarizer(key='#Exist', fn=lambda x: x[-1])
+  prog.set_summarizer(key='#Non-exist', fn=lambda x: x.last)
+  prog.set_summarizer(key='#Exist', fn=lambda x: x.last)
   # check all dataset
   for ds_name in noise_dataset:
     if ds_name not in sre_file_list:
@@ -357,8 +357,8 @@ def validating_training_data(in_path_raw, training_dataset):
   prog = Progbar(target=total_data,
                  print_summary=True, print_report=True,
                  name="Preprocessing File List")
-  prog.set_summarizer('#Files', fn=lambda x: x[-1])
-  prog.set_summarizer('#Non-exist', fn=lambda x: x[-1])
+  prog.set_summarizer('#Files', fn=lambda x: x.last)
+  prog.set_summarizer('#Non-exist', fn=lambda x: x.last)
   # ====== iterating ====== #
   for ds_name, data in sorted(file_list.items(),
                               key=lambda x: x[0]):
@@ -578,11 +578,11 @@ def filter_utterances(X, indices, spkid,
   prog = Progbar(target=len(indices),
                  print_report=True, print_summary=True,
                  name='Filtering broken utterances: %s' % title)
-  prog.set_summarizer('zero-length', fn=lambda x: x[-1])
-  prog.set_summarizer('min-frames', fn=lambda x: x[-1])
-  prog.set_summarizer('zero-var', fn=lambda x: x[-1])
-  prog.set_summarizer('small-var', fn=lambda x: x[-1])
-  prog.set_summarizer('overflow', fn=lambda x: x[-1])
+  prog.set_summarizer('zero-length', fn=lambda x: x.last)
+  prog.set_summarizer('min-frames', fn=lambda x: x.last)
+  prog.set_summarizer('zero-var', fn=lambda x: x.last)
+  prog.set_summarizer('small-var', fn=lambda x: x.last)
+  prog.set_summarizer('overflow', fn=lambda x: x.last)
 
   # ====== mpi function for checking ====== #
   @nb.jit(nopython=True, nogil=True)
@@ -4,6 +4,8 @@
 from __future__ import absolute_import, division, print_function
 
 import math
+import os
+import warnings
 
 import numpy as np
 import scipy as sp
@@ -15,9 +17,159 @@ from odin.backend.tensor import nonzeros, transpose
 from odin.utils import as_tuple, is_number
 
 
-def frechet_inception_distance(original: np.ndarray,
-                               generated: np.ndarray,
-                               eps: float = 1e-6) -> float:
+class FrechetStatistics(object):
+  """ Streaming mean and covariance of features (e.g. Inception pool3) for
+  the Frechet Inception Distance, the memory is `O(n_features^2)` regardless
+  of the number of samples.
+
+  The moments are accumulated batch by batch in float64 with the pairwise
+  merge of Chan et al., which is numerically stable, and two statistics
+  (e.g. from parallel workers) could be merged by `merge` or `+`.
+
+  Examples
+  --------
+  >>> ref = FrechetStatistics.cached('/tmp/cifar10_fid.npz',
+  ...                                (extract(x) for x in train_batches))
+  >>> gen = FrechetStatistics()
+  >>> for x in generated_batches:
+  ...   gen.update(extract(x))
+  >>> fid = ref.distance(gen)
+  """
+
+  def __init__(self, n_features=None):
+    self.n = 0
+    self._mean = None
+    self._scatter = None
+    if n_features is not None:
+      self._init(int(n_features))
+
+  def _init(self, n_features):
+    self._mean = np.zeros(shape=(n_features,), dtype=np.float64)
+    self._scatter = np.zeros(shape=(n_features, n_features), dtype=np.float64)
+
+  @property
+  def n_features(self):
+    return None if self._mean is None else self._mean.shape[0]
+
+  @property
+  def mean(self) -> np.ndarray:
+    return self._mean
+
+  @property
+  def covariance(self) -> np.ndarray:
+    """ The unbiased covariance matrix """
+    return self._scatter / max(self.n - 1, 1)
+
+  def _merge_moments(self, n, mean, scatter):
+    if self._mean is None:
+      self._init(mean.shape[0])
+    assert mean.shape[0] == self.n_features, \
+      f"Expect {self.n_features} features but given {mean.shape[0]}"
+    total = self.n + n
+    delta = mean - self._mean
+    self._mean += delta * (n / total)
+    self._scatter += scatter
+    self._scatter += np.outer(delta, delta) * (self.n * n / total)
+    self.n = total
+    return self
+
+  def update(self, X) -> 'FrechetStatistics':
+    """ Accumulate a batch of features `[n_samples, n_features]` """
+    X = np.asarray(X, dtype=np.float64)
+    X = np.reshape(X, (X.shape[0], -1))
+    if X.shape[0] == 0:
+      return self
+    mean = np.mean(X, axis=0)
+    X = X - mean
+    return self._merge_moments(X.shape[0], mean, np.dot(X.T, X))
+
+  def merge(self, other: 'FrechetStatistics') -> 'FrechetStatistics':
+    if other.n > 0:
+      self._merge_moments(other.n, other._mean, other._scatter)
+    return self
+
+  def __iadd__(self, other):
+    return self.merge(other)
+
+  def __add__(self, other):
+    stats = FrechetStatistics()
+    stats.merge(self)
+    return stats.merge(other)
+
+  # ====== disk cache ====== #
+  def save(self, path: str) -> 'FrechetStatistics':
+    if self.n == 0:
+      raise ValueError(f"Cannot save empty statistics to {path}")
+    np.savez(path, n=self.n, mean=self._mean, scatter=self._scatter)
+    return self
+
+  @classmethod
+  def load(cls, path: str) -> 'FrechetStatistics':
+    with np.load(path) as data:
+      stats = cls()
+      stats.n = int(data['n'])
+      stats._mean = data['mean']
+      stats._scatter = data['scatter']
+    return stats
+
+  @classmethod
+  def cached(cls, path: str, batches) -> 'FrechetStatistics':
+    """ Load the statistics from `path` if exists, otherwise, accumulate them
+    from an iterable of feature batches (e.g. of the reference dataset) and
+    save them to `path` """
+    path = str(path)
+    if not path.endswith('.npz'):
+      path += '.npz'
+    if os.path.exists(path):
+      return cls.load(path)
+    stats = cls()
+    for X in batches:
+      stats.update(X)
+    if stats.n == 0:
+      raise ValueError(
+          f"No samples in the given batches, cannot cache the statistics "
+          f"to {path}")
+    return stats.save(path)
+
+  # ====== distance ====== #
+  def distance(self, other: 'FrechetStatistics', eps: float = 1e-6) -> float:
+    """ The Frechet distance between the two Gaussians
+
+    `d^2 = ||mu_1 - mu_2||^2 + Tr(C_1 + C_2 - 2*sqrt(C_1*C_2))`
+
+    `Tr(sqrt(C_1*C_2))` is the sum of the square root of the eigenvalues of
+    the symmetric `sqrt(C_1) C_2 sqrt(C_1)`, computed by two symmetric
+    eigendecompositions instead of a general `sqrtm`.
+    """
+    if self.n == 0 or other.n == 0:
+      raise ValueError("Cannot compute the Frechet distance of empty "
+                       f"statistics, number of samples: {self.n} and "
+                       f"{other.n}")
+    c_1 = self.covariance
+    c_2 = other.covariance
+    diff = self.mean - other.mean
+    try:
+      trace_covmean = _trace_sqrt_product(c_1, c_2)
+    except np.linalg.LinAlgError:
+      # product might be almost singular
+      offset = np.eye(c_1.shape[0]) * eps
+      trace_covmean = _trace_sqrt_product(c_1 + offset, c_2 + offset)
+    return float(
+        diff.dot(diff) + np.trace(c_1) + np.trace(c_2) - 2 * trace_covmean)
+
+
+def _trace_sqrt_product(c_1, c_2):
+  w, v = np.linalg.eigh(c_1)
+  sqrt_c1 = (v * np.sqrt(np.maximum(w, 0.))).dot(v.T)
+  m = sqrt_c1.dot(c_2).dot(sqrt_c1)
+  ev = np.linalg.eigvalsh((m + m.T) / 2.)
+  return np.sum(np.sqrt(np.maximum(ev, 0.)))
+
+
+def frechet_inception_distance(original,
+                               generated,
+                               eps: float = 1e-6,
+                               batch_size: int = 5000) -> float:
   """ Numpy implementation of the Frechet Distance.
   The Frechet distance between two multivariate Gaussians:
     - X_1 ~ N(mu_1, C_1)
@@ -25,41 +177,36 @@ def frechet_inception_distance(original: np.ndarray,
 
   is: `d^2 = ||mu_1 - mu_2||^2 + Tr(C_1 + C_2 - 2*sqrt(C_1*C_2))`.
 
-  Stable version by Dougal J. Sutherland.
-  https://github.com/bioinf-jku/TTUR/blob/master/fid.py
+  The moments are accumulated in batches by `FrechetStatistics`, and the
+  trace term is computed by symmetric eigendecompositions.
 
   Parameters
   ----------
-  original : np.ndarray
-      features for the original images
-  generated : np.ndarray
-      features for the generated images
+  original : {np.ndarray, FrechetStatistics}
+      features for the original images, or their (cached) statistics
+  generated : {np.ndarray, FrechetStatistics}
+      features for the generated images, or their statistics
   eps : float, optional
       epsilon for numberical stability, by default 1e-6
+  batch_size : int, optional
+      number of samples for each update of the moments, by default 5000
 
   Returns
   -------
   float : The Frechet Distance.
   """
-  assert original.shape == generated, \
-    f'Shape mismatch original={original.shape} generated={generated.shape}'
-  u_1 = np.mean(original, axis=0)
-  u_2 = np.mean(generated, axis=0)
-  c_1 = np.cov(original, rowvar=True)
-  c_2 = np.cov(generated, rowvar=True)
-  diff = u_1 - u_2
-
-  # product might be almost singular
-  covmean, _ = sp.linalg.sqrtm(c_1.dot(c_2), disp=False)
-  if not np.all(np.isfinite(covmean)):
-    offset = np.eye(c_1.shape[0]) * eps
-    covmean = sp.linalg.sqrtm((c_1 + offset).dot(c_2 + offset))
-
-  # numerical error might give slight imaginary component
-  if np.iscomplexobj(covmean):
-    covmean = covmean.real
-
-  return diff.dot(diff) + np.trace(c_1 + c_2 - 2 * covmean)
+  stats = []
+  for X in (original, generated):
+    if not isinstance(X, FrechetStatistics):
+      X_stats = FrechetStatistics()
+      for start in range(0, X.shape[0], batch_size):
+        X_stats.update(X[start:start + batch_size])
+      X = X_stats
+    stats.append(X)
+  assert stats[0].n_features == stats[1].n_features, \
+    (f'Shape mismatch original={stats[0].n_features} '
+     f'generated={stats[1].n_features}')
+  return stats[0].distance(stats[1], eps=eps)
 
 
 # ===========================================================================
@@ -657,6 +804,190 @@ def det_curve(y_true, y_score, pos_label=None, sample_weight=None):
   return Pfa, Pmiss
 
 
+class StreamingDetectionMetric(object):
+  """ Streaming and mergeable evaluation of detection metrics: EER, minDCF
+  and DET curve.
+
+  Scores are accumulated chunk by chunk into a fixed-resolution histogram
+  per class (target and non-target), hence, the memory is `O(n_bins)`
+  regardless of the number of trials. Scores outside `score_range` are
+  accumulated into an underflow and an overflow bin (with a warning), so the
+  operating points within the range stay exact, but the curve isn't resolved
+  beyond the range. Non-finite scores (NaN) are ignored with a warning.
+  Two evaluators with the same `score_range` and `n_bins` (e.g. from
+  parallel scoring workers) could be merged by `merge` or `+`.
+
+  The operating points are evaluated at the bins' edges, the error of the
+  EER is bounded by the largest fraction of target or non-target trials
+  that fall into the bin where the miss and false alarm curves cross,
+  see `error_bound`. Increase `n_bins` for a tighter bound.
+
+  Parameters
+  ----------
+  score_range : tuple of 2 scalars
+      the `(min, max)` range of the scores
+  n_bins : int
+      the number of histogram bins
+  pos_label : int, optional (default=1)
+      The label of the positive class
+
+  Examples
+  --------
+  >>> metric = StreamingDetectionMetric(score_range=(-50, 50))
+  >>> for scores, labels in scoring_workers:
+  ...   metric.update(scores, labels)
+  >>> eer = metric.compute_EER()
+  >>> min_dcf, Pfa, Pmiss = metric.compute_minDCF(Ptrue=0.01)
+  """
+
+  def __init__(self, score_range=(-100., 100.), n_bins=100000, pos_label=1):
+    low, high = [float(i) for i in score_range]
+    assert high > low, f"Invalid score_range={score_range}"
+    self.score_range = (low, high)
+    self.n_bins = int(n_bins)
+    self.pos_label = pos_label
+    self._scale = self.n_bins / (high - low)
+    # the first and the last bins are the underflow and overflow bins
+    self._target = np.zeros(shape=(self.n_bins + 2,), dtype=np.float64)
+    self._nontarget = np.zeros(shape=(self.n_bins + 2,), dtype=np.float64)
+
+  @property
+  def thresholds(self):
+    """ The edges of the bins, shape `[n_bins + 1]` """
+    return np.linspace(self.score_range[0],
+                       self.score_range[1],
+                       self.n_bins + 1,
+                       dtype=np.float64)
+
+  @property
+  def n_target(self):
+    return np.sum(self._target)
+
+  @property
+  def n_nontarget(self):
+    return np.sum(self._nontarget)
+
+  def update(self, y_true, y_score, sample_weight=None):
+    """ Accumulate a chunk of scores
+
+    Parameters
+    ----------
+    y_true : array, shape = [n_samples]
+        True targets of binary classification in range {-1, 1} or {0, 1}.
+    y_score : array, shape = [n_samples]
+        Estimated probabilities or decision function.
+    sample_weight : array-like of shape = [n_samples], optional
+        Sample weights.
+    """
+    y_score = np.asarray(y_score, dtype=np.float64).ravel()
+    y_true = np.asarray(y_true).ravel() == self.pos_label
+    if len(y_true) != len(y_score):
+      raise ValueError("Provided %d labels, but got scores for %d samples." %
+                       (len(y_true), len(y_score)))
+    if sample_weight is None:
+      sample_weight = np.ones(shape=(len(y_score),), dtype=np.float64)
+    else:
+      sample_weight = np.asarray(sample_weight, dtype=np.float64).ravel()
+    # ignore NaN scores
+    nan = np.isnan(y_score)
+    if np.any(nan):
+      warnings.warn(f"Ignore {np.sum(nan)} NaN scores")
+      y_score = y_score[~nan]
+      y_true = y_true[~nan]
+      sample_weight = sample_weight[~nan]
+    low, high = self.score_range
+    outside = (y_score < low) | (y_score >= high)
+    if np.any(outside):
+      warnings.warn(
+          f"{np.sum(outside)} scores are outside score_range={self.score_range}"
+          ", the operating points beyond the range are not resolved, "
+          "widen the score_range if necessary")
+    # bin `i + 1` contains the scores in `[edge_i, edge_{i+1})`
+    idx = np.floor((y_score - low) * self._scale) + 1
+    idx = np.clip(idx, 0, self.n_bins + 1).astype(np.int64)
+    self._target += np.bincount(idx[y_true],
+                                weights=sample_weight[y_true],
+                                minlength=self.n_bins + 2)
+    self._nontarget += np.bincount(idx[~y_true],
+                                   weights=sample_weight[~y_true],
+                                   minlength=self.n_bins + 2)
+    return self
+
+  def merge(self, *others):
+    """ Merge the partial results of other evaluators into this one """
+    for other in others:
+      if not isinstance(other, StreamingDetectionMetric) or \
+        other.score_range != self.score_range or other.n_bins != self.n_bins:
+        raise ValueError("Only merge StreamingDetectionMetric with the same "
+                         "score_range and n_bins")
+      self._target += other._target
+      self._nontarget += other._nontarget
+    return self
+
+  def __add__(self, other):
+    new = StreamingDetectionMetric(score_range=self.score_range,
+                                   n_bins=self.n_bins,
+                                   pos_label=self.pos_label)
+    return new.merge(self, other)
+
+  def __iadd__(self, other):
+    return self.merge(other)
+
+  def reset(self):
+    self._target[:] = 0.
+    self._nontarget[:] = 0.
+    return self
+
+  def det_curve(self):
+    """ Detection error trade-off evaluated at the thresholds
+    `[-inf, *thresholds, inf]`, a trial is accepted if its score is
+    greater or equal to the threshold.
+
+    Returns
+    -------
+    P_fa: array, shape = [n_bins + 3]
+        fpr - False Positive rate, or false alarm probabilities
+    P_miss : array, shape = [n_bins + 3]
+        fnr - False Negative rate, or miss probabilities
+    """
+    if self.n_target == 0 or self.n_nontarget == 0:
+      raise RuntimeError("Both target and non-target scores are required, "
+                         f"given: {self.n_target} targets and "
+                         f"{self.n_nontarget} non-targets")
+    Pmiss = np.concatenate([[0.], np.cumsum(self._target)]) / self.n_target
+    Pfa = 1 - np.concatenate([[0.], np.cumsum(self._nontarget)
+                             ]) / self.n_nontarget
+    return Pfa, Pmiss
+
+  def compute_EER(self, return_bound=False):
+    """ Equal error rate, if `return_bound=True`, also return the upper bound
+    of its absolute error (see `error_bound`) """
+    Pfa, Pmiss = self.det_curve()
+    eer = compute_EER(Pfa, Pmiss)
+    if return_bound:
+      return eer, self.error_bound()
+    return eer
+
+  def compute_minDCF(self, Cmiss=1, Cfa=1, Ptrue=0.5):
+    """ Minimum detection cost, see `compute_minDCF` """
+    Pfa, Pmiss = self.det_curve()
+    return compute_minDCF(Pfa, Pmiss, Cmiss=Cmiss, Cfa=Cfa, Ptrue=Ptrue)
+
+  def error_bound(self):
+    """ The upper bound of the absolute error of the EER caused by the
+    histogram resolution """
+    Pfa, Pmiss = self.det_curve()
+    crossing = np.flatnonzero(Pmiss - Pfa >= 0)[0]
+    k = max(crossing - 1, 0)
+    return max(self._target[k] / self.n_target,
+               self._nontarget[k] / self.n_nontarget)
+
+  def __str__(self):
+    return (f"<StreamingDetectionMetric range:{self.score_range} "
+            f"bins:{self.n_bins} targets:{self.n_target:.0f} "
+            f"non-targets:{self.n_nontarget:.0f}>")
+
+
 # ===========================================================================
 # Distance measurement
 # ===========================================================================
@@ -1 +1 @@
-from odin.traininglain import adversarial_attack, deep_dream
+from odin.explain import adversarial_attack, deep_dream
@@ -7,11 +7,10 @@ import numpy as np
 import tensorflow as tf
 from sklearn.base import BaseEstimator
 
-from odin.traininglain.helpers import _may_add_batch_dim, get_pretrained_model
+from odin.explain.helpers import (_iter_chunks, _may_add_batch_dim,
+                                  get_pretrained_model)
 
 
-# it seems adding tf.function don't improve much performance
-# @tf.function
 def _adversarial_optimizing(model, X, y, X_org, loss_function, l2_norm, l1_norm,
                             learning_rate):
   with tf.GradientTape() as tape:
@@ -27,10 +26,29 @@ def _adversarial_optimizing(model, X, y, X_org, loss_function, l2_norm, l1_norm,
   gradients /= tf.math.reduce_std(gradients) + 1e-8
   # gradient descent
   X = X - gradients * learning_rate
-  return loss, X
+  return loss, X, y_pred
+
+
+def _target_success(y, y_pred):
+  # the samples which are already classified as the target class
+  y_pred = tf.argmax(y_pred, axis=-1)
+  if y.shape.ndims == y_pred.shape.ndims + 1:  # one-hot targets
+    y = tf.argmax(y, axis=-1)
+  return tf.equal(tf.cast(y_pred, tf.int64), tf.cast(y, tf.int64))
 
 
 class AdversarialAttack(BaseEstimator):
+  r"""
+  Arguments:
+    model : `keras.Model` or String, the attacked model.
+    loss_function : callable. Loss to the target labels, minimized by
+      gradient descent on the inputs.
+    batch_size : Integer (optional). Attacking large batches in chunks of
+      `batch_size` samples, if None, attack all the samples at once.
+    early_stop : Boolean. If True, a sample is frozen as soon as it is
+      classified as its target, and the attack of a chunk stops once all of
+      its samples succeed, the check is evaluated on-device.
+  """
 
   def __init__(self,
                model,
@@ -40,6 +58,8 @@ class AdversarialAttack(BaseEstimator):
                l2_norm=0.0,
                l1_norm=0.0,
                learning_rate=0.01,
+               batch_size=None,
+               early_stop=False,
                verbose=10):
     super().__init__()
     self.model = get_pretrained_model(model, model_kwargs)
@@ -51,22 +71,75 @@ class AdversarialAttack(BaseEstimator):
     self.epoch = epoch
     self.l2_norm = l2_norm
     self.l1_norm = l1_norm
+    self.batch_size = batch_size
+    self.early_stop = bool(early_stop)
     self.verbose = int(verbose)
+    self._attack_functions = {}
+
+  def _attack(self, X, y):
+    r""" The whole optimization loop, compiled as a single function """
+    X_org = X
+    mask_shape = tf.concat(
+        [tf.shape(X)[:1],
+         tf.ones([tf.rank(X) - 1], dtype=tf.int32)], axis=0)
+
+    def cond(epoch, X, loss, done):
+      return tf.logical_and(epoch < self.epoch,
+                            tf.logical_not(tf.reduce_all(done)))
+
+    def body(epoch, X, loss, done):
+      loss, X_new, y_pred = _adversarial_optimizing(self.model, X, y, X_org,
+                                                    self.loss_function,
+                                                    self.l2_norm, self.l1_norm,
+                                                    self.learning_rate)
+      loss = tf.reduce_mean(loss)
+      if self.early_stop:
+        done = _target_success(y, y_pred)
+        X_new = tf.where(tf.reshape(done, mask_shape), X, X_new)
+      if self.verbose > 0:
+        log = ["Epoch#", epoch + 1, "Loss:", loss]
+        if self.early_stop:
+          log += ["Success:", tf.reduce_mean(tf.cast(done, tf.float32))]
+        tf.cond(tf.equal((epoch + 1) % self.verbose, 0),
+                lambda: tf.print(*log), lambda: tf.no_op())
+      return epoch + 1, X_new, loss, done
+
+    epoch, X, loss, done = tf.while_loop(
+        cond,
+        body,
+        loop_vars=(tf.constant(0), X, tf.constant(0., dtype=self.dtype),
+                   tf.zeros(tf.shape(X)[:1], dtype=tf.bool)),
+        shape_invariants=(tf.TensorShape([]), X.shape, tf.TensorShape([]),
+                          tf.TensorShape([None])))
+    return X, epoch
+
+  def _attack_function(self, X, y):
+    # fixed signature, the chunks of different size share the same graph
+    key = (tuple(X.shape[1:]), tuple(y.shape[1:]), y.dtype)
+    if key not in self._attack_functions:
+      self._attack_functions[key] = tf.function(
+          self._attack,
+          input_signature=[
+              tf.TensorSpec(shape=(None,) + key[0], dtype=X.dtype),
+              tf.TensorSpec(shape=(None,) + key[1], dtype=y.dtype)
+          ])
+    return self._attack_functions[key]
 
   def fit(self, X, y):
     X = _may_add_batch_dim(X, self.input_shape)
     X = tf.convert_to_tensor(X, dtype=self.dtype)
-    X_org = X
     y = tf.convert_to_tensor(y, dtype=self.model.output.dtype)
-    benchmark = []
-
-    for epoch in range(self.epoch):
+    if y.shape.ndims == 0:
+      y = tf.expand_dims(y, axis=0)
+    attack = self._attack_function(X, y)
+    outputs = []
+    for start, end in _iter_chunks(X.shape[0], self.batch_size):
       start_time = time.time()
-      loss, X = _adversarial_optimizing(self.model, X, y, X_org,
-                                        self.loss_function, self.l2_norm,
-                                        self.l1_norm, self.learning_rate)
-      benchmark.append(time.time() - start_time)
-      if self.verbose > 0 and (epoch + 1) % self.verbose == 0:
-        print("Epoch#%d Loss:%.4f (%.2f sec/epoch)" %
-              (epoch + 1, loss, np.mean(benchmark)))
-    return X.numpy()
+      X_adv, n_epoch = attack(X[start:end], y[start:end])
+      n_epoch = int(n_epoch)
+      if self.verbose > 0:
+        print("Samples:[%d, %d) Epoch:%d (%.2f sec/epoch)" %
+              (start, end, n_epoch,
+               (time.time() - start_time) / max(n_epoch, 1)))
+      outputs.append(X_adv.numpy())
+    return np.concatenate(outputs, axis=0)
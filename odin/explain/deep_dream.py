@@ -10,10 +10,10 @@ from six import string_types
 from sklearn.base import BaseEstimator
 from tensorflow import keras
 
-from odin.traininglain.helpers import _may_add_batch_dim, get_pretrained_model
+from odin.explain.helpers import (_iter_chunks, _may_add_batch_dim,
+                                  get_pretrained_model)
 
 
-@tf.function
 def _deep_dream_optimizing(model, img, learning_rate, func_reduce):
   with tf.GradientTape() as tape:
     # This needs gradients relative to `img`
@@ -47,6 +47,11 @@ class DeepDream(BaseEstimator):
     layers : list of String. Maximizing the activation of layers with
       given name
     loss_func : callable. Loss function for maximizing (i.e. gradient ascent)
+    batch_size : Integer (optional). Dreaming on large batches in chunks of
+      `batch_size` images, if None, all the images at once.
+    tol : Float. Early stopping of an octave when the relative change of
+      the loss between two epochs is smaller than `tol`, evaluated
+      on-device, if 0, always run all the epochs.
   """
 
   def __init__(self,
@@ -61,6 +66,8 @@ class DeepDream(BaseEstimator):
                    'include_top': False,
                    'weights': 'imagenet'
                },
+               batch_size=None,
+               tol=0.,
                verbose=10):
     super().__init__()
     # model settings
@@ -76,7 +83,10 @@ class DeepDream(BaseEstimator):
     self.learning_rate = float(learning_rate)
     self.octave_scale = float(octave_scale)
     self.octave_step = int(octave_step)
+    self.batch_size = batch_size
+    self.tol = float(tol)
     self.verbose = int(verbose)
+    self._dream_function = None
 
   def set_layers(self, layers):
     layers = tf.nest.flatten(layers)
@@ -88,28 +98,79 @@ class DeepDream(BaseEstimator):
     self.dream_model = keras.Model(inputs=self.model.input,
                                    outputs=layers,
                                    name=name)
+    self._dream_function = None
     return self
 
+  def _dream(self, X, octave):
+    r""" The whole optimization loop of an octave, compiled as a single
+    function """
+
+    def cond(epoch, X, loss, last_loss):
+      running = epoch < self.epoch
+      if self.tol > 0:
+        change = tf.abs(loss - last_loss) / (tf.abs(last_loss) + 1e-8)
+        running = tf.logical_and(
+            running, tf.logical_or(epoch < 2, change > self.tol))
+      return running
+
+    def body(epoch, X, loss, last_loss):
+      new_loss, X = _deep_dream_optimizing(self.dream_model, X,
+                                           self.learning_rate,
+                                           self.loss_function)
+      if self.verbose > 0:
+        tf.cond(
+            tf.equal((epoch + 1) % self.verbose, 0),
+            lambda: tf.print("Octave#", octave, "Epoch#", epoch + 1, "Loss:",
+                             new_loss), lambda: tf.no_op())
+      return epoch + 1, X, new_loss, loss
+
+    loss = tf.constant(0., dtype=self.dtype)
+    epoch, X, _, _ = tf.while_loop(cond,
+                                   body,
+                                   loop_vars=(tf.constant(0), X, loss, loss),
+                                   shape_invariants=(tf.TensorShape([]),
+                                                     X.shape,
+                                                     tf.TensorShape([]),
+                                                     tf.TensorShape([])))
+    return X, epoch
+
   def fit(self, X):
     # add batch dimension if necessary
     X = _may_add_batch_dim(X, self.input_shape)
     X = tf.convert_to_tensor(X, dtype=self.dtype)
-    base_shape = tf.cast(tf.shape(X)[1:-1], tf.float32)
-    benchmark = []
-
-    for step in range(max(self.octave_step, 1)):
-      # resize the image
-      if self.octave_scale > 1:
-        new_shape = tf.cast(base_shape * (self.octave_scale**step), tf.int32)
-        print(" * Resize: old_shape=%s -> new_shape=%s" % (X.shape, new_shape))
-        X = tf.image.resize(X, new_shape)
-      # optimize the resized image
-      for epoch in range(self.epoch):
+    # fixed signature, no retracing for different chunk size, and for the
+    # different octave shape if the model has no fixed input shape
+    if self._dream_function is None:
+      # only the channel dimension is fixed, the octaves resize the spatial
+      # dimensions of the inputs
+      ndim = len(self.input_shape)
+      self._dream_function = tf.function(
+          self._dream,
+          input_signature=[
+              tf.TensorSpec(shape=(None,) * (ndim - 1) +
+                            (self.input_shape[-1],),
+                            dtype=self.dtype),
+              tf.TensorSpec(shape=(), dtype=tf.int32)
+          ])
+    outputs = []
+    for start, end in _iter_chunks(X.shape[0], self.batch_size):
+      x = X[start:end]
+      base_shape = tf.cast(tf.shape(x)[1:-1], tf.float32)
+      for step in range(max(self.octave_step, 1)):
+        # resize the image
+        if self.octave_scale > 1:
+          new_shape = tf.cast(base_shape * (self.octave_scale**step), tf.int32)
+          if self.verbose > 0:
+            print(" * Resize: old_shape=%s -> new_shape=%s" %
+                  (x.shape, new_shape))
+          x = tf.image.resize(x, new_shape)
+        # optimize the resized image
         start_time = time.time()
-        loss, X = _deep_dream_optimizing(self.dream_model, X,
-                                         self.learning_rate, self.loss_function)
-        benchmark.append(time.time() - start_time)
-        if self.verbose > 0 and (epoch + 1) % self.verbose == 0:
-          print("Octave#%d Epoch#%d Shape:%s Loss:%.4f (%.2f sec/epoch)" %
-                (step, epoch + 1, X.shape, loss, np.mean(benchmark)))
-    return X.numpy()
+        x, n_epoch = self._dream_function(x, tf.constant(step))
+        n_epoch = int(n_epoch)
+        if self.verbose > 0:
+          print("Octave#%d Epoch:%d Shape:%s (%.2f sec/epoch)" %
+                (step, n_epoch, x.shape,
+                 (time.time() - start_time) / max(n_epoch, 1)))
+      outputs.append(x.numpy())
+    return np.concatenate(outputs, axis=0)
@@ -31,3 +31,12 @@ def _may_add_batch_dim(X, input_shape):
       for i, j in zip(input_shape, X.shape)), \
         "Require input_shape=%s but X.shape=%s" % (input_shape, X.shape)
   return X
+
+
+def _iter_chunks(n, batch_size):
+  # iterate over the (start, end) of the chunks, a single chunk if batch_size
+  # is None
+  if batch_size is None or batch_size <= 0:
+    batch_size = n
+  for start in range(0, n, int(batch_size)):
+    yield start, min(start + int(batch_size), n)
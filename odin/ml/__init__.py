@@ -8,6 +8,8 @@ from odin.ml.tree import *
 from odin.ml.decompositions import *
 from odin.ml.fast_lda_topics import fast_lda_topics, get_topics_string
 from odin.ml.linear_model import *
+from odin.ml.embedding_cache import (EmbeddingCache, get_embedding_cache,
+                                     set_embedding_cache)
 from odin.ml.fast_tsne import fast_tsne
 from odin.ml.fast_umap import fast_umap
 from odin.ml.gmm_classifier import GMMclassifier
@@ -17,6 +19,7 @@ from odin.ml.gmm_tmat import GMM, Tmatrix
 from odin.ml.ivector import Ivector
 from odin.ml.neural_nlp import *
 from odin.ml.plda import PLDA
+from odin.ml.trial_scoring import TrialScorer
 from odin.ml.scoring import (Scorer, VectorNormalizer, compute_class_avg,
                              compute_wccn, compute_within_cov)
 from odin.utils import get_function_arguments
@@ -0,0 +1,305 @@
+from __future__ import absolute_import, division, print_function
+
+import os
+import pickle
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import numpy as np
+from odin.utils.crypto import md5_checksum
+
+__all__ = [
+    'EmbeddingCache',
+    'get_embedding_cache',
+    'set_embedding_cache',
+]
+
+
+# ===========================================================================
+# Helpers
+# ===========================================================================
+def _row_fingerprints(x: np.ndarray) -> np.ndarray:
+  r""" A vectorized 64-bit fingerprint for every row of `x`, used for
+  matching the rows of a new dataset to the rows of a cached one """
+  x = np.ascontiguousarray(x)
+  n = x.shape[0]
+  data = x.reshape(n, -1).view(np.uint8)
+  # pad the rows to a multiple of 8 bytes
+  pad = (-data.shape[1]) % 8
+  if pad > 0:
+    data = np.concatenate([data, np.zeros((n, pad), dtype=np.uint8)], axis=1)
+  words = data.view(np.uint64)
+  coeffs = np.random.RandomState(8).randint(1, 2**62,
+                                            size=words.shape[1],
+                                            dtype=np.uint64) | np.uint64(1)
+  with np.errstate(over='ignore'):
+    return np.sum(words * coeffs[None, :], axis=1, dtype=np.uint64)
+
+
+def _stable_repr(obj) -> str:
+  r""" A representation of the hyper-parameters that is stable across
+  processes, i.e. without the memory address of the objects """
+  if isinstance(obj, (tuple, list)):
+    return '[' + ','.join(_stable_repr(i) for i in obj) + ']'
+  if isinstance(obj, dict):
+    items = sorted(obj.items(), key=lambda kv: str(kv[0]))
+    return '{' + ','.join(
+        f"{_stable_repr(k)}:{_stable_repr(v)}" for k, v in items) + '}'
+  if isinstance(obj, np.ndarray):
+    return f"ndarray:{md5_checksum(obj)}"
+  if isinstance(obj, np.random.RandomState):
+    name, keys, pos, has_gauss, cached_gaussian = obj.get_state()
+    return f"RandomState:{md5_checksum([keys, pos, has_gauss, cached_gaussian])}"
+  if callable(obj) and hasattr(obj, '__qualname__'):
+    return f"{getattr(obj, '__module__', '')}.{obj.__qualname__}"
+  return re.sub(r" at 0x[0-9a-fA-F]+", "", repr(obj))
+
+
+class _Entry:
+
+  __slots__ = ['embedding', 'fingerprints', 'params_key']
+
+  def __init__(self, embedding, fingerprints, params_key):
+    self.embedding = embedding
+    self.fingerprints = fingerprints
+    self.params_key = params_key
+
+  @property
+  def nbytes(self):
+    return self.embedding.nbytes + (0 if self.fingerprints is None else
+                                    self.fingerprints.nbytes)
+
+
+# ===========================================================================
+# Main
+# ===========================================================================
+class EmbeddingCache:
+  r""" A size-bounded LRU cache of the embeddings computed by `fast_tsne` and
+  `fast_umap`, optionally persisted to disk so the embeddings are reused
+  across processes.
+
+  The key of an embedding combines the algorithm, all of its
+  hyper-parameters and the MD5 fingerprint of the input data.
+
+  Arguments:
+    max_entries : an Integer. Maximum number of embeddings kept in memory.
+    max_bytes : an Integer. Maximum total size (in bytes) of the embeddings
+      kept in memory.
+    path : a String (optional). Path to a folder for storing the embeddings
+      on disk, if None, the cache is in memory only.
+    max_disk_entries : an Integer. Maximum number of embeddings stored on
+      disk, the least recently used files are removed first.
+
+  Example:
+  ```
+  set_embedding_cache(EmbeddingCache(path='~/.odin_cache/embedding'))
+  x_tsne = fast_tsne(x)  # computed
+  x_tsne = fast_tsne(x)  # loaded from the cache
+  ```
+  """
+
+  def __init__(self,
+               max_entries: int = 32,
+               max_bytes: int = 1024**3,
+               path: Optional[str] = None,
+               max_disk_entries: int = 256):
+    self.max_entries = int(max_entries)
+    self.max_bytes = int(max_bytes)
+    self.max_disk_entries = int(max_disk_entries)
+    if path is not None:
+      path = os.path.abspath(os.path.expanduser(str(path)))
+      if not os.path.exists(path):
+        os.makedirs(path)
+      assert os.path.isdir(path), f"Cache path must be a folder, given: {path}"
+    self.path = path
+    self._entries = OrderedDict()
+    self._nbytes = 0
+    self._lock = threading.RLock()
+
+  # ====== keys ====== #
+  @staticmethod
+  def params_key(algorithm: str, params: Dict[str, Any]) -> str:
+    r""" The key of the algorithm and its hyper-parameters only """
+    params = {k: v for k, v in params.items() if k not in ('verbose',)}
+    return md5_checksum(
+        dict(algorithm=str(algorithm), params=_stable_repr(params)))
+
+  @staticmethod
+  def data_key(params_key: str, *X: np.ndarray) -> str:
+    r""" The key of the hyper-parameters combined with the data """
+    return md5_checksum(params_key + ''.join(md5_checksum(x) for x in X))
+
+  # ====== disk ====== #
+  def _file(self, key):
+    return os.path.join(self.path, f"{key}.pkl")
+
+  def _load(self, key) -> Optional[_Entry]:
+    if self.path is None or not os.path.isfile(self._file(key)):
+      return None
+    try:
+      with open(self._file(key), 'rb') as f:
+        data = pickle.load(f)
+      os.utime(self._file(key))  # mark as recently used
+    except Exception:  # corrupted or concurrently removed file
+      return None
+    embedding = np.asarray(data['embedding'])
+    embedding.setflags(write=False)
+    return _Entry(embedding, data['fingerprints'], data['params_key'])
+
+  def _save(self, key, entry: _Entry):
+    if self.path is None:
+      return
+    tmp_path = f"{self._file(key)}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+      pickle.dump(
+          dict(embedding=entry.embedding,
+               fingerprints=entry.fingerprints,
+               params_key=entry.params_key), f, pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, self._file(key))
+    # remove the least recently used files
+    files = [
+        os.path.join(self.path, name)
+        for name in os.listdir(self.path)
+        if name.endswith('.pkl')
+    ]
+    if len(files) > self.max_disk_entries:
+      files = sorted(files, key=os.path.getmtime)
+      for fpath in files[:len(files) - self.max_disk_entries]:
+        try:
+          os.remove(fpath)
+        except OSError:
+          pass
+
+  # ====== memory ====== #
+  def _put(self, key, entry: _Entry):
+    if key in self._entries:
+      self._nbytes -= self._entries.pop(key).nbytes
+    self._entries[key] = entry
+    self._nbytes += entry.nbytes
+    while len(self._entries) > 1 and \
+      (len(self._entries) > self.max_entries or self._nbytes > self.max_bytes):
+      _, old = self._entries.popitem(last=False)
+      self._nbytes -= old.nbytes
+
+  def get(self, key: str) -> Optional[np.ndarray]:
+    r""" Return a copy of the cached embedding, or None if not found """
+    with self._lock:
+      entry = self._entries.get(key, None)
+      if entry is not None:
+        self._entries.move_to_end(key)
+      else:
+        entry = self._load(key)
+        if entry is None:
+          return None
+        self._put(key, entry)
+      return np.array(entry.embedding)
+
+  def set(self,
+          key: str,
+          embedding: np.ndarray,
+          X: Optional[np.ndarray] = None,
+          params_key: Optional[str] = None) -> 'EmbeddingCache':
+    r""" Store an embedding, if the input data `X` is given, the row
+    fingerprints are stored as well for warm-starting """
+    fingerprints = None
+    if X is not None and X.shape[0] == embedding.shape[0]:
+      fingerprints = _row_fingerprints(X)
+    # keep a private read-only copy, in-place edits of the caller don't
+    # modify the cache
+    embedding = np.array(embedding)
+    embedding.setflags(write=False)
+    entry = _Entry(embedding, fingerprints, params_key)
+    with self._lock:
+      self._put(key, entry)
+      self._save(key, entry)
+    return self
+
+  def warm_start(self,
+                 X: np.ndarray,
+                 params_key: str,
+                 min_overlap: float = 0.9) -> Optional[np.ndarray]:
+    r""" Create an initial embedding for `X` from a cached embedding computed
+    with the same hyper-parameters, if at least `min_overlap` of the rows
+    of `X` are found in the cached data.
+
+    The matched rows reuse their cached coordinates, and a new row is
+    initialized at the coordinates of its nearest matched row.
+
+    Return:
+      None if no cached embedding could be used, otherwise, an array of shape
+      `[X.shape[0], n_components]`
+    """
+    fingerprints = _row_fingerprints(X)
+    best = None
+    with self._lock:
+      for entry in reversed(self._entries.values()):
+        if entry.params_key != params_key or entry.fingerprints is None:
+          continue
+        order = np.argsort(entry.fingerprints, kind='stable')
+        sorted_fp = entry.fingerprints[order]
+        pos = np.clip(np.searchsorted(sorted_fp, fingerprints), 0,
+                      len(sorted_fp) - 1)
+        matched = sorted_fp[pos] == fingerprints
+        if best is None or np.sum(matched) > np.sum(best[1]):
+          best = (entry.embedding[order[pos]], matched)
+    if best is None or np.mean(best[1]) < min_overlap:
+      return None
+    init, matched = best
+    init = np.array(init, dtype=np.float32)
+    if not np.all(matched):
+      from sklearn.neighbors import NearestNeighbors
+      x = X.reshape(X.shape[0], -1)
+      nn = NearestNeighbors(n_neighbors=1).fit(x[matched])
+      ids = nn.kneighbors(x[~matched], return_distance=False)[:, 0]
+      init[~matched] = init[matched][ids]
+    return init
+
+  def clear(self, disk: bool = False) -> 'EmbeddingCache':
+    with self._lock:
+      self._entries.clear()
+      self._nbytes = 0
+      if disk and self.path is not None:
+        for name in os.listdir(self.path):
+          if name.endswith('.pkl'):
+            os.remove(os.path.join(self.path, name))
+    return self
+
+  @property
+  def nbytes(self) -> int:
+    return self._nbytes
+
+  def __len__(self):
+    return len(self._entries)
+
+  def __contains__(self, key):
+    return key in self._entries or \
+      (self.path is not None and os.path.isfile(self._file(key)))
+
+  def __str__(self):
+    return (f"<EmbeddingCache entries:{len(self)}/{self.max_entries} "
+            f"bytes:{self.nbytes}/{self.max_bytes} path:{self.path}>")
+
+
+# ===========================================================================
+# Default cache shared by t-SNE and UMAP
+# ===========================================================================
+_DEFAULT_CACHE = EmbeddingCache()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+  r""" Return the default embedding cache shared by `fast_tsne` and
+  `fast_umap` """
+  return _DEFAULT_CACHE
+
+
+def set_embedding_cache(cache: EmbeddingCache) -> EmbeddingCache:
+  r""" Replace the default embedding cache (e.g. with a persistent one),
+  return the previous cache """
+  global _DEFAULT_CACHE
+  assert isinstance(cache, EmbeddingCache), \
+    f"Only support EmbeddingCache, given: {type(cache)}"
+  old = _DEFAULT_CACHE
+  _DEFAULT_CACHE = cache
+  return old
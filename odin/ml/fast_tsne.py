@@ -1,29 +1,20 @@
 from __future__ import absolute_import, division, print_function
 
 import warnings
-from typing import Optional
+from typing import Optional, Union
 from typing_extensions import Literal
 
 import numpy as np
-from odin.utils.crypto import md5_checksum
+from odin.ml.embedding_cache import EmbeddingCache, get_embedding_cache
 from odin.utils.mpi import MPI, cpu_count
 from sklearn.decomposition import PCA
 
-_cached_values = {}
-
 __all__ = ['fast_tsne']
 
 
 # ===========================================================================
 # auto-select best TSNE
 # ===========================================================================
-def _create_key(framework, kwargs, md5):
-  key = dict(kwargs)
-  del key['verbose']
-  key['md5'] = md5
-  return framework + str(list(sorted(key.items(), key=lambda x: x[0])))
-
-
 def fast_tsne(
     *X,
     n_components: int = 2,
@@ -47,6 +38,8 @@ def fast_tsne(
     random_state: int = 1,
     verbose: int = 0,
     framework: Literal['auto', 'sklearn', 'cuml'] = 'auto',
+    cache: Union[bool, EmbeddingCache] = True,
+    warm_start: bool = False,
 ):
   """ t-Stochastic Nearest Neighbors.
   If the algorithm take unexpected long time for running, lower the
@@ -136,10 +129,18 @@ def fast_tsne(
       in the range of 0.2 - 0.8. Angle less than 0.2 has quickly increasing
       computation time and angle greater 0.8 has quickly increasing error.
   return_model : a Boolean, if `True`,
-      return the trained t-SNE model
+      return the trained t-SNE model, i.e. `(embedding, model)` if a single
+      t-SNE is trained, otherwise, `(embeddings, list_of_models)` (before,
+      the 'cuda' and 'multicore' t-SNE only returned the last model)
   merge_inputs : a Boolean, if `True`,
       merge all arrays into a single array
       for training t-SNE.
+  cache : a Boolean or `EmbeddingCache`, if `True` (default), use the default
+      embedding cache (see `set_embedding_cache`), if `False`, always
+      recompute the embedding. The cache is not used when `return_model=True`
+  warm_start : a Boolean, if `True`, initialize the embedding from a cached
+      embedding (with the same hyper-parameters) when most of the points
+      are unchanged, only for 'sklearn' and 'multicore' t-SNE.
   """
   assert len(X) > 0, "No input is given!"
   if isinstance(X[0], (tuple, list)):
@@ -154,6 +155,8 @@ def fast_tsne(
   kwargs.pop('max_samples')
   kwargs.pop('framework')
   kwargs.pop('pca_preprocessing')
+  kwargs.pop('cache')
+  kwargs.pop('warm_start')
   # ====== downsampling ====== #
   if max_samples is not None:
     max_samples = int(max_samples)
@@ -195,51 +198,66 @@ def fast_tsne(
     del kwargs['perplexity_max_iter']
     del kwargs['exaggeration_iter']
   # ====== getting cached values ====== #
+  if cache is True:
+    cache = get_embedding_cache()
+  elif not isinstance(cache, EmbeddingCache):
+    cache = None
+  if return_model:
+    cache = None
+  params_key = EmbeddingCache.params_key(
+      f'tsne_{tsne_version}', dict(kwargs,
+                                   pca_preprocessing=pca_preprocessing))
+  warm_start = bool(warm_start) and cache is not None and \
+    tsne_version in ('sklearn', 'multicore')
   results = []
   X_new = []
   X_size = []
   if merge_inputs:
     X_size = [x.shape[0] for x in X]
-    x = np.vstack(X) if len(X) > 1 else X[0]
-    md5 = md5_checksum(x)
-    key = _create_key(tsne_version, kwargs, md5)
-    if key in _cached_values:
-      results.append((0, _cached_values[key]))
+    X = [np.vstack(X) if len(X) > 1 else X[0]]
+  for i, x in enumerate(X):
+    key = EmbeddingCache.data_key(params_key, x)
+    embedding = None if cache is None else cache.get(key)
+    if embedding is not None:
+      results.append((i, embedding))
     else:
-      X_new.append((0, md5, x))
-  else:
-    for i, x in enumerate(X):
-      md5 = md5_checksum(x)
-      key = _create_key(tsne_version, kwargs, md5)
-      if key in _cached_values:
-        results.append((i, _cached_values[key]))
-      else:
-        X_new.append((i, md5, x))
+      init = None
+      if warm_start:
+        init = cache.warm_start(x, params_key)
+      X_new.append((i, key, x, init))
 
   # ====== perform T-SNE ====== #
   def apply_tsne(j):
-    idx, md5, x = j
+    idx, key, x, init = j
     if pca_preprocessing:
       x = PCA(n_components=None, random_state=random_state).fit_transform(x)
-    tsne = TSNE(**kwargs)
-    return (idx, md5, tsne.fit_transform(x), tsne if return_model else None)
+    kw = dict(kwargs)
+    if init is not None:
+      kw['init'] = init
+    tsne = TSNE(**kw)
+    return (idx, key, tsne.fit_transform(x), tsne if return_model else None)
+
+  def update_cache(idx, key, x):
+    if cache is not None:
+      cache.set(key, x, X=X[idx], params_key=params_key)
 
   # only 1 X, no need for MPI
+  model = []
   if len(X_new) == 1 or tsne_version in ('cuda', 'multicore'):
     for x in X_new:
-      idx, md5, x, model = apply_tsne(x)
+      idx, key, x, m = apply_tsne(x)
       results.append((idx, x))
-      _cached_values[_create_key(tsne_version, kwargs, md5)] = x
+      update_cache(idx, key, x)
+      model.append(m)
   else:
     mpi = MPI(jobs=X_new,
               func=apply_tsne,
               batch=1,
               ncpu=min(len(X_new),
                        cpu_count() - 1))
-    model = []
-    for idx, md5, x, m in mpi:
+    for idx, key, x, m in mpi:
       results.append((idx, x))
-      _cached_values[_create_key(tsne_version, kwargs, md5)] = x
+      update_cache(idx, key, x)
       model.append(m)
   # ====== return and clean ====== #
   if merge_inputs and len(X_size) > 1:
@@ -250,6 +268,6 @@ def fast_tsne(
     results = [r[1] for r in results]
   results = results[0] if len(results) == 1 else results
   if return_model:
-    return results, model
+    return results, model[0] if len(model) == 1 else model
   del model
   return results
@@ -4,6 +4,8 @@ import numpy as np
 from typing import Optional, Any, Dict, Union, Callable
 from typing_extensions import Literal
 
+from odin.ml.embedding_cache import EmbeddingCache, get_embedding_cache
+
 
 def fast_umap(
     *X,
@@ -33,6 +35,8 @@ def fast_umap(
     random_state: int = 1,
     return_model: bool = False,
     framework: Literal['auto', 'cuml', 'umap'] = 'umap',
+    cache: Union[bool, EmbeddingCache] = True,
+    warm_start: bool = False,
     verbose: bool = False,
 ):
   """Uniform Manifold Approximation and Projection
@@ -177,6 +181,15 @@ def fast_umap(
   transform_seed: int (optional, default 42)
       Random seed used for the stochastic aspects of the transform operation.
       This ensures consistency in transform operations.
+  cache: bool or `EmbeddingCache` (optional, default True)
+      If `True`, use the default embedding cache (see `set_embedding_cache`),
+      if `False`, always recompute the embedding. The cache is not used when
+      `return_model=True`. Note: the cache is enabled by default, a repeated
+      call with the same data and hyper-parameters returns the cached
+      embedding without training a new UMAP.
+  warm_start: bool (optional, default False)
+      Initialize the embedding from a cached embedding (with the same
+      hyper-parameters) when most of the points are unchanged.
   verbose: bool (optional, default False)
       Controls verbosity of logging.
   """
@@ -186,6 +199,8 @@ def fast_umap(
   kwargs.pop('max_samples')
   kwargs.pop('return_model')
   kwargs.pop('framework')
+  kwargs.pop('cache')
+  kwargs.pop('warm_start')
   # check X
   if isinstance(X[0], (tuple, list)):
     X = X[0]
@@ -221,10 +236,30 @@ def fast_umap(
       from umap import UMAP
     except ImportError:
       raise ImportError(msg)
+  ## check the cache
+  if cache is True:
+    cache = get_embedding_cache()
+  elif not isinstance(cache, EmbeddingCache):
+    cache = None
+  if return_model:
+    cache = None
+  params_key = EmbeddingCache.params_key(f'umap_{UMAP.__module__}', kwargs)
+  keys = [EmbeddingCache.data_key(params_key, X[0], x) for x in X]
+  if cache is not None:
+    results = [cache.get(k) for k in keys]
+    if all(r is not None for r in results):
+      return results[0] if len(results) == 1 else results
+    if warm_start and 'cuml' not in UMAP.__module__:
+      init = cache.warm_start(X[0], params_key)
+      if init is not None:
+        kwargs['init'] = init
   ## train the UMAP
   umap = UMAP(**kwargs)
   umap.fit(X[0])
   results = [umap.transform(x) for x in X]
+  if cache is not None:
+    for i, (k, x, r) in enumerate(zip(keys, X, results)):
+      cache.set(k, r, X=x if i == 0 else None, params_key=params_key)
   if return_model:
     return results[0] if len(results) == 1 else results, umap
   del umap
@@ -0,0 +1,298 @@
+from __future__ import absolute_import, division, print_function
+
+from typing import Iterator, Optional, Tuple, Union
+
+import numpy as np
+
+from odin.ml.plda import PLDA
+from odin.ml.scoring import Scorer
+
+__all__ = ['TrialScorer']
+
+
+def _as_array(X):
+  if isinstance(X, (tuple, list)):
+    X = np.asarray(X)
+  elif "odin.fuel" in str(type(X)):
+    X = X[:]
+  return X
+
+
+def _index_of(keys, sorted_keys, order, name):
+  r""" Vectorized mapping from keys to their row index """
+  keys = np.asarray(keys)
+  pos = np.clip(np.searchsorted(sorted_keys, keys), 0, len(sorted_keys) - 1)
+  found = sorted_keys[pos] == keys
+  if not np.all(found):
+    raise KeyError(f"Unknown {name} ids: {keys[~found][:8].tolist()}")
+  return order[pos]
+
+
+class TrialScorer:
+  r""" Blocked scoring engine of (enrollment, test) trial lists for a
+  fitted `PLDA` or cosine `Scorer`.
+
+  The low-rank PLDA factors are applied once per vector: every vector is
+  normalized and projected to the `n_phi` dimensions latent space,
+  the quadratic terms `z^T Q z` are precomputed, and the enrollment
+  projections are pre-multiplied by `Lambda`. A trial then only costs one
+  `n_phi` dot product:
+
+    `score(e, t) = 2 * z_e^T Lambda z_t + z_e^T Q z_e + z_t^T Q z_t`
+
+  Parameters
+  ----------
+  model : {PLDA, Scorer}
+    a fitted PLDA or a `Scorer` with `method='cosine'`
+  block_size : int
+    the number of trials (or number of rows and columns for
+    `score_matrix`) scored at once, bounds the peak memory.
+  dtype : dtype
+    data type of the output scores
+
+  Example
+  -------
+  >>> scorer = TrialScorer(plda, block_size=8192)
+  >>> scorer.enroll(X_enroll, model_ids=speakers)  # multi-session averaging
+  >>> scorer.test(X_test, test_ids=utterances)
+  >>> scores = scorer.score_trials(trials, path='/tmp/scores.npy')
+  """
+
+  def __init__(self,
+               model: Union[PLDA, Scorer],
+               block_size: int = 4096,
+               dtype='float32'):
+    if isinstance(model, PLDA):
+      if not model.is_fitted:
+        raise RuntimeError("The PLDA hasn't been fitted!")
+      self._Uk = np.asarray(model.Uk_)
+      self._Q = np.asarray(model.Q_hat_)
+      self._Lambda = np.asarray(model.Lambda_)
+    elif isinstance(model, Scorer):
+      if not model.is_fitted:
+        raise RuntimeError("The Scorer hasn't been fitted!")
+      if model.method != 'cosine':
+        raise ValueError("TrialScorer only support 'cosine' Scorer, "
+                         f"but given method='{model.method}'")
+      self._Uk = None
+      self._Q = None
+      self._Lambda = None
+    else:
+      raise ValueError(f"No support for model of type: {type(model)}")
+    self._model = model
+    self.block_size = int(block_size)
+    self.dtype = np.dtype(dtype)
+    # enrollment
+    self._enroll = None  # projection pre-multiplied by Lambda
+    self._enroll_h = None
+    self._model_ids = None
+    # test
+    self._test = None
+    self._test_h = None
+    self._test_ids = None
+
+  # ==================== projections ==================== #
+  def _project(self, X):
+    r""" Normalize and project in blocks, return (projection, quadratic term)
+    """
+    X = _as_array(X)
+    Z = []
+    for start in range(0, X.shape[0], self.block_size):
+      z = np.asarray(self._model.normalizer.transform(
+          X[start:start + self.block_size]),
+                     dtype=np.float64)
+      if self._Uk is not None:
+        z = np.dot(z, self._Uk)
+      Z.append(z)
+    Z = np.concatenate(Z, axis=0)
+    if self._Q is None:
+      h = np.zeros(shape=(Z.shape[0],), dtype=np.float64)
+    else:
+      h = np.sum(np.dot(Z, self._Q) * Z, axis=1)
+    return Z, h
+
+  @staticmethod
+  def _prepare_ids(ids, n):
+    if ids is None:
+      ids = np.arange(n)
+    ids = np.asarray(ids)
+    order = np.argsort(ids, kind='stable')
+    return ids, ids[order], order
+
+  def enroll(self, X, model_ids=None) -> 'TrialScorer':
+    r""" Enroll the models, all sessions with the same model id are averaged
+    (i.e. multi-session enrollment), the same convention as the fitted
+    models: the PLDA averages the normalized vectors (in the latent space),
+    and the cosine `Scorer` normalizes the average of the raw vectors.
+
+    Parameters
+    ----------
+    X : [num_sessions, feat_dim]
+    model_ids : [num_sessions] (optional)
+      the model id of each session, if None, each session is a model
+    """
+    if model_ids is None:
+      Z, _ = self._project(X)
+      unique_ids = np.arange(Z.shape[0])
+    else:
+      unique_ids, inverse, counts = np.unique(np.asarray(model_ids),
+                                              return_inverse=True,
+                                              return_counts=True)
+
+      def average(x):
+        x_avg = np.zeros(shape=(len(unique_ids), x.shape[1]),
+                         dtype=np.float64)
+        np.add.at(x_avg, inverse, x)
+        return x_avg / counts[:, None]
+
+      if self._Q is None:
+        Z, _ = self._project(average(_as_array(X)))
+      else:
+        Z = average(self._project(X)[0])
+    h = np.zeros(shape=(Z.shape[0],)) if self._Q is None else \
+      np.sum(np.dot(Z, self._Q) * Z, axis=1)
+    if self._Lambda is not None:
+      Z = 2 * np.dot(Z, self._Lambda)
+    self._enroll = Z
+    self._enroll_h = h
+    self._model_ids = self._prepare_ids(unique_ids, Z.shape[0])
+    return self
+
+  def test(self, X, test_ids=None) -> 'TrialScorer':
+    r""" Project the test segments
+
+    Parameters
+    ----------
+    X : [num_segments, feat_dim]
+    test_ids : [num_segments] (optional)
+      the id of each segment, if None, use the row index
+    """
+    Z, h = self._project(X)
+    self._test = Z
+    self._test_h = h
+    self._test_ids = self._prepare_ids(test_ids, Z.shape[0])
+    return self
+
+  # ==================== properties ==================== #
+  @property
+  def model_ids(self) -> np.ndarray:
+    return self._model_ids[0]
+
+  @property
+  def test_ids(self) -> np.ndarray:
+    return self._test_ids[0]
+
+  @property
+  def n_models(self) -> int:
+    return 0 if self._enroll is None else self._enroll.shape[0]
+
+  @property
+  def n_tests(self) -> int:
+    return 0 if self._test is None else self._test.shape[0]
+
+  def _check_ready(self):
+    if self._enroll is None:
+      raise RuntimeError("Call `enroll` before scoring")
+    if self._test is None:
+      raise RuntimeError("Call `test` before scoring")
+
+  @staticmethod
+  def _output(path, shape, dtype):
+    if path is None:
+      return np.empty(shape=shape, dtype=dtype)
+    return np.lib.format.open_memmap(str(path),
+                                     mode='w+',
+                                     dtype=dtype,
+                                     shape=shape)
+
+  # ==================== scoring ==================== #
+  def iter_blocks(
+      self) -> Iterator[Tuple[slice, slice, np.ndarray]]:
+    r""" Iterate over all `block_size x block_size` tiles of the
+    (enrollment x test) score matrix
+
+    Return
+    ------
+    iterator of `(enroll_slice, test_slice, scores)`
+    """
+    self._check_ready()
+    bs = self.block_size
+    for e_start in range(0, self.n_models, bs):
+      e_slice = slice(e_start, min(e_start + bs, self.n_models))
+      Ze = self._enroll[e_slice]
+      he = self._enroll_h[e_slice, None]
+      for t_start in range(0, self.n_tests, bs):
+        t_slice = slice(t_start, min(t_start + bs, self.n_tests))
+        scores = np.dot(Ze, self._test[t_slice].T)
+        scores += he
+        scores += self._test_h[None, t_slice]
+        yield e_slice, t_slice, scores.astype(self.dtype, copy=False)
+
+  def score_matrix(self, path: Optional[str] = None) -> np.ndarray:
+    r""" Score all (enrollment, test) pairs
+
+    Parameters
+    ----------
+    path : str (optional)
+      if given, stream the scores to a `.npy` file and return the
+      memory-mapped array
+
+    Return
+    ------
+    scores matrix [num_models, num_segments]
+    """
+    self._check_ready()
+    scores = self._output(path, (self.n_models, self.n_tests), self.dtype)
+    for e_slice, t_slice, s in self.iter_blocks():
+      scores[e_slice, t_slice] = s
+    if path is not None:
+      scores.flush()
+    return scores
+
+  def score_trials(self,
+                   trials,
+                   test_ids=None,
+                   path: Optional[str] = None) -> np.ndarray:
+    r""" Score a trial list, each trial only costs a single `n_phi` dot product,
+    the full score matrix is never created.
+
+    Parameters
+    ----------
+    trials : {array [num_trials, 2], array [num_trials]}
+      the pairs `(model_id, test_id)`, or only the model ids if `test_ids`
+      is given
+    test_ids : array [num_trials] (optional)
+      the test id of each trial
+    path : str (optional)
+      if given, stream the scores to a `.npy` file and return the
+      memory-mapped array
+
+    Return
+    ------
+    scores : [num_trials]
+    """
+    self._check_ready()
+    if test_ids is None:
+      trials = np.asarray(trials)
+      assert trials.ndim == 2 and trials.shape[1] == 2, \
+        "trials must be array of (model_id, test_id) pairs"
+      model_ids, test_ids = trials[:, 0], trials[:, 1]
+    else:
+      model_ids = trials
+    n = len(model_ids)
+    assert len(test_ids) == n, \
+      f"Number of model ids ({n}) and test ids ({len(test_ids)}) mismatch"
+    scores = self._output(path, (n,), self.dtype)
+    _, m_sorted, m_order = self._model_ids
+    _, t_sorted, t_order = self._test_ids
+    for start in range(0, n, self.block_size):
+      end = min(start + self.block_size, n)
+      m = _index_of(model_ids[start:end], m_sorted, m_order, 'model')
+      t = _index_of(test_ids[start:end], t_sorted, t_order, 'test')
+      s = np.einsum('ij,ij->i', self._enroll[m], self._test[t])
+      s += self._enroll_h[m]
+      s += self._test_h[t]
+      scores[start:end] = s
+    if path is not None:
+      scores.flush()
+    return scores
@@ -235,6 +235,9 @@ class Networks(keras.Model, MD5object):
         return the network itself for method chaining
     """
     super().build(input_shape)
+    # the input shape for building copies of this networks
+    with trackable.no_automatic_dependency_tracking_scope(self):
+      self._networks_input_shape = copy.deepcopy(input_shape)
     return self
 
   @property
@@ -388,6 +391,7 @@ class Networks(keras.Model, MD5object):
         'ignore', 'skip', 'raise', 'restore'] = 'skip',
       allow_none_gradients: bool = False,
       track_gradients: bool = False,
+      gradient_accumulation: int = 1,
       *args,
       **kwargs,
   ) -> Tuple[Tensor, Dict[str, Any]]:
@@ -408,12 +412,14 @@ class Networks(keras.Model, MD5object):
     global_clipnorm : Optional[float]
         global gradient clipping by L2-norm
     skip_update_threshold : Optional[float], optional
-        if gradients value pass this threshold, it will be set to 0.
+        if any gradient value pass this threshold, the update is skipped.
     when_skip_update : int
         number of iteration after which the update skipping allowed to start,
         default 0
     nan_gradients_policy : ['stop', 'skip', 'ignore', 'raise', 'restore']
-        Policies for handling NaNs value gradients:
+        Policies for handling NaNs or Inf value gradients, a single global
+        norm of all gradients is checked, and the number of skipped updates
+        is counted by the variable `skipped_update`:
           - 'stop': skip the current updates and stop training
           - 'skip': skip the current updates and continue training
           - 'ignore': do nothing
@@ -424,7 +430,12 @@ class Networks(keras.Model, MD5object):
         allow variables with None gradients during training, by default False
     track_gradients : bool, optional
         track and return the metrics includes the gradients' L2-norm for each
-        trainable variable, by default False
+        trainable variable and their global norm, by default False
+    gradient_accumulation : int, optional
+        number of micro-batches (i.e. calls) the gradients are averaged over
+        before being applied, for large effective batch size, the skipped
+        micro-batches (e.g. non-finite gradients) are not counted,
+        by default 1
 
     Returns
     -------
@@ -465,66 +476,39 @@ class Networks(keras.Model, MD5object):
           loss, metrics = step()
         ## backward pass, get the gradients
         gradients = tape.gradient(loss, parameters)
-        ## NaN policy
-        is_nan = tf.reduce_any([
-          tf.reduce_any(tf.math.is_nan(g)) for g in gradients if g is not None
-        ])
-
-        def _true_nan():
-          if nan_gradients_policy == 'skip':
-            tf.print('NaNs gradients, skip the update!',
-                     output_stream=sys.stderr)
-            return True
-          elif nan_gradients_policy == 'raise':
-            raise RuntimeError('NaNs gradient!')
-          elif nan_gradients_policy == 'stop':
-            tf.print('\nNaNs gradients, stop the training!',
-                     output_stream=sys.stderr)
-            for p, g in zip(parameters, gradients):
-              if g is None:
-                tf.print(p.name, 'None')
-              else:
-                tf.print(p.name, 'is_nan=', tf.reduce_any(tf.math.is_nan(g)))
-            if self._trainer is not None:
-              self._trainer.terminate()
-            return True
-          elif nan_gradients_policy == 'restore':
-            self.restore_checkpoint.assign(True)
-            return True
-          return False
-
-        skip_update = tf.cond(is_nan, true_fn=_true_nan, false_fn=lambda: False)
+        ## a single global norm (for clipping) and finite flag for all
+        # gradients, the norm could overflow even though every gradient is
+        # finite, so check the gradient values themselves
+        not_none = [g for g in gradients if g is not None]
+        if len(not_none) > 0:
+          global_norm = tf.linalg.global_norm(not_none)
+          is_finite = tf.reduce_all(
+            tf.stack([
+              tf.reduce_all(
+                tf.math.is_finite(
+                  g.values if isinstance(g, tf.IndexedSlices) else g))
+              for g in not_none
+            ]))
+        else:
+          global_norm = tf.constant(0., dtype=self.dtype)
+          is_finite = tf.constant(True)
+        if nan_gradients_policy == 'ignore':
+          skip_update = tf.constant(False)
+        else:
+          if nan_gradients_policy == 'raise':
+            tf.debugging.Assert(is_finite, ['NaNs gradient!', global_norm])
+          skip_update = tf.logical_not(is_finite)
         ## skip update based on threshold
-        if skip_update_threshold is not None:
-          skip_update_threshold = tf.constant(skip_update_threshold,
-                                              dtype=self.dtype)
-          skip_update = tf.reduce_any([
-            tf.reduce_any(tf.greater_equal(g, skip_update_threshold))
-            for g in gradients
-            if g is not None
-          ])
-          skip_update = tf.logical_and(self.step >= when_skip_update,
-                                       skip_update)
-
-        ## skip update
-        def _skipped():
-          new_gradients = []
-          for g in gradients:
-            if isinstance(g, tf.IndexedSlices):
-              values = g.values
-              g = tf.IndexedSlices(values - values, g.indices, g.dense_shape)
-            elif g is not None:
-              g = tf.identity(g - g)
-            new_gradients.append(g)
-          return new_gradients
-
-        gradients = tf.cond(skip_update,
-                            true_fn=_skipped,
-                            false_fn=lambda: gradients)
-        self.skipped_update.assign_add(
-          tf.cond(skip_update,
-                  true_fn=lambda: tf.constant(1, dtype=tf.int64),
-                  false_fn=lambda: tf.constant(0, dtype=tf.int64)))
+        if skip_update_threshold is not None and len(not_none) > 0:
+          max_grad = tf.reduce_max(
+            tf.stack([
+              tf.reduce_max(g.values if isinstance(g, tf.IndexedSlices) else g)
+              for g in not_none
+            ]))
+          skip_update = tf.logical_or(
+            skip_update,
+            tf.logical_and(self.step >= when_skip_update,
+                           max_grad >= skip_update_threshold))
         ## clip norm
         if clipnorm is not None:
           clipnorm = tf.constant(clipnorm, dtype=self.dtype)
@@ -532,14 +516,15 @@ class Networks(keras.Model, MD5object):
             None if g is None else tf.clip_by_norm(g, clipnorm)
             for g in gradients
           ]
-        if global_clipnorm is not None:
-          global_clipnorm = tf.constant(global_clipnorm, dtype=self.dtype)
-          not_none = [g for g in gradients if g is not None]
-          if len(not_none) > 0:
-            not_none, _ = tf.clip_by_global_norm(not_none, global_clipnorm)
-            gradients = [
-              None if g is None else not_none.pop(0) for g in gradients
-            ]
+        if global_clipnorm is not None and len(not_none) > 0:
+          # reuse the global norm if the gradients haven't been clipped
+          not_none, _ = tf.clip_by_global_norm(
+            [g for g in gradients if g is not None],
+            tf.constant(global_clipnorm, dtype=self.dtype),
+            use_norm=None if clipnorm is not None else global_norm)
+          gradients = [
+            None if g is None else not_none.pop(0) for g in gradients
+          ]
         if clipvalue is not None:
           clipvalue = tf.constant(clipvalue, dtype=self.dtype)
           gradients = [
@@ -550,11 +535,41 @@ class Networks(keras.Model, MD5object):
         grads_params = [(g, p)
                         for g, p in zip(gradients, parameters)
                         if g is not None or allow_none_gradients]
-        opt.apply_gradients(grads_params)
+        # the optimizer creates its slot variables within `tf.init_scope`
+        # (i.e. outside the conditional branch below), build them here if
+        # the optimizer has a public `build`
+        if hasattr(opt, 'build') and not getattr(opt, 'built', True):
+          opt.build([p for g, p in grads_params if g is not None])
+
+        ## a single conditional for skipping the update
+        def _skip():
+          if nan_gradients_policy == 'skip':
+            tf.print('Non-finite gradients, skip the update!',
+                     output_stream=sys.stderr)
+          elif nan_gradients_policy == 'stop':
+            tf.print('\nNon-finite gradients, stop the training!',
+                     output_stream=sys.stderr)
+            if self._trainer is not None:
+              self._trainer.terminate()
+          elif nan_gradients_policy == 'restore':
+            self.restore_checkpoint.assign(True)
+          self.skipped_update.assign_add(1)
+          return tf.constant(False)
+
+        def _update():
+          if gradient_accumulation > 1:
+            self._accumulate_gradients(step_idx, opt, grads_params,
+                                       int(gradient_accumulation))
+          else:
+            opt.apply_gradients(grads_params)
+          return tf.constant(True)
+
+        tf.cond(skip_update, true_fn=_skip, false_fn=_update)
         # tracking the gradient norms for debugging
         if track_gradients:
           for g, p in grads_params:
             metrics[f"_grad/{p.name}"] = g
+          metrics["_grad/global_norm"] = global_norm
       ## for validation
       else:
         loss, metrics = step()
@@ -568,6 +583,61 @@ class Networks(keras.Model, MD5object):
     # all_metrics = {i: j for i, j in all_metrics.items()}
     return total_loss, all_metrics
 
+  def _accumulate_gradients(self, step_idx: int, optimizer: OptimizerV2,
+                            grads_params: List[Tuple[Tensor, tf.Variable]],
+                            n_accumulation: int):
+    """Accumulate the average gradients of `n_accumulation` consecutive
+    (non-skipped) calls into non-trainable variables, then apply them all at
+    once."""
+    grads_params = [(g, p) for g, p in grads_params if g is not None]
+    if not hasattr(self, '_gradient_accumulators'):
+      with trackable.no_automatic_dependency_tracking_scope(self):
+        self._gradient_accumulators = {}
+    # the accumulators and the counter of accumulated micro-batches are
+    # created once (at the first trace) for each step
+    key = (step_idx,) + tuple(id(p) for _, p in grads_params)
+    if key not in self._gradient_accumulators:
+      with tf.init_scope():
+        self._gradient_accumulators[key] = (
+          tf.Variable(0, trainable=False, dtype=tf.int64,
+                      name=f"micro_batches_{step_idx}"),
+          [tf.Variable(tf.zeros_like(p), trainable=False,
+                       name=f"{p.name.split(':')[0]}_accum")
+           for _, p in grads_params])
+    counter, accumulators = self._gradient_accumulators[key]
+    for (g, _), a in zip(grads_params, accumulators):
+      a.assign_add(tf.convert_to_tensor(g) / n_accumulation)
+    n_micro_batches = counter.assign_add(1)
+
+    def _apply():
+      optimizer.apply_gradients([
+        (a.read_value(), p) for a, (_, p) in zip(accumulators, grads_params)])
+      for a in accumulators:
+        a.assign(tf.zeros_like(a))
+      counter.assign(0)
+      return tf.constant(True)
+
+    return tf.cond(n_micro_batches >= n_accumulation,
+                   true_fn=_apply,
+                   false_fn=lambda: tf.constant(False))
+
+  def _validation_snapshot(self) -> 'Networks':
+    """Return a copy of this networks (created once) holding a snapshot of
+    the current weights, the networks must be built by `build`"""
+    shadow = getattr(self, '_shadow_networks', None)
+    if shadow is None:
+      input_shape = getattr(self, '_networks_input_shape', None)
+      if input_shape is None:
+        raise RuntimeError(
+          f"{self.name} wasn't built by `build(input_shape)`, "
+          "cannot create its copy")
+      shadow = self.__class__(**copy.deepcopy(self.init_args))
+      shadow.build(input_shape)
+      with trackable.no_automatic_dependency_tracking_scope(self):
+        self._shadow_networks = shadow
+    shadow.set_weights(self.get_weights())
+    return shadow
+
   def fit(
       self,
       train: Union[TensorTypes, Dataset],
@@ -594,6 +664,9 @@ class Networks(keras.Model, MD5object):
       logdir: Optional[str] = None,
       allow_none_gradients: bool = False,
       track_gradients: bool = False,
+      gradient_accumulation: int = 1,
+      steps_per_execution: int = 1,
+      valid_in_background: bool = False,
   ) -> 'Networks':
     """Override the original fit method of keras to provide simplified
     procedure with `Networks.optimize` and `Networks.train_steps`
@@ -621,7 +694,7 @@ class Networks(keras.Model, MD5object):
     clipvalue : Optional[float], optional
         clip value for individual gradients, by default None
     skip_update_threshold : Optional[float], optional
-        if gradients value pass this threshold, it will be set to 0.
+        if any gradient value pass this threshold, the update is skipped.
     epochs : int, optional
         maximum number of epochs, by default -1
     max_iter : int, optional
@@ -643,7 +716,9 @@ class Networks(keras.Model, MD5object):
         skip this function if the model if fitted, or fitted for certain amount of
         steps, by default False
     nan_gradients_policy : ['stop', 'skip', 'ignore', 'raise', 'restore']
-        Policies for handling NaNs value gradients:
+        Policies for handling NaNs or Inf value gradients, a single global
+        norm of all gradients is checked, and the number of skipped updates
+        is counted by the variable `skipped_update`:
           - 'stop': skip the current updates and stop training
           - 'skip': skip the current updates and continue training
           - 'ignore': do nothing
@@ -657,6 +732,16 @@ class Networks(keras.Model, MD5object):
     track_gradients : bool, optional
         track and return the gradients of trainable variable.
         The gradients will be hidden by prepending '_', by default False
+    gradient_accumulation : int, optional
+        number of micro-batches the gradients are accumulated over before
+        each update, by default 1
+    steps_per_execution : int, optional
+        number of optimization steps run inside a single compiled call,
+        by default 1
+    valid_in_background : bool, optional
+        run the validation on a snapshot copy of the networks in a background
+        thread while training continues, fall back to the blocking validation
+        if the networks cannot be copied, by default False
 
     Returns
     -------
@@ -704,6 +789,18 @@ class Networks(keras.Model, MD5object):
     if self.optimizer is None:
       raise RuntimeError("No optimizer found!")
 
+    ## validation on a snapshot of the weights
+    valid_snapshot = None
+    if valid_in_background and valid is not None:
+      try:
+        self._validation_snapshot()
+        valid_snapshot = lambda: self._validation_snapshot().optimize
+      except Exception as e:
+        logging.warning(
+          f"Cannot create a snapshot of {self.name} for background "
+          f"validation, run validation in the training thread. Error: {e}")
+        valid_in_background = False
+
     ## run early stop and callback
     def _callback():
       if self.restore_checkpoint.numpy():
@@ -722,7 +819,8 @@ class Networks(keras.Model, MD5object):
                        global_clipnorm=global_clipnorm,
                        skip_update_threshold=skip_update_threshold,
                        when_skip_update=when_skip_update,
-                       nan_gradients_policy=nan_gradients_policy),
+                       nan_gradients_policy=nan_gradients_policy,
+                       gradient_accumulation=gradient_accumulation),
       valid_ds=valid,
       valid_freq=valid_freq,
       valid_interval=valid_interval,
@@ -731,6 +829,9 @@ class Networks(keras.Model, MD5object):
       logging_interval=logging_interval,
       log_tag=self.name,
       max_iter=max_iter,
+      steps_per_execution=steps_per_execution,
+      valid_in_background=valid_in_background,
+      valid_snapshot=valid_snapshot,
       callback=_callback,
     )
     return self
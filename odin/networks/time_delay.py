@@ -26,14 +26,18 @@ import types as python_types
 import numpy as np
 import tensorflow as tf
 from six import string_types
-from tensorflow.python.keras import Model, activations
+from tensorflow.python.keras import (Model, activations, constraints,
+                                     initializers, regularizers)
 from tensorflow.python.keras.layers import Conv1D, Dense, Layer, LeakyReLU
 from tensorflow.python.keras.utils import generic_utils
 
 from odin.backend import parse_reduction
 from odin.utils import as_tuple
 
-__all__ = ['TimeDelay', 'TimeDelayDense', 'TimeDelayConv', 'TimeDelayConvTied']
+__all__ = [
+    'TimeDelay', 'TimeDelayDense', 'TimeDelayConv', 'TimeDelayConvTied',
+    'TimeDelayFused'
+]
 
 
 class TimeDelay(Model):
@@ -317,3 +321,178 @@ class TimeDelayConvTied(TimeDelay):
                                             delay_context=(0,),
                                             pooling='none',
                                             **kwargs)
+
+
+class TimeDelayFused(Layer):
+  r""" An equivalent of `TimeDelayDense` with a single shared projection.
+
+  The context frames of all delays are gathered into one unfolded tensor
+  `[batch_size, new_timesteps, n_delays, input_dim]` and projected at once
+  by a grouped kernel `[n_delays, input_dim, units]`, instead of running
+  a separate `Dense` layer on every time slice. For 'sum' pooling with
+  linear activation (i.e. the classic TDNN), the pooling is folded into
+  the projection: a single matmul with the `[n_delays * input_dim, units]`
+  kernel.
+
+  Parameters
+  ----------
+  units : `int`
+    number of new features
+  delay_context : list of `int`
+    list of time delay taken into account
+  pooling : {'none', 'sum', 'min', 'max', 'avg', 'stat'} (default='sum')
+    pooling over the delays, the same as `TimeDelay`
+
+  Input shape
+  -----------
+    3D tensor with shape: `(batch_size, timesteps, input_dim)`
+
+  Output shape
+  ------------
+    3D tensor with shape: `(batch_size, new_timesteps, units)`
+
+  Example
+  -------
+  >>> tdnn = TimeDelayDense(512, delay_context=(-2, 0, 2))
+  >>> tdnn(x)
+  >>> fused = TimeDelayFused.from_time_delay(tdnn)  # the same outputs
+  """
+
+  def __init__(self,
+               units,
+               delay_context=(-2, -1, 0, 1, 2),
+               pooling='sum',
+               activation='linear',
+               use_bias=False,
+               kernel_initializer='glorot_uniform',
+               bias_initializer='zeros',
+               kernel_regularizer=None,
+               bias_regularizer=None,
+               activity_regularizer=None,
+               kernel_constraint=None,
+               bias_constraint=None,
+               **kwargs):
+    super(TimeDelayFused, self).__init__(
+        activity_regularizer=regularizers.get(activity_regularizer), **kwargs)
+    self.units = int(units)
+    # no duplicated frame index
+    self.delay_context = np.array(sorted(set(int(i) for i in delay_context)))
+    self.context_length = self.delay_context[-1] - self.delay_context[0] + 1
+    self.delays = self.delay_context + max(0, -self.delay_context[0])
+    # pooling function for aggrevate the time outputs
+    self.pooling = 'none' if pooling is None else pooling
+    self.fn_pooling = parse_reduction(pooling)
+    self.activation = activations.get(activation)
+    self.use_bias = bool(use_bias)
+    self.kernel_initializer = initializers.get(kernel_initializer)
+    self.bias_initializer = initializers.get(bias_initializer)
+    self.kernel_regularizer = regularizers.get(kernel_regularizer)
+    self.bias_regularizer = regularizers.get(bias_regularizer)
+    self.kernel_constraint = constraints.get(kernel_constraint)
+    self.bias_constraint = constraints.get(bias_constraint)
+    # sum of linear projections is a single projection
+    self._fused_pooling = (self.activation is activations.linear and
+                           isinstance(self.pooling, string_types) and
+                           'sum' in self.pooling.lower())
+
+  @property
+  def n_delays(self):
+    return len(self.delays)
+
+  def build(self, input_shape):
+    input_dim = int(input_shape[-1])
+    self.kernel = self.add_weight(
+        'kernel',
+        shape=[self.n_delays, input_dim, self.units],
+        initializer=self.kernel_initializer,
+        regularizer=self.kernel_regularizer,
+        constraint=self.kernel_constraint,
+        dtype=self.dtype,
+        trainable=True)
+    if self.use_bias:
+      self.bias = self.add_weight('bias',
+                                  shape=[self.n_delays, self.units],
+                                  initializer=self.bias_initializer,
+                                  regularizer=self.bias_regularizer,
+                                  constraint=self.bias_constraint,
+                                  dtype=self.dtype,
+                                  trainable=True)
+    else:
+      self.bias = None
+    return super(TimeDelayFused, self).build(input_shape)
+
+  def call(self, inputs, training=None):
+    inputs = tf.convert_to_tensor(inputs, dtype=self.dtype)
+    input_dim = self.kernel.shape[1]
+    n_timestep = tf.shape(inputs)[1] - int(self.delays[-1])
+    # unfold: [batch_size, new_timesteps, n_delays, input_dim]
+    ids = tf.range(n_timestep)[:, None] + \
+      tf.constant(self.delays[None, :], dtype=tf.int32)
+    x = tf.gather(inputs, ids, axis=1)
+    if self._fused_pooling:
+      x = tf.reshape(
+          x, tf.concat([tf.shape(x)[:2], [self.n_delays * input_dim]], axis=0))
+      y = tf.tensordot(
+          x, tf.reshape(self.kernel, [self.n_delays * input_dim, self.units]),
+          axes=1)
+      if self.use_bias:
+        y = y + tf.reduce_sum(self.bias, axis=0)
+      return y
+    # grouped projection: [batch_size, new_timesteps, n_delays, units]
+    y = tf.einsum('btkd,kdu->btku', x, self.kernel)
+    if self.use_bias:
+      y = y + self.bias
+    y = self.activation(y)
+    y = self.fn_pooling(y, axis=2)
+    # the same layout as `TimeDelay` if no pooling
+    if isinstance(self.pooling, string_types) and \
+      'none' in self.pooling.lower():
+      y = tf.transpose(y, [2, 0, 1, 3])
+      if self.context_length == 1:
+        y = tf.squeeze(y, axis=0)
+    return y
+
+  @classmethod
+  def from_time_delay(cls, layer: TimeDelay, **kwargs) -> 'TimeDelayFused':
+    r""" Convert a `TimeDelay` of `Dense` layers (e.g. `TimeDelayDense`)
+    into the fused layer, the weights are copied if the layer was built """
+    dense = layer.all_layers
+    if not all(isinstance(i, Dense) for i in dense):
+      raise ValueError("Only support conversion of TimeDelay with Dense "
+                       f"layers, given: {[type(i) for i in dense]}")
+    config = dense[0].get_config()
+    for key in ('name', 'units', 'trainable', 'dtype'):
+      config.pop(key, None)
+    config.update(kwargs)
+    fused = cls(units=dense[0].units,
+                delay_context=layer.delay_context,
+                pooling=layer.pooling,
+                name=f"{layer.name}_fused",
+                **config)
+    if dense[0].built:
+      input_dim = int(dense[0].kernel.shape[0])
+      fused.build(tf.TensorShape([None, None, input_dim]))
+      weights = [np.stack([i.kernel.numpy() for i in dense], axis=0)]
+      if fused.use_bias:
+        weights.append(np.stack([i.bias.numpy() for i in dense], axis=0))
+      fused.set_weights(weights)
+    return fused
+
+  def get_config(self):
+    configs = super().get_config()
+    configs.update({
+        'units': self.units,
+        'delay_context': self.delay_context.tolist(),
+        'pooling': self.pooling,
+        'activation': activations.serialize(self.activation),
+        'use_bias': self.use_bias,
+        'kernel_initializer': initializers.serialize(self.kernel_initializer),
+        'bias_initializer': initializers.serialize(self.bias_initializer),
+        'kernel_regularizer': regularizers.serialize(self.kernel_regularizer),
+        'bias_regularizer': regularizers.serialize(self.bias_regularizer),
+        'activity_regularizer':
+            regularizers.serialize(self.activity_regularizer),
+        'kernel_constraint': constraints.serialize(self.kernel_constraint),
+        'bias_constraint': constraints.serialize(self.bias_constraint),
+    })
+    return configs
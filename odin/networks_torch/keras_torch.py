@@ -24,11 +24,73 @@ class Lambda(nn.Module):
     return self._function(*args, **kwargs)
 
 
+# cache of the keywords accepted by `Layer.call` for each class
+_CALL_KEYWORDS = {}
+
+
+def _call_keywords(layer):
+  """Return None if the `call` method accepts arbitrary keywords, otherwise,
+  the set of its keywords arguments"""
+  cls = type(layer)
+  if cls not in _CALL_KEYWORDS:
+    specs = inspect.getfullargspec(layer.call)
+    if specs.varkw is not None:
+      _CALL_KEYWORDS[cls] = None
+    else:
+      _CALL_KEYWORDS[cls] = frozenset(specs.args[2:] + specs.kwonlyargs)
+  return _CALL_KEYWORDS[cls]
+
+
+def _as_tensor(x):
+  if isinstance(x, np.ndarray):
+    # no copy if the array already has the default dtype
+    return torch.as_tensor(x, dtype=torch.get_default_dtype())
+  return x
+
+
+class _BoundCall(nn.Module):
+
+  def __init__(self, module, kwargs):
+    super().__init__()
+    self.module = module
+    self.kwargs = dict(kwargs)
+
+  def forward(self, *inputs):
+    return self.module(*inputs, **self.kwargs)
+
+
+def trace_layers(module: nn.Module, *example_inputs, **kwargs):
+  """Build all the odin layers of `module` on the example inputs, then trace
+  it with TorchScript, so the whole stack runs without Python dispatch.
+
+  Parameters
+  ----------
+  module : `torch.nn.Module`
+    an odin `Layer` or any module (e.g. `nn.Sequential`) of them
+  example_inputs : list of `torch.Tensor` or `numpy.ndarray`
+    the inputs for tracing
+  kwargs : keyword arguments
+    fixed keyword arguments of every call (e.g. `training=False`)
+
+  Returns
+  -------
+  `torch.jit.ScriptModule`
+  """
+  example_inputs = tuple(_as_tensor(i) for i in example_inputs)
+  with torch.no_grad():
+    module(*example_inputs, **kwargs)
+  if len(kwargs) > 0:
+    module = _BoundCall(module, kwargs)
+  return torch.jit.trace(module, example_inputs)
+
+
 class Layer(nn.Module):
 
   def __init__(self, **kwargs):
     super().__init__()
     self.built = False
+    # the call signature is resolved once, not for every call
+    self._call_kwargs = _call_keywords(self)
 
   def build(self, input_shape):
     """Creates the variables of the layer (optional, for subclass implementers).
@@ -47,27 +109,26 @@ class Layer(nn.Module):
     self.built = True
 
   def forward(self, *inputs, **kwargs):
-    n_inputs = len(inputs)
-    input_shape = [i.shape for i in inputs]
-    if n_inputs == 1:
-      input_shape = input_shape[0]
     if not self.built:
-      self.build(input_shape)
+      input_shape = [i.shape for i in inputs]
+      self.build(input_shape[0] if len(inputs) == 1 else input_shape)
     # call
-    inputs = inputs[0] if n_inputs == 1 else inputs
+    inputs = inputs[0] if len(inputs) == 1 else inputs
     # this make life easier but not the solution for everything
-    if isinstance(inputs, np.ndarray):
-      inputs = torch.Tensor(inputs)
+    inputs = _as_tensor(inputs)
     # intelligent call
-    specs = inspect.getfullargspec(self.call)
-    if specs.varkw is not None:
-      return self.call(inputs, **kwargs)
-    kw = {i: kwargs[i] for i in specs.args[2:] if i in kwargs}
-    return self.call(inputs, **kw)
+    if len(kwargs) > 0 and self._call_kwargs is not None:
+      kwargs = {k: v for k, v in kwargs.items() if k in self._call_kwargs}
+    return self.call(inputs, **kwargs)
 
   def call(self, inputs, **kwargs):
     raise NotImplementedError
 
+  def trace(self, *example_inputs, **kwargs):
+    """Return the TorchScript traced version of this layer,
+    see `trace_layers`"""
+    return trace_layers(self, *example_inputs, **kwargs)
+
 
 class Dense(Layer):
 
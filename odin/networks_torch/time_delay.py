@@ -7,7 +7,9 @@ import torch
 from six import string_types
 from torch import nn
 
-from odin.backend import concatenate, expand_dims, parse_reduction, squeeze
+from odin.backend import (concatenate, expand_dims, parse_activation,
+                          parse_initializer, parse_reduction, squeeze)
+from odin.backend.alias import identity_function
 from odin.networks_torch.keras_torch import Conv1D, Dense, Layer
 from odin.utils import as_tuple
 
@@ -219,3 +221,128 @@ class TimeDelayConvTied(TimeDelay):
                                             delay_context=(0,),
                                             pooling='none',
                                             **kwargs)
+
+
+class TimeDelayFused(Layer):
+  """ An equivalent of `TimeDelayDense` with a single shared projection.
+
+  The context frames of all delays are gathered into one unfolded tensor
+  `[batch_size, new_timesteps, n_delays, input_dim]` and projected at once
+  by a grouped kernel `[n_delays, units, input_dim]`. For 'sum' pooling with
+  linear activation, the pooling is folded into a single matmul.
+
+  Parameters
+  ----------
+  units : `int`
+    number of new features
+  delay_context : list of `int`
+    list of time delay taken into account
+  pooling : {'none', 'sum', 'min', 'max', 'avg', 'stat'} (default='sum')
+    pooling over the delays, the same as `TimeDelay`
+
+  Input shape
+  -----------
+    3D tensor with shape: `(batch_size, timesteps, input_dim)`
+
+  Output shape
+  ------------
+    3D tensor with shape: `(batch_size, new_timesteps, units)`
+
+  """
+
+  def __init__(self,
+               units,
+               delay_context=(-2, -1, 0, 1, 2),
+               pooling='sum',
+               activation='linear',
+               use_bias=False,
+               kernel_initializer='glorot_uniform',
+               bias_initializer='zeros',
+               **kwargs):
+    super(TimeDelayFused, self).__init__(**kwargs)
+    self.units = int(units)
+    # no duplicated frame index
+    self.delay_context = np.array(sorted(set(int(i) for i in delay_context)))
+    self.context_length = self.delay_context[-1] - self.delay_context[0] + 1
+    self.delays = self.delay_context + max(0, -self.delay_context[0])
+    # pooling function for aggrevate the time outputs
+    self.pooling = 'none' if pooling is None else pooling
+    self.fn_pooling = parse_reduction(pooling)
+    self.activation = parse_activation(activation, self)
+    self.use_bias = bool(use_bias)
+    self.kernel_initializer = parse_initializer(kernel_initializer, self)
+    self.bias_initializer = parse_initializer(bias_initializer, self)
+    # sum of linear projections is a single projection
+    self._fused_pooling = (self.activation is identity_function and
+                           isinstance(self.pooling, string_types) and
+                           'sum' in self.pooling.lower())
+    self.register_buffer('_delay_ids',
+                         torch.as_tensor(self.delays, dtype=torch.long))
+
+  @property
+  def n_delays(self):
+    return len(self.delays)
+
+  def build(self, input_shape):
+    input_dim = int(input_shape[-1])
+    # the same layout as `nn.Linear` weight for each delay
+    self.kernel = nn.Parameter(
+        torch.empty(self.n_delays, self.units, input_dim))
+    for w in self.kernel.data:
+      self.kernel_initializer(w)
+    if self.use_bias:
+      self.bias = nn.Parameter(torch.empty(self.n_delays, self.units))
+      for b in self.bias.data:
+        self.bias_initializer(b)
+    else:
+      self.bias = None
+    return super(TimeDelayFused, self).build(input_shape)
+
+  def call(self, inputs, training=None):
+    n_timestep = inputs.shape[1] - int(self.delays[-1])
+    # unfold: [batch_size, new_timesteps, n_delays, input_dim]
+    x = inputs.unfold(1, int(self.delays[-1]) + 1, 1)
+    x = x.index_select(-1, self._delay_ids).transpose(-1, -2)
+    if self._fused_pooling:
+      kernel = self.kernel.transpose(1, 2).reshape(-1, self.units)
+      y = torch.matmul(x.reshape(x.shape[0], n_timestep, -1), kernel)
+      if self.use_bias:
+        y = y + self.bias.sum(0)
+      return y
+    # grouped projection: [batch_size, new_timesteps, n_delays, units]
+    y = torch.einsum('btkd,kud->btku', x, self.kernel)
+    if self.use_bias:
+      y = y + self.bias
+    y = self.activation(y)
+    y = self.fn_pooling(y, axis=2)
+    # the same layout as `TimeDelay` if no pooling
+    if isinstance(self.pooling, string_types) and \
+      'none' in self.pooling.lower():
+      y = y.permute(2, 0, 1, 3)
+      if self.context_length == 1:
+        y = squeeze(y, axis=0)
+    return y
+
+  @classmethod
+  def from_time_delay(cls, layer: TimeDelay, **kwargs) -> 'TimeDelayFused':
+    """ Convert a `TimeDelay` of `Dense` layers (e.g. `TimeDelayDense`)
+    into the fused layer, the weights are copied if the layer was built """
+    dense = list(layer.all_layers)
+    if not all(isinstance(i, Dense) for i in dense):
+      raise ValueError("Only support conversion of TimeDelay with Dense "
+                       f"layers, given: {[type(i) for i in dense]}")
+    kwargs.setdefault('activation', dense[0].activation)
+    kwargs.setdefault('use_bias', dense[0].use_bias)
+    fused = cls(units=dense[0].units,
+                delay_context=layer.delay_context,
+                pooling=layer.pooling,
+                **kwargs)
+    if dense[0].built:
+      linear = [i._linear for i in dense]
+      fused.build([None, None, linear[0].in_features])
+      with torch.no_grad():
+        fused.kernel.copy_(torch.stack([i.weight for i in linear], dim=0))
+        if fused.use_bias:
+          fused.bias.copy_(torch.stack([i.bias for i in linear], dim=0))
+      fused.to(linear[0].weight.device)
+    return fused
@@ -8,7 +8,9 @@
 from __future__ import absolute_import, division, print_function
 
 import inspect
-import random
+import numbers
+import os
+import struct
 import sys
 from collections import defaultdict
 from copy import deepcopy
@@ -23,11 +25,14 @@ import torch
 from six import string_types
 import torch
 import tensorflow as tf
+from torch.utils import data
 from tqdm import tqdm
 
 from sklearn.base import BaseEstimator
 
-__all__ = ['count_frames', 'KaldiFeaturesReader', 'KaldiDataset']
+__all__ = [
+    'count_frames', 'read_ark', 'KaldiFeaturesReader', 'KaldiDataset'
+]
 
 
 # ===========================================================================
@@ -78,41 +83,230 @@ def _check_pykaldi():
                       "https://anaconda.org/Pykaldi/pykaldi-cpu")
 
 
-def count_frames(specifiers: List[str],
-                 is_matrix: bool = False,
-                 is_bool_index: bool = True,
-                 progressbar: bool = False,
-                 num_workers: int = 3,
-                 concat_char: str = '&') -> List[int]:
-  """
-  Parameters
-  ----------
-  specifiers : list of `str`
-    list of sepcifier `["raw_mfcc_voxceleb.1.ark:42", ...]`
-  is_matrix : `bool` (default=`False`)
-    input data is matrix or vector
-  is_bool_index : `bool` (default=`True`)
-    if `True`, the loaded data is boolean index of speech activity detection,
-    the length of audio file is calculated by summing the index array.
-  concat_char : `str` (default='&')
-    by concatenating multiple specifier using given character,
-    multiple utterance could be sequentially loaded and concatenated.
-    (e.g. 'raw_mfcc_sre18_dev.1.ark:3018396&raw_mfcc_sre18_dev.1.ark:5516398')
+# ===========================================================================
+# Binary ark reader
+# ===========================================================================
+_GLOBAL_HEADER = struct.Struct('<ffii')  # min_value, range, num_rows, num_cols
+
+
+def _parse_specifier(specifier):
+  """ Return `(path, offset)` of a "/path/to/file.ark:offset" specifier,
+  or `None` if the specifier is not a plain binary ark offset (e.g. pipes,
+  'ark:' prefixes or row ranges), which must be read by pykaldi """
+  path, _, offset = specifier.strip().rpartition(':')
+  if len(path) == 0 or not offset.isdigit() or ':' in path or \
+    path.endswith('|'):
+    return None
+  return path, int(offset)
+
+
+def _read_token(f):
+  token = b''
+  while True:
+    c = f.read(1)
+    if c in (b' ', b''):
+      return token.decode('ascii')
+    token += c
+    if len(token) > 8:
+      raise ValueError("Invalid Kaldi token '%s'" % token)
+
+
+def _read_int32(f):
+  size, value = struct.unpack('<bi', f.read(5))
+  assert size == 4, "Only support int32 size in Kaldi ark, given: %d" % size
+  return value
+
+
+def _read_ark_header(f, offset):
+  """ Parse the header of a binary Kaldi object at the given ark offset.
 
   Return
   ------
-  List of integer (i.e. the frame count)
+  tuple `(token, num_rows, num_cols, data_offset, extra)`, `num_cols` is
+  `None` for vectors, `extra` stores the compression headers.
+  """
+  f.seek(offset)
+  if f.read(2) != b'\0B':
+    raise ValueError("Only support binary Kaldi ark, at offset %d" % offset)
+  token = _read_token(f)
+  extra = None
+  if token in ('FM', 'DM'):
+    rows = _read_int32(f)
+    cols = _read_int32(f)
+  elif token in ('FV', 'DV'):
+    rows = _read_int32(f)
+    cols = None
+  elif token in ('CM', 'CM2', 'CM3'):
+    min_value, value_range, rows, cols = _GLOBAL_HEADER.unpack(
+        f.read(_GLOBAL_HEADER.size))
+    extra = (min_value, value_range)
+    if token == 'CM':
+      # 4 uint16 percentiles (0, 25, 75, 100) per column
+      col_headers = np.frombuffer(f.read(8 * cols), dtype='<u2')
+      col_headers = min_value + value_range / 65535. * \
+        col_headers.reshape(cols, 4).astype(np.float32)
+      extra = (min_value, value_range, col_headers)
+  else:
+    raise ValueError("No support for Kaldi object with token '%s'" % token)
+  return token, rows, cols, f.tell(), extra
+
+
+def _decode_cm(values, col_headers):
+  """ Decode the uint8 values of 'CM' compressed matrix `[n, num_cols]` """
+  p0, p25, p75, p100 = [col_headers[:, i] for i in range(4)]
+  v = values.astype(np.float32)
+  return np.where(
+      v <= 64, p0 + (p25 - p0) * v / 64.,
+      np.where(v <= 192, p25 + (p75 - p25) * (v - 64) / 128.,
+               p75 + (p100 - p75) * (v - 192) / 63.)).astype(np.float32)
+
+
+def _read_ark_rows(f, offset, start=0, end=None):
+  """ Read the rows `[start, end)` of a binary Kaldi matrix or vector, only
+  the requested frames are read from disk and decoded. """
+  token, rows, cols, data_offset, extra = _read_ark_header(f, offset)
+  start = min(max(int(start), 0), rows)
+  end = rows if end is None else min(max(int(end), start), rows)
+  n = end - start
+  if token in ('FM', 'DM', 'FV', 'DV'):
+    dtype = np.dtype('<f4') if token[0] == 'F' else np.dtype('<f8')
+    width = 1 if cols is None else cols
+    f.seek(data_offset + start * width * dtype.itemsize)
+    x = np.frombuffer(f.read(n * width * dtype.itemsize), dtype=dtype)
+    x = x if cols is None else x.reshape(n, cols)
+    return x.astype(np.float32)
+  min_value, value_range = extra[:2]
+  # row-major uint16 or uint8
+  if token in ('CM2', 'CM3'):
+    dtype, scale = (np.dtype('<u2'), 65535.) if token == 'CM2' else \
+      (np.dtype('u1'), 255.)
+    f.seek(data_offset + start * cols * dtype.itemsize)
+    x = np.frombuffer(f.read(n * cols * dtype.itemsize), dtype=dtype)
+    return (min_value + value_range / scale *
+            x.reshape(n, cols).astype(np.float32)).astype(np.float32)
+  # column-major uint8 with per-column headers, one read per column
+  x = np.empty(shape=(cols, n), dtype=np.uint8)
+  for c in range(cols):
+    f.seek(data_offset + c * rows + start)
+    x[c] = np.frombuffer(f.read(n), dtype=np.uint8)
+  return _decode_cm(x.T, extra[2])
+
+
+def read_ark(specifier: str,
+             start: Optional[int] = None,
+             end: Optional[int] = None,
+             concat_char: str = '&') -> np.ndarray:
+  """ Read the frames `[start, end)` of a binary Kaldi matrix or vector
+  (uncompressed 'FM', 'DM', 'FV', 'DV' or compressed 'CM', 'CM2', 'CM3')
+  from its ark offset, without reading or decoding the other frames.
+
+  Parameters
+  ----------
+  specifier : `str`
+    file path and location joined by ':', for example:
+      "/kaldi_features/voxceleb/raw_mfcc_voxceleb.1.ark:42"
+    multiple specifiers joined by `concat_char` are concatenated along the
+    time dimension.
+  start, end : {`None`, `int`}
+    the range of frames (rows) to read, if `None`, read the whole matrix
   """
+  specs = [_parse_specifier(s) for s in specifier.split(concat_char)]
+  if any(s is None for s in specs):
+    raise ValueError("Only support 'path:offset' specifier, given: %s" %
+                     specifier)
+  start = 0 if start is None else int(start)
+  results = []
+  offset = 0  # number of frames of the previous parts
+  for path, ark_offset in specs:
+    with open(path, 'rb') as f:
+      if len(specs) == 1:
+        return _read_ark_rows(f, ark_offset, start, end)
+      n = _read_ark_header(f, ark_offset)[1]
+      s = max(start - offset, 0)
+      e = n if end is None else min(end - offset, n)
+      if e > s:
+        results.append(_read_ark_rows(f, ark_offset, s, e))
+      offset += n
+    if end is not None and offset >= end:
+      break
+  if len(results) == 0:
+    path, ark_offset = specs[0]
+    with open(path, 'rb') as f:
+      return _read_ark_rows(f, ark_offset, 0, 0)
+  return np.concatenate(results, axis=0)
+
+
+# ===========================================================================
+# Frame counting
+# ===========================================================================
+_FRAME_INDEX_EXT = '.frames.npz'
+
+
+def _load_frame_index(path, mtime):
+  """ Return the cached mapping `offset -> [num_rows, num_speech_frames]` of
+  an ark file, or empty mapping if the ark was modified after caching """
+  index_path = path + _FRAME_INDEX_EXT
+  if not os.path.isfile(index_path):
+    return {}
+  try:
+    with np.load(index_path) as data:
+      if float(data['mtime']) != mtime:
+        return {}
+      return {
+          int(o): [int(r), int(s)]
+          for o, r, s in zip(data['offsets'], data['rows'], data['speech'])
+      }
+  except Exception:  # corrupted or concurrently written file
+    return {}
+
+
+def _save_frame_index(path, mtime, index):
+  index_path = path + _FRAME_INDEX_EXT
+  offsets = np.array(sorted(index), dtype=np.int64)
+  values = np.array([index[o] for o in offsets], dtype=np.int64).reshape(-1, 2)
+  tmp_path = '%s.%d.tmp' % (index_path, os.getpid())
+  try:
+    with open(tmp_path, 'wb') as f:
+      np.savez(f,
+               mtime=np.float64(mtime),
+               offsets=offsets,
+               rows=values[:, 0],
+               speech=values[:, 1])
+    os.replace(tmp_path, index_path)
+  except OSError:  # read-only feature folder, only cached in memory
+    if os.path.exists(tmp_path):
+      os.remove(tmp_path)
+
+
+def _count_ark_frames(path, offsets, is_bool_index, cache):
+  """ Frame counts of the objects at given offsets of a single ark file, the
+  number of rows is parsed from the headers only, the payload is read only
+  for summing the speech frames of SAD vectors """
+  mtime = os.path.getmtime(path)
+  index = _load_frame_index(path, mtime) if cache else {}
+  n_new = 0
+  with open(path, 'rb') as f:
+    for offset in offsets:
+      info = index.get(offset, None)
+      if info is None:
+        info = [_read_ark_header(f, offset)[1], -1]
+        index[offset] = info
+        n_new += 1
+      if is_bool_index and info[1] < 0:
+        info[1] = int(np.sum(_read_ark_rows(f, offset)))
+        n_new += 1
+  if cache and n_new > 0:
+    _save_frame_index(path, mtime, index)
+  return {o: index[o][1 if is_bool_index else 0] for o in offsets}
+
+
+def _count_frames_pykaldi(specifiers, is_matrix, is_bool_index, progress,
+                          num_workers, concat_char):
   _check_pykaldi()
   import kaldi.util.io as kio
 
   frame_counts = []
   fn_read = kio.read_matrix if bool(is_matrix) else kio.read_vector
-  progress = tqdm(total=len(specifiers),
-                  desc="Kaldi counting frame",
-                  disable=not progressbar,
-                  mininterval=0.0,
-                  maxinterval=10.0)
 
   def _count(specs):
     res = []
@@ -129,8 +323,7 @@ def count_frames(specifiers: List[str],
       res.append((int(idx), n))
     return res
 
-  jobs = np.array_split([(i, s) for i, s in enumerate(specifiers)],
-                        num_workers * 25)
+  jobs = np.array_split(specifiers, min(num_workers * 25, len(specifiers)))
   if num_workers == 1:
     for j in jobs:
       for r in _count(j):
@@ -141,7 +334,93 @@ def count_frames(specifiers: List[str],
     for r in MPI(jobs=jobs, func=_count, ncpu=num_workers, batch=1):
       progress.update(n=len(r))
       frame_counts.extend(r)
-  return [i[1] for i in sorted(frame_counts)]
+  return frame_counts
+
+
+def count_frames(specifiers: List[str],
+                 is_matrix: bool = False,
+                 is_bool_index: bool = True,
+                 progressbar: bool = False,
+                 num_workers: int = 3,
+                 concat_char: str = '&',
+                 cache: bool = True) -> List[int]:
+  """
+  Parameters
+  ----------
+  specifiers : list of `str`
+    list of sepcifier `["raw_mfcc_voxceleb.1.ark:42", ...]`
+  is_matrix : `bool` (default=`False`)
+    input data is matrix or vector
+  is_bool_index : `bool` (default=`True`)
+    if `True`, the loaded data is boolean index of speech activity detection,
+    the length of audio file is calculated by summing the index array.
+  concat_char : `str` (default='&')
+    by concatenating multiple specifier using given character,
+    multiple utterance could be sequentially loaded and concatenated.
+    (e.g. 'raw_mfcc_sre18_dev.1.ark:3018396&raw_mfcc_sre18_dev.1.ark:5516398')
+  cache : `bool` (default=`True`)
+    if `True`, store the frame counts in a sidecar index next to each
+    ark file (i.e. "raw_mfcc_voxceleb.1.ark.frames.npz"), keyed by the
+    offset and invalidated when the ark is modified.
+
+  Note
+  ----
+  The number of frames of binary ark specifiers (i.e. "path:offset") is
+  parsed from the header, without reading the payload (except the SAD vectors
+  if `is_bool_index=True`). Other specifiers are read in full by pykaldi.
+
+  Return
+  ------
+  List of integer (i.e. the frame count)
+  """
+  num_workers = max(1, int(num_workers))
+  counts = np.zeros(shape=(len(specifiers),), dtype=np.int64)
+  # ====== group the specifiers by ark file ====== #
+  utt_ids = []
+  parts = []
+  fallback = []
+  for idx, spec in enumerate(specifiers):
+    parsed = [_parse_specifier(s) for s in spec.split(concat_char)]
+    if any(p is None for p in parsed):
+      fallback.append((idx, spec))
+      continue
+    utt_ids.extend([idx] * len(parsed))
+    parts.extend(parsed)
+  ark2offsets = defaultdict(set)
+  ark2parts = defaultdict(int)  # number of parts, for the progress
+  for path, offset in parts:
+    ark2offsets[path].add(offset)
+    ark2parts[path] += 1
+  progress = tqdm(total=len(parts) + len(fallback),
+                  desc="Kaldi counting frame",
+                  disable=not progressbar,
+                  mininterval=0.0,
+                  maxinterval=10.0)
+  # ====== parsing the headers ====== #
+  ark_counts = {}
+  if len(ark2offsets) > 0:
+    from multiprocessing.pool import ThreadPool
+
+    def _count(item):
+      path, offsets = item
+      return path, _count_ark_frames(path, sorted(offsets), is_bool_index,
+                                     cache)
+
+    pool = ThreadPool(processes=min(num_workers, len(ark2offsets)))
+    for path, res in pool.imap_unordered(_count, ark2offsets.items()):
+      ark_counts[path] = res
+      progress.update(n=ark2parts[path])
+    pool.close()
+    pool.join()
+    np.add.at(counts, np.asarray(utt_ids, dtype=np.int64),
+              [ark_counts[path][offset] for path, offset in parts])
+  # ====== fallback to pykaldi ====== #
+  if len(fallback) > 0:
+    for idx, n in _count_frames_pykaldi(fallback, is_matrix, is_bool_index,
+                                        progress, num_workers, concat_char):
+      counts[idx] = n
+  progress.close()
+  return counts.tolist()
 
 
 # ===========================================================================
@@ -234,14 +513,34 @@ class KaldiFeaturesReader(BaseEstimator):
       self.cmn_opts.center = bool(cmn_center)
       self.cmn_opts.normalize_variance = bool(cmn_normalize_variance)
 
-  def transform(self, specifier):
+  @property
+  def is_partial_readable(self) -> bool:
+    """ Without delta, shifted delta or sliding-window CMN, the features of
+    a frame only depends on that frame, so a range of frames could be read
+    without loading the whole utterance """
+    return self.delta_opts is None and self.sdelta_opts is None and \
+      self.cmn_opts is None
+
+  def transform(self, specifier, start=None, end=None):
     """
     specifier : `str`
       file path and location joined by ':', for example:
         "/kaldi_features/voxceleb/raw_mfcc_voxceleb.1.ark:42"
         "/kaldi_features/voxceleb/vad_voxceleb.1.ark:42"
+    start, end : {`None`, `int`}
+      only return the frames `[start, end)`, if `is_partial_readable`, only
+      these frames are read and decoded from a binary ark.
     """
     assert isinstance(specifier, string_types), "specifier must be a string"
+    if start is not None or end is not None:
+      if self.is_partial_readable and \
+        all(_parse_specifier(s) is not None
+            for s in specifier.split(self.concat_char)):
+        return read_ark(specifier,
+                        start=start,
+                        end=end,
+                        concat_char=self.concat_char)
+      return self.transform(specifier)[start:end]
     is_matrix = self.is_matrix
     all_feats = []
     for spec in specifier.split(self.concat_char):
@@ -308,6 +607,24 @@ def _select_post_processing(text):
   return func
 
 
+def _batch_sizes(n, batch_size, drop_last):
+  """ Size of each minibatch when splitting `n` examples """
+  sizes = np.full(shape=(n // batch_size,), fill_value=batch_size,
+                  dtype='int64')
+  if n % batch_size > 0 and not drop_last:
+    sizes = np.append(sizes, n % batch_size)
+  return sizes
+
+
+def _gather_batches(utt, sizes, order):
+  """ Select and reorder the minibatches of the flat utterance array """
+  starts = np.cumsum(sizes) - sizes
+  new_sizes = sizes[order]
+  index = np.repeat(starts[order] - (np.cumsum(new_sizes) - new_sizes),
+                    new_sizes) + np.arange(np.sum(new_sizes))
+  return utt[index], new_sizes
+
+
 class KaldiDataset(data.Dataset):
   """ Without any `post_processing` a dictionary mapping from
   `KaldiFeaturesReader.name` to list of loaded features grouped into minibatch
@@ -557,10 +874,13 @@ class KaldiDataset(data.Dataset):
 
   # ====== shuffling ====== #
   def reset(self):
-    """ This method will rebuild the meta-minibatches """
-    # [(utt_id, utt_id, ...), ...]
-    # each (utt_id, utt_id, ...) has length of minibatch size
-    self._minibatches = []
+    """ This method will rebuild the meta-minibatches.
+
+    The minibatches are planned over flat index arrays: `utt` is the
+    concatenated utterances' ID of all minibatches, and `sizes` is the number
+    of utterances in each minibatch.
+    """
+    frame_counts = np.asarray(self.frame_counts, dtype='int64')
     # ====== shuffling the data ====== #
     # everything is performed based-on the indices (utterance index or ID)
     # no need to change the original list
@@ -574,9 +894,7 @@ class KaldiDataset(data.Dataset):
     # ====== filtering ====== #
     if self.min_frames_per_utt is not None:
       n_original = len(indices)
-      indices = [
-          i for i in indices if self.frame_counts[i] > self.min_frames_per_utt
-      ]
+      indices = indices[frame_counts[indices] > self.min_frames_per_utt]
       n_new = len(indices)
       if self.verbose:
         print("Filtering min_frames_per_utt=%d - original:%d  new:%d" %
@@ -584,145 +902,144 @@ class KaldiDataset(data.Dataset):
     #
     if self.min_utt_per_label is not None and self.labels is not None:
       n_original = len(indices)
-      remove_indices = {}
-      for spk, utt_list in self.lab2utt.items():
-        if len(utt_list) < self.min_utt_per_label:
-          remove_indices.update({utt_id: True for utt_id in utt_list})
-      indices = [i for i in indices if i not in remove_indices]
+      _, inverse, counts = np.unique(self.labels,
+                                     return_inverse=True,
+                                     return_counts=True)
+      indices = indices[counts[inverse[indices]] >= self.min_utt_per_label]
       n_new = len(indices)
       if self.verbose:
         print("Filtering min_utt_per_label=%d - original:%d  new:%d" %
               (self.min_utt_per_label, n_original, n_new))
     # final utterances, stored as index in the utterance list
-    self._filtered_utt_id = np.array(indices, dtype='int64')
+    self._filtered_utt_id = indices
     # ====== create the batches ====== #
     attr_name = '_strategy_%s' % self.batch_strategy
     if not hasattr(self, attr_name):
       raise RuntimeError("No support for strategy with name: '%s'" % attr_name)
-    getattr(self, attr_name)()
+    utt, sizes = getattr(self, attr_name)()
     # ====== checking if strategy return right results ====== #
-    assert len(self._minibatches) > 0, \
+    assert len(sizes) > 0, \
       "Batch specifier must be a list of tuples that contains multiple " + \
         "utterance ID for minibatch, and the length must be > 0"
     if self.shuffle_batches:
       if self.verbose:
         print("Shuffling the minbatches ...")
-      self._rand.shuffle(self._minibatches)
+      order = np.arange(len(sizes))
+      self._rand.shuffle(order)
+      utt, sizes = _gather_batches(utt, sizes, order)
     # ====== filtering by min_utt_per_batch ====== #
     if self.min_utt_per_batch > 1:
-      n_org = len(self._minibatches)
-      self._minibatches = [
-          batch for batch in self._minibatches
-          if len(batch) >= self.min_utt_per_batch
-      ]
-      n_new = len(self._minibatches)
+      n_org = len(sizes)
+      utt, sizes = _gather_batches(
+          utt, sizes, np.flatnonzero(sizes >= self.min_utt_per_batch))
+      n_new = len(sizes)
       if self.verbose:
         print(
             "Filtering minibatches min_utt_per_batch=%d - original:%d  new:%d" %
             (self.min_utt_per_batch, n_org, n_new))
     # ====== random clipping ====== #
-    random.seed(self._rand.randint(0, 1e8))
+    # separated random state for the clipping points
+    clip_rand = np.random.RandomState(self._rand.randint(0, 1e8))
     # store clipping point (start, end) for each utterances
-    # within each minibatch
-    self._minibatches_clipping = []
-
+    clipping = np.empty(shape=(0, 2), dtype='int64')
     if self.clipping is not None:
-      n_original = sum(len(batch) for batch in self._minibatches)
+      n_original = len(utt)
       clip_utt_length = self._rand.randint(low=self.clipping[0],
                                            high=self.clipping[1] + 1,
                                            size=(n_original,),
-                                           dtype='int64').tolist()
-
-      new_minibatches = []
-      minibatches_clipping = []
-      # random a big chunk of clip_length is faster
-      # we need to make sure all utterances in the same minibatch got the same
-      # clipping length if clipping_per_batch=True
-      for batch, clip_length in zip(
-          self._minibatches,
-          self._rand.randint(low=self.clipping[0],
-                             high=self.clipping[1] + 1,
-                             size=(len(self._minibatches),),
-                             dtype='int64')):
-        # iterate through batch to get different cut of each utterance,
-        # also remove not long enough utterances
-        new_batch = []
-        batch_clipping_points = []
-        for utt_id in batch:
-          frame_count = self.frame_counts[utt_id]
-          # differnt clipping length for each utterance
-          if not self.clipping_per_batch:
-            clip_length = clip_utt_length.pop()
-          # not enough frames
-          if frame_count < clip_length:
-            pass
-          # select random start and end point based on clip_length and frame_count
-          else:
-            # note: the random.randint include both end point, no need for +1
-            start_point = random.randint(0, frame_count - clip_length)
-            end_point = start_point + clip_length
-            batch_clipping_points.append((start_point, end_point))
-            new_batch.append(utt_id)
-        # end of 1-minibatch
-        new_minibatches.append(new_batch)
-        minibatches_clipping.append(batch_clipping_points)
-      # end of clipping and filtering
-      self._minibatches = new_minibatches
-      self._minibatches_clipping = minibatches_clipping
+                                           dtype='int64')
+      # all utterances in the same minibatch got the same clipping length
+      # if clipping_per_batch=True
+      clip_batch_length = self._rand.randint(low=self.clipping[0],
+                                             high=self.clipping[1] + 1,
+                                             size=(len(sizes),),
+                                             dtype='int64')
+      clip_length = np.repeat(clip_batch_length, sizes) \
+        if self.clipping_per_batch else clip_utt_length[::-1]
+      # remove not long enough utterances
+      n_frames = frame_counts[utt]
+      keep = n_frames >= clip_length
+      batch_ids = np.repeat(np.arange(len(sizes)), sizes)
+      utt = utt[keep]
+      sizes = np.bincount(batch_ids[keep], minlength=len(sizes))
+      clip_length = clip_length[keep]
+      # random start point, the end point is included
+      start_point = clip_rand.randint(low=0,
+                                      high=n_frames[keep] - clip_length + 1,
+                                      dtype='int64')
+      clipping = np.stack([start_point, start_point + clip_length], axis=1)
       # show log if verbose
       if self.verbose:
-        n_new = sum(len(batch) for batch in self._minibatches)
         print("Filtering by clipping=%s - original:%d  new:%d" %
-              (self.clipping, n_original, n_new))
+              (self.clipping, n_original, len(utt)))
+    # ====== split into minibatches ====== #
+    splits = np.cumsum(sizes)[:-1]
+    # [(utt_id, utt_id, ...), ...]
+    # each (utt_id, utt_id, ...) has length of minibatch size
+    self._minibatches = np.split(utt, splits) if len(sizes) > 0 else []
+    # (start, end) for each utterances within each minibatch, empty if
+    # no clipping
+    if self.clipping is not None and len(sizes) > 0:
+      self._minibatches_clipping = np.split(clipping, splits)
+    else:
+      self._minibatches_clipping = [clipping] * len(self._minibatches)
 
   # ====== batch strategy ====== #
   def _strategy_utt(self):
-    for utt_id in self._filtered_utt_id:
-      self._minibatches.append([utt_id])
+    """ return the utterances' ID and the size of each minibatch """
+    utt = self._filtered_utt_id
+    return utt, np.ones(shape=(len(utt),), dtype='int64')
 
   def _strategy_naive(self):
-    """ modify `_minibatches` to a list of tuple of utterances' ID """
-    for start in range(0, len(self._filtered_utt_id), self.batch_size):
-      batch = self._filtered_utt_id[start:start + self.batch_size]
-      if len(batch) < self.batch_size and self.batch_drop_last:
-        continue
-      self._minibatches.append(batch)
+    """ return the utterances' ID and the size of each minibatch """
+    utt = self._filtered_utt_id
+    sizes = _batch_sizes(len(utt), self.batch_size, self.batch_drop_last)
+    return utt[:np.sum(sizes)], sizes
 
   def _strategy_stratify(self):
-    """ modify `_minibatches` to a list of tuple of utterances' ID """
+    """ return the utterances' ID and the size of each minibatch
+
+    At each round, the last remaining utterance of every label is selected
+    (following a random order of the labels), the round is then split into
+    minibatches.
+    """
     assert self.labels is not None, \
       "Labels must be provided for 'stratify' batch strategy"
-    # need to update lab2utt with the new filtered utterances' ID
-    lab2utt = defaultdict(list)
-    for utt_id in self._filtered_utt_id:
-      label = self.utt2lab[utt_id]
-      lab2utt[label].append(utt_id)
-
-    all_lab_utt = list(lab2utt.items())
-    self._rand.shuffle(all_lab_utt)
-
-    max_utt = self.utt_per_label_in_epoch
-    utt_count = 0
-    while True:
-      utt_list = [
-          utt_list.pop()
-          for lab_id, utt_list in all_lab_utt
-          if len(utt_list) > 0
-      ]
-      # no utterance left
-      if len(utt_list) == 0:
-        break
-      # split into mini-batches
-      for start in range(0, len(utt_list), self.batch_size):
-        batch = utt_list[start:start + self.batch_size]
-        if len(batch) < self.batch_size and self.batch_drop_last:
-          continue
-        self._minibatches.append(batch)
-
-      # breaking conditions
-      utt_count += 1
-      if utt_count >= max_utt:
-        break
+    utt = self._filtered_utt_id
+    _, codes = np.unique(np.asarray(self.labels)[utt], return_inverse=True)
+    codes = codes.ravel()
+    # labels in order of appearance, then shuffled
+    _, first = np.unique(codes, return_index=True)
+    labels_order = codes[np.sort(first)]
+    perm = np.arange(len(labels_order))
+    self._rand.shuffle(perm)
+    rank = np.empty(shape=(len(labels_order),), dtype='int64')
+    rank[labels_order[perm]] = np.arange(len(labels_order))
+    # the round in which each utterance is popped from its label
+    order = np.argsort(codes, kind='stable')
+    counts = np.bincount(codes)
+    starts = np.cumsum(counts) - counts
+    position = np.empty(shape=(len(utt),), dtype='int64')
+    position[order] = np.arange(len(utt)) - np.repeat(starts, counts)
+    rounds = counts[codes] - 1 - position
+    # breaking conditions
+    keep = rounds < max(self.utt_per_label_in_epoch, 1)
+    utt, rounds, rank = utt[keep], rounds[keep], rank[codes[keep]]
+    order = np.lexsort((rank, rounds))
+    utt, rounds = utt[order], rounds[order]
+    # split each round into mini-batches
+    round_sizes = np.bincount(rounds) if len(rounds) > 0 else \
+      np.zeros(shape=(0,), dtype='int64')
+    sizes = [
+        _batch_sizes(n, self.batch_size, self.batch_drop_last)
+        for n in round_sizes
+    ]
+    keep = np.concatenate([
+        np.arange(n) < np.sum(s) for n, s in zip(round_sizes, sizes)
+    ]) if len(sizes) > 0 else np.zeros(shape=(0,), dtype=bool)
+    sizes = np.concatenate(sizes) if len(sizes) > 0 else \
+      np.zeros(shape=(0,), dtype='int64')
+    return utt[keep], sizes
 
   # ====== dataset methods ====== #
   def __len__(self):
@@ -735,34 +1052,41 @@ class KaldiDataset(data.Dataset):
     # store (start, end) tuple for each utterance in the batch
     clipping = self._minibatches_clipping[index]
 
+    # the SAD vectors are small, always loaded in full
     sad = None
     for loader, specs in self.specifier_description.items():
-      name = loader.name.lower()
-      if name != self._sad_name:
-        feat_list[name] = [loader.transform(specs[utt_id]) for utt_id in batch]
-      else:
+      if loader.name.lower() == self._sad_name:
         sad = [
             np.asarray(loader.transform(specs[utt_id]), dtype=bool)
             for utt_id in batch
         ]
-
-    # applying sad
-    if sad is not None:
-      feat_list = {
-          name: [x[s] for x, s in zip(data_list, sad)
-                ] for name, data_list in feat_list.items()
-      }
-
-    # applying clipping
+    # the clipping points are given in the speech frames, map them to
+    # the range of raw frames `[start, end)` and the SAD mask of that range
     if len(clipping) > 0:
-      # for name, data_list in feat_list.items():
-      #   assert len(clipping) == len(data_list)
-      #   for x, (start, end) in zip(data_list, clipping):
-      #     print(x.shape, start, end)
-      feat_list = {
-          name: [x[start:end] for x, (start, end) in zip(data_list, clipping)
-                ] for name, data_list in feat_list.items()
-      }
+      if sad is None:
+        ranges = clipping
+        masks = [None] * len(batch)
+      else:
+        ranges = []
+        masks = []
+        for s, (start, end) in zip(sad, clipping):
+          speech = np.flatnonzero(s)
+          start, end = speech[start], speech[end - 1] + 1
+          ranges.append((start, end))
+          masks.append(s[start:end])
+    else:
+      ranges = [(None, None)] * len(batch)
+      masks = [None] * len(batch) if sad is None else sad
+    # only read the required frames
+    for loader, specs in self.specifier_description.items():
+      name = loader.name.lower()
+      if name == self._sad_name:
+        continue
+      feat_list[name] = [
+          x if m is None else x[m] for x, m in zip((
+              loader.transform(specs[utt_id], start=start, end=end)
+              for utt_id, (start, end) in zip(batch, ranges)), masks)
+      ]
 
     # post processing
     if self.labels is not None:
@@ -10,18 +10,18 @@
 from __future__ import print_function, division, absolute_import
 
 import timeit
-import string
-from collections import OrderedDict, Iterator, Iterable, defaultdict, Mapping
+from array import array
+from collections import Counter, OrderedDict, deque
+from collections.abc import Iterator, Iterable, Mapping
 from abc import abstractmethod, ABCMeta
 from six import add_metaclass, string_types
 
 import numpy as np
+from scipy import sparse
 
 from odin.utils import as_tuple, Progbar, is_string, is_number
-from odin.stats import freqcount
 from multiprocessing import Pool, cpu_count
 
-from odin.preprocessing.signal import pad_sequences
 
 _nlp = {}
 _stopword_list = []
@@ -116,19 +116,16 @@ class TransPreprocessor(TextPreprocessor):
   def __init__(self, old='!"#$%&()*+,-./:;<=>?@[\\]^_`{|}~\t\n',
                new=' '):
     super(TransPreprocessor, self).__init__()
-    self.__str_trans = string.maketrans(old, new * len(old))
-    new = None if len(new) == 0 else unicode(new)
-    old = unicode(old)
+    new = None if len(new) == 0 else new
     self.__uni_trans = dict((ord(char), new) for char in old)
 
   def preprocess(self, text):
     if isinstance(text, (tuple, list)):
       text = ' '.join(text)
     # ====== translate the text ====== #
-    if isinstance(text, unicode):
-      text = text.translate(self.__uni_trans)
-    else:
-      text = text.translate(self.__str_trans)
+    if isinstance(text, bytes):
+      text = text.decode('utf-8')
+    text = text.translate(self.__uni_trans)
     return text.strip()
 
 
@@ -255,6 +252,17 @@ class POSfilter(TokenFilter):
 # Preprocessing data
 # ===========================================================================
 # static variables for multiprocessing
+def _pool_initializer(filters, preprocessors, lang, lemma, charlevel,
+                      stopwords, vocabulary=None):
+  globals()['__preprocessors'] = preprocessors
+  globals()['__filters'] = filters
+  globals()['__lang'] = lang
+  globals()['__lemma'] = lemma
+  globals()['__charlevel'] = charlevel
+  globals()['__stopwords'] = stopwords
+  globals()['__vocabulary'] = vocabulary
+
+
 def _preprocess_func(doc):
   preprocessors = globals()['__preprocessors']
   filters = globals()['__filters']
@@ -296,6 +304,104 @@ def _preprocess_func(doc):
   return doc_tokens
 
 
+def _count_docs(docs):
+  """ Build the partial statistics of tokenized documents:
+  `(nb_docs, word_counts, word_docs, longest_document, longest_length)` """
+  word_counts = Counter()
+  word_docs = Counter()
+  longest = ['', 0]
+  nb_docs = 0
+  for doc in docs:
+    nb_docs += 1
+    word_counts.update(doc)
+    word_docs.update(set(doc))
+    if len(doc) > longest[-1]:
+      longest = [doc, len(doc)]
+  return nb_docs, word_counts, word_docs, longest[0], longest[1]
+
+
+def _count_shard(shard):
+  """ Map step of `Tokenizer.partial_fit`, tokenize and count a shard of
+  documents within a worker """
+  vocabulary = globals().get('__vocabulary', None)
+  docs = (_preprocess_func(doc) for doc in shard)
+  if vocabulary is not None:
+    docs = ([token for token in doc if token in vocabulary] for doc in docs)
+  return _count_docs(docs)
+
+
+def _merge_partials(a, b):
+  """ Reduce step of `Tokenizer.partial_fit`, merge two partial statistics
+  within a worker """
+  if len(a[1]) < len(b[1]):  # update the larger counters
+    a, b = b, a
+  nb_docs, word_counts, word_docs, longest, longest_length = a
+  word_counts.update(b[1])
+  word_docs.update(b[2])
+  if b[4] > longest_length:
+    longest, longest_length = b[3], b[4]
+  return nb_docs + b[0], word_counts, word_docs, longest, longest_length
+
+
+def _flatten_sequences(sequences):
+  """ Flatten the list of token indices of each document into the ragged
+  layout: (flat int32 tokens, int64 offsets of `nb_docs + 1` elements) """
+  tokens = array('i')
+  offsets = array('q', [0])
+  for seq in sequences:
+    tokens.extend(seq)
+    offsets.append(len(tokens))
+  tokens = np.frombuffer(tokens, dtype=np.int32) if len(tokens) > 0 \
+    else np.zeros(shape=(0,), dtype=np.int32)
+  return tokens, np.frombuffer(offsets, dtype=np.int64)
+
+
+def _pad_ragged(tokens, offsets, maxlen=None, dtype='int32',
+                padding='pre', truncating='pre', value=0.):
+  """ Vectorized `pad_sequences` of the ragged layout, return an array of
+  shape `[nb_docs, maxlen]` """
+  if truncating not in ('pre', 'post'):
+    raise ValueError('truncating must be "pre" or "post", given value is %s'
+                     % truncating)
+  if padding not in ('pre', 'post'):
+    raise ValueError('padding must be "pre" or "post", given value is %s'
+                     % padding)
+  lengths = np.diff(offsets)
+  if maxlen is None:
+    maxlen = int(lengths.max()) if len(lengths) > 0 else 0
+  X = np.full(shape=(len(lengths), maxlen), fill_value=value, dtype=dtype)
+  kept = np.minimum(lengths, maxlen)
+  total = int(kept.sum())
+  if total == 0:
+    return X
+  # first source token and first destination column of each document
+  src_start = offsets[1:] - kept if truncating == 'pre' else offsets[:-1]
+  col_start = maxlen - kept if padding == 'pre' else np.zeros_like(kept)
+  rows = np.repeat(np.arange(len(lengths)), kept)
+  pos = np.arange(total) - np.repeat(np.cumsum(kept) - kept, kept)
+  X[rows, np.repeat(col_start, kept) + pos] = \
+    tokens[np.repeat(src_start, kept) + pos]
+  return X
+
+
+def _length_buckets(lengths, nb_buckets):
+  """ Group the documents into `nb_buckets` by the quantiles of their
+  lengths, return the list of document indices of each bucket """
+  order = np.argsort(lengths, kind='stable')
+  return [ids for ids in np.array_split(order, nb_buckets) if len(ids) > 0]
+
+
+def _iter_shards(texts, shard_size):
+  shard = []
+  for doc in texts:
+    shard.append(doc)
+    if len(shard) >= shard_size:
+      yield shard
+      shard = []
+  if len(shard) > 0:
+    yield shard
+
+
 class Tokenizer(object):
 
   """
@@ -351,12 +457,14 @@ class Tokenizer(object):
     self.char_level = char_level
     self.language = language
 
-    self._word_counts = defaultdict(int)
+    self._word_counts = Counter()
     # number of docs the word appeared
-    self._word_docs = defaultdict(int)
+    self._word_docs = Counter()
     # actual dictionary used for embedding
     self._word_dictionary = OrderedDict()
     self._word_dictionary_info = OrderedDict()
+    # cached inverse document frequency of the dictionary
+    self._idf = None
 
     self.stopwords = stopwords
     self.lemmatization = lemmatization
@@ -377,7 +485,8 @@ class Tokenizer(object):
     word_counts = self._word_counts.items() if self.__order == 'word' \
         else self._word_docs.items()
     # sorted by both attribute for deterministic dictionary
-    word_counts.sort(key=lambda x: (x[1], x[0]), reverse=True)
+    word_counts = sorted(word_counts, key=lambda x: (x[1], x[0]),
+                         reverse=True)
     # create the ordered dictionary
     word_dictionary = OrderedDict()
     word_dictionary_info = OrderedDict()
@@ -392,6 +501,7 @@ class Tokenizer(object):
       word_dictionary_info[i + 1] = (_, self._word_docs[w])
     self._word_dictionary = word_dictionary
     self._word_dictionary_info = word_dictionary_info
+    self._idf = None
     return word_dictionary
 
   def _validate_texts(self, texts):
@@ -403,7 +513,7 @@ class Tokenizer(object):
     if is_string(texts):
       texts = (texts,)
     # convert to unicode
-    texts = (t.decode('utf-8') for t in texts)
+    texts = (t.decode('utf-8') if isinstance(t, bytes) else t for t in texts)
     return texts
 
   # ==================== properties ==================== #
@@ -447,6 +557,19 @@ class Tokenizer(object):
   def dictionary(self):
     return self._word_dictionary
 
+  @property
+  def idf(self):
+    """ The inverse document frequency of each word in the dictionary,
+    `log(1 + nb_docs / (1 + docs_freq))`, cached until the dictionary
+    is refreshed """
+    if self._idf is None:
+      docs_freq = np.zeros(shape=(self.nb_words,), dtype=np.float64)
+      for idx, (_, n_docs) in self._word_dictionary_info.items():
+        if idx < self.nb_words:
+          docs_freq[idx] = n_docs
+      self._idf = np.log(1 + self.nb_docs / (1 + docs_freq))
+    return self._idf
+
   def __len__(self):
     return len(self._word_counts)
 
@@ -460,7 +583,8 @@ class Tokenizer(object):
     return top
 
   # ==================== methods ==================== #
-  def _preprocess_docs_spacy(self, texts, vocabulary, keep_order):
+  def _preprocess_docs_spacy(self, texts, vocabulary, keep_order,
+                             shard_size=None):
     def textit(texts):
       for t in texts:
         for p in self.preprocessors:
@@ -503,116 +627,156 @@ class Tokenizer(object):
                 doc_tokens.append(char)
       yield nb_docs + 1, doc_tokens
 
-  def _preprocess_docs_odin(self, texts, vocabulary, keep_order):
-    # ====== main processing ====== #
-    def initializer(filters, preprocessors,
-                    lang, lemma, charlevel, stopwords):
-      globals()['__preprocessors'] = preprocessors
-      globals()['__filters'] = filters
-      globals()['__lang'] = lang
-      globals()['__lemma'] = lemma
-      globals()['__charlevel'] = charlevel
-      globals()['__stopwords'] = stopwords
+  def _create_pool(self, vocabulary=None):
+    return Pool(processes=self.nb_processors, initializer=_pool_initializer,
+                initargs=(self.filters, self.preprocessors, self.language,
+                          self.lemmatization, self.char_level, self.stopwords,
+                          vocabulary))
+
+  def _preprocess_docs_odin(self, texts, vocabulary, keep_order,
+                            shard_size=None):
+    """ if `shard_size` is given, the pool is fed one shard of documents at
+    a time, otherwise, the pool reads all `texts` ahead """
     # add the index for ordering
     nb_docs = 0
-    pool = Pool(processes=self.nb_processors, initializer=initializer,
-                initargs=(self.filters, self.preprocessors, self.language,
-                          self.lemmatization, self.char_level, self.stopwords))
-    # return the tokenized documents as original order.
-    if keep_order:
-      it = pool.imap(func=_preprocess_func, iterable=texts,
-                     chunksize=self.batch_size)
-    # don't care about the order, often used for fitting
-    else:
-      it = pool.imap_unordered(func=_preprocess_func, iterable=texts,
-                               chunksize=self.batch_size)
-    # iterate over each return document
-    for doc in it:
-      nb_docs += 1
-      if vocabulary is not None:
-        doc = [token for token in doc if token in vocabulary]
-      yield nb_docs, doc
+    pool = self._create_pool()
+    shards = (texts,) if shard_size is None else \
+      _iter_shards(texts, shard_size)
+    for shard in shards:
+      # return the tokenized documents as original order.
+      if keep_order:
+        it = pool.imap(func=_preprocess_func, iterable=shard,
+                       chunksize=self.batch_size)
+      # don't care about the order, often used for fitting
+      else:
+        it = pool.imap_unordered(func=_preprocess_func, iterable=shard,
+                                 chunksize=self.batch_size)
+      # iterate over each return document
+      for doc in it:
+        nb_docs += 1
+        if vocabulary is not None:
+          doc = [token for token in doc if token in vocabulary]
+        yield nb_docs, doc
     pool.close()
     pool.join()
 
-  def fit(self, texts, vocabulary=None):
-    """
+  def _update_progress(self, prog, nb_docs):
+    if self.print_progress:
+      prog['#Doc'] += nb_docs
+      prog.add(nb_docs)
+      if prog.seen_so_far >= 0.8 * prog.target:
+        prog.target = 1.2 * prog.target
+
+  def _count_partials(self, texts, vocabulary, prog):
+    """ Yield the partial statistics of the documents, the 'odin' engine
+    tokenizes and counts each shard of `batch_size` documents in a worker,
+    and yields a single partial reduced by the workers """
+    if self.__engine == 'spacy':
+      docs = (doc for _, doc in
+              self._preprocess_docs_spacy(texts, vocabulary, keep_order=False))
+      for shard in _iter_shards(docs, self.batch_size):
+        partial = _count_docs(shard)
+        self._update_progress(prog, partial[0])
+        yield partial
+      return
+    if vocabulary is not None:
+      vocabulary = set(vocabulary)
+    pool = self._create_pool(vocabulary)
+    # bound the number of tasks in flight, `imap` would read the whole
+    # corpus ahead and queue all the partial counters. The finished partials
+    # are merged pairwise by the workers, only the final one is yielded.
+    pending = deque()  # (is_count, AsyncResult)
+    reduced = []  # finished partials waiting for a pair
+    max_pending = 2 * self.nb_processors
+
+    def _collect(block):
+      while len(pending) > 0 and (block or pending[0][1].ready()):
+        is_count, result = pending.popleft()
+        partial = result.get()
+        if is_count:
+          self._update_progress(prog, partial[0])
+        reduced.append(partial)
+        if len(reduced) == 2:
+          pending.append(
+              (False, pool.apply_async(_merge_partials, tuple(reduced))))
+          del reduced[:]
+        block = False
+
+    for shard in _iter_shards(texts, self.batch_size):
+      pending.append((True, pool.apply_async(_count_shard, (shard,))))
+      _collect(block=len(pending) >= max_pending)
+    while len(pending) > 0:
+      _collect(block=True)
+    pool.close()
+    pool.join()
+    for partial in reduced:
+      yield partial
+
+  def partial_fit(self, texts, vocabulary=None):
+    """ Incrementally update the word counts and the dictionary with a new
+    batch of documents.
+
+    The documents are sharded into `batch_size` documents, each worker
+    tokenizes a shard and builds its partial word and document counters,
+    the finished partial counters are merged pairwise by the workers (at
+    most `2 * nb_processors` tasks are in flight), and the final counters
+    are merged into the counters of the Tokenizer.
+
     Parameters
     ----------
     texts: iterator of unicode
         iterator, generator or list (e.g. [u'a', u'b', ...])
         of unicode documents.
+    vocabulary: {None, set of unicode}
+        if given, only count the tokens within the vocabulary
     """
     texts = self._validate_texts(texts)
-    word_counts = self._word_counts
-    word_docs = self._word_docs
-    # ====== pick engine ====== #
-    if self.__engine == 'spacy':
-      processor = self._preprocess_docs_spacy
-    elif self.__engine == 'odin':
-      processor = self._preprocess_docs_odin
-    # ====== start processing ====== #
     prog = Progbar(target=1234, name="Fitting tokenizer",
                    print_report=True, print_summary=True)
+    prog['#Doc'] = 0
     start_time = timeit.default_timer()
-    for nb_docs, doc in processor(texts, vocabulary, keep_order=False):
-      total_docs_tokens = 0
-      seen_words = {}
-      # update words->count
-      for token in doc:
-        total_docs_tokens += 1
-        word_counts[token] += 1
-        # update words->doc
-        if token not in seen_words:
-          seen_words[token] = 1
-          word_docs[token] += 1
+    nb_docs = 0
+    for partial in self._count_partials(texts, vocabulary, prog):
+      n, word_counts, word_docs, longest, longest_length = partial
+      nb_docs += n
+      self._word_counts.update(word_counts)
+      self._word_docs.update(word_docs)
       # save longest docs
-      if total_docs_tokens > self.__longest_document[-1]:
-        self.__longest_document = [doc, total_docs_tokens]
-      # print progress
-      prog['#Doc'] = nb_docs
-      prog['#Tok'] = len(word_counts)
-      prog.add(1)
-      if prog.seen_so_far >= 0.8 * prog.target:
-        prog.target = 1.2 * prog.target
+      if longest_length > self.__longest_document[-1]:
+        self.__longest_document = [longest, longest_length]
     # ====== print summary of the process ====== #
-    # if self.print_progress:
-    #     prog.target = nb_docs; prog.update(nb_docs)
     processing_time = timeit.default_timer() - start_time
-    print('Processed %d-docs, %d-tokens in %f second.' %
-        (nb_docs, len(word_counts), processing_time))
+    if self.print_progress:
+      print('Processed %d-docs, %d-tokens in %f second.' %
+          (nb_docs, len(self._word_counts), processing_time))
     self.nb_docs += nb_docs
     # ====== sorting ====== #
     self._refresh_dictionary()
     return self
 
-  # ==================== transforming odin ==================== #
-  def transform(self, texts, mode='seq', dtype='int32',
-                padding='pre', truncating='pre', value=0.,
-                end_document=None, maxlen=None,
-                token_not_found='ignore'):
-    """
+  def fit(self, texts, vocabulary=None):
+    """ Reset the dictionary and fit the documents, call `partial_fit`
+    for incrementally fitting
+
     Parameters
     ----------
     texts: iterator of unicode
         iterator, generator or list (e.g. [u'a', u'b', ...])
         of unicode documents.
-    mode: 'binary', 'tfidf', 'count', 'freq', 'seq'
-        'binary', abc
-        'tfidf', abc
-        'count', abc
-        'freq', abc
-        'seq', abc
-    token_not_found: 'ignore', 'raise', a token string, an integer
-        pass
+    vocabulary: {None, set of unicode}
+        if given, only count the tokens within the vocabulary
     """
-    # ====== check arguments ====== #
-    texts = self._validate_texts(texts)
-    # ====== check mode ====== #
-    mode = str(mode)
-    if mode not in ('seq', 'binary', 'count', 'freq', 'tfidf'):
-      raise ValueError('The "mode" argument must be: "seq", "binary", '
-                       '"count", "freq", or "tfidf".')
+    self.nb_docs = 0
+    self.__longest_document = ['', 0]
+    self._word_counts = Counter()
+    self._word_docs = Counter()
+    return self.partial_fit(texts, vocabulary=vocabulary)
+
+  # ==================== transforming odin ==================== #
+  def _transform_sequences(self, texts, token_not_found, end_document,
+                           shard_size=None):
+    """ Yield the list of token indices of each document, if `shard_size`
+    is given, at most `shard_size` documents are tokenized ahead """
     # ====== check token_not_found ====== #
     if not is_number(token_not_found) and \
     not is_string(token_not_found) and \
@@ -620,10 +784,10 @@ class Tokenizer(object):
       raise ValueError('token_not_found can be: "ignore", "raise"'
                        ', an integer of token index, or a string '
                        'represented a token.')
-    if token_not_found not in ('ignore', 'raise'):
-      token_not_found = int(self.dictionary[token_not_found])
-    elif is_number(token_not_found):
+    if is_number(token_not_found):
       token_not_found = int(token_not_found)
+    elif token_not_found not in ('ignore', 'raise'):
+      token_not_found = int(self.dictionary[token_not_found])
     # ====== pick engine ====== #
     if self.__engine == 'spacy':
       processor = self._preprocess_docs_spacy
@@ -631,10 +795,9 @@ class Tokenizer(object):
       processor = self._preprocess_docs_odin
     # ====== Initialize variables ====== #
     dictionary = self.dictionary
-    results = []
     # ====== preprocess arguments ====== #
-    if isinstance(end_document, str):
-      end_document = dictionary.index(end_document)
+    if is_string(end_document):
+      end_document = dictionary[end_document]
     elif is_number(end_document):
       end_document = int(end_document)
     # ====== processing ====== #
@@ -646,7 +809,8 @@ class Tokenizer(object):
       auto_adjust_len = True
     prog = Progbar(target=target_len, name="Tokenize Transform",
                    print_report=True, print_summary=True)
-    for nb_docs, doc in processor(texts, vocabulary=None, keep_order=True):
+    for nb_docs, doc in processor(texts, vocabulary=None, keep_order=True,
+                                  shard_size=shard_size):
       # found the word in dictionary
       vec = []
       for x in doc:
@@ -662,50 +826,166 @@ class Tokenizer(object):
       # append ending document token
       if end_document is not None:
         vec.append(end_document)
-      # add the final results
-      results.append(vec)
+      yield vec
       # print progress
       if self.print_progress:
         prog['#Docs'] = nb_docs
         prog.add(1)
         if auto_adjust_len and prog.seen_so_far >= 0.8 * prog.target:
           prog.target = 1.2 * prog.target
-    # end the process
-    # if self.print_progress and auto_adjust_len:
-    #     prog.target = nb_docs; prog.update(nb_docs)
+
+  def _sequences_to_matrix(self, tokens, offsets, mode, dtype):
+    """ Build the sparse document-term matrix in one vectorized pass over the
+    flattened token indices """
+    n_docs = len(offsets) - 1
+    # duplicated (doc, token) entries are summed into counts
+    X = sparse.csr_matrix(
+        (np.ones(shape=(len(tokens),), dtype=dtype), tokens, offsets),
+        shape=(n_docs, self.nb_words))
+    X.sum_duplicates()
+    if mode == 'binary':
+      X.data[:] = 1
+    elif mode == 'freq':
+      lengths = np.diff(offsets).astype(dtype)
+      X.data /= np.repeat(lengths, np.diff(X.indptr))
+    elif mode == 'tfidf':
+      X.data = ((1 + np.log(X.data)) * self.idf[X.indices]).astype(dtype)
+    return X
+
+  def transform(self, texts, mode='seq', dtype='int32',
+                padding='pre', truncating='pre', value=0.,
+                end_document=None, maxlen=None,
+                token_not_found='ignore', dense=False,
+                ragged=False, nb_buckets=None):
+    """
+    Parameters
+    ----------
+    texts: iterator of unicode
+        iterator, generator or list (e.g. [u'a', u'b', ...])
+        of unicode documents.
+    mode: 'binary', 'tfidf', 'count', 'freq', 'seq'
+        'binary', abc
+        'tfidf', abc
+        'count', abc
+        'freq', abc
+        'seq', abc
+    token_not_found: 'ignore', 'raise', a token string, an integer
+        pass
+    dense: bool
+        for 'binary', 'tfidf', 'count' and 'freq' modes, the output is a
+        `scipy.sparse.csr_matrix` of shape `[nb_docs, nb_words]`, if True,
+        return a dense `numpy.ndarray` instead.
+    ragged: bool
+        for 'seq' mode, if True, return the un-padded tuple
+        `(tokens, offsets)`, where `tokens` is the flat int32 array of all
+        token indices, and the indices of document `i` are
+        `tokens[offsets[i]:offsets[i + 1]]`
+    nb_buckets: {None, int}
+        for 'seq' mode, if given, group the documents by length into
+        `nb_buckets` buckets, each bucket is only padded to its longest
+        document (at most `maxlen`), return a list of tuple
+        `(doc_indices, padded_sequences)`
+    """
+    # ====== check arguments ====== #
+    texts = self._validate_texts(texts)
+    # ====== check mode ====== #
+    mode = str(mode)
+    if mode not in ('seq', 'binary', 'count', 'freq', 'tfidf'):
+      raise ValueError('The "mode" argument must be: "seq", "binary", '
+                       '"count", "freq", or "tfidf".')
+    tokens, offsets = _flatten_sequences(
+        self._transform_sequences(texts, token_not_found, end_document))
     # ====== pad the sequence ====== #
     # just transform into sequence of tokens
     if mode == 'seq':
+      if ragged:
+        return tokens, offsets
+      if nb_buckets is not None:
+        lengths = np.diff(offsets)
+        results = []
+        for ids in _length_buckets(lengths, int(nb_buckets)):
+          length = int(lengths[ids].max())
+          if maxlen is not None:
+            length = min(length, int(maxlen))
+          results.append(
+              (ids, self._pad_documents(tokens, offsets, ids, length, dtype,
+                                        padding, truncating, value)))
+        return results
       maxlen = self.longest_document_length if maxlen is None \
           else int(maxlen)
-      results = pad_sequences(results, maxlen=maxlen, dtype=dtype,
-                              padding=padding, truncating=truncating,
-                              value=value)
-    # transform into one-hot matrix
+      results = _pad_ragged(tokens, offsets, maxlen=maxlen, dtype=dtype,
+                            padding=padding, truncating=truncating,
+                            value=value)
+    # transform into document-term matrix
     else:
-      X = np.zeros(shape=(len(results), self.nb_words))
-      for i, seq in enumerate(results):
-        if mode == 'binary':
-          X[i, seq] = 1
-        elif mode == 'freq':
-          length = len(seq)
-          count = freqcount(seq)
-          for tok, n in count.items():
-            X[i, tok] = n / float(length)
-        elif mode == 'count':
-          count = freqcount(seq)
-          for tok, n in count.items():
-            X[i, tok] = n
-        elif mode == 'tfidf':
-          count = freqcount(seq)
-          for tok, n in count.items():
-            tf = 1 + np.log(n)
-            docs_freq = self._word_dictionary_info.get(tok, (0, 0))[-1]
-            idf = np.log(1 + self.nb_docs / (1 + docs_freq))
-            X[i, tok] = tf * idf
-      results = X
+      # the default 'int32' is for the sequences
+      dtype = np.dtype(dtype)
+      if not np.issubdtype(dtype, np.floating):
+        dtype = np.dtype('float64')
+      results = self._sequences_to_matrix(tokens, offsets, mode, dtype)
+      if dense:
+        results = results.toarray()
     return results
 
+  @staticmethod
+  def _pad_documents(tokens, offsets, ids, maxlen, dtype,
+                     padding, truncating, value):
+    """ Pad the subset `ids` of the ragged documents """
+    starts = offsets[ids]
+    lengths = offsets[ids + 1] - starts
+    sub_offsets = np.concatenate([[0], np.cumsum(lengths)])
+    gather = np.repeat(starts - sub_offsets[:-1], lengths) + \
+      np.arange(sub_offsets[-1])
+    return _pad_ragged(tokens[gather], sub_offsets, maxlen=maxlen,
+                       dtype=dtype, padding=padding, truncating=truncating,
+                       value=value)
+
+  def transform_batches(self, texts, batch_size=32, buffer_size=None,
+                        dtype='int32', padding='pre', truncating='pre',
+                        value=0., end_document=None, maxlen=None,
+                        token_not_found='ignore'):
+    """ Streaming 'seq' mode transform, the documents are transformed
+    lazily, and each batch is only padded to its longest document
+    (at most `maxlen`).
+
+    Parameters
+    ----------
+    batch_size: int
+        number of documents in each batch
+    buffer_size: {None, int}
+        if given, buffer this number of documents and sort them by length
+        before batching, so each batch contains documents of similar lengths.
+        Only the buffer is held in memory, the documents are tokenized
+        one buffer at a time.
+
+    Return
+    ------
+    generator of tuple `(doc_indices, padded_sequences)`, the indices are
+    the positions of the documents in `texts`
+    """
+    texts = self._validate_texts(texts)
+    batch_size = int(batch_size)
+    buffer_size = batch_size if buffer_size is None \
+        else max(int(buffer_size), batch_size)
+    bucketing = buffer_size > batch_size
+    sequences = self._transform_sequences(texts, token_not_found,
+                                          end_document,
+                                          shard_size=buffer_size)
+    start = 0
+    for shard in _iter_shards(sequences, buffer_size):
+      tokens, offsets = _flatten_sequences(shard)
+      lengths = np.diff(offsets)
+      order = np.argsort(lengths, kind='stable') if bucketing else \
+        np.arange(len(shard))
+      for i in range(0, len(order), batch_size):
+        ids = order[i:i + batch_size]
+        length = int(lengths[ids].max())
+        if maxlen is not None:
+          length = min(length, int(maxlen))
+        yield start + ids, self._pad_documents(
+            tokens, offsets, ids, length, dtype, padding, truncating, value)
+      start += len(shard)
+
   def embed(self, vocabulary, dtype='float32',
             token_not_found='ignore'):
     """Any word not found in the vocabulary will be set to all-zeros"""
@@ -179,57 +179,106 @@ def diagonal_hillclimb_search(matrix):
   return diagonal_beam_search(matrix, beam_size=1)
 
 
-def diagonal_beam_search(matrix, beam_size=-1):
+def _complete_permutation(prefix, ncol):
+  r""" Append all the unused columns (in their natural order) to the given
+  prefix, so the output is always a valid permutation of `ncol` columns """
+  prefix = [int(i) for i in prefix]
+  used = np.zeros(shape=(ncol,), dtype=np.bool_)
+  used[prefix] = True
+  return prefix + [int(i) for i in np.flatnonzero(~used)]
+
+
+def diagonal_beam_search(matrix, beam_size=-1, n_candidates=-1, prune=False):
   r""" Find the best permutation of columns to maximize the summization of
   diagonal entries.
 
   This is a more strict version of beam search since each beam cannot contain
   duplicated element.
 
-  The implementation is optimized for speed (not memory), the memory complexity
-  is: `O(beam_size * matrix.shape[1])`
+  Each decoding step is fully vectorized: the scores of all
+  `(beam, candidate column)` pairs are computed in a single array operation
+  and the next beams are selected by a top-k partition (`np.argpartition`)
+  instead of sorting the whole candidate list.
+
+  If `prune=True`, branches are pruned using an upper bound of the
+  attainable score, i.e. the current score plus the sum of the maximum of
+  every remaining row, a branch is discarded if its upper bound cannot beat
+  the score of the greedy solution (which is used as the lower bound).
+  Hence, the pruned search falls back to the greedy solution
+  (`diagonal_greedy_search`) whenever all branches are pruned or the best
+  beam scores lower, its score is never lower than the greedy score.
+
+  The memory complexity is: `O(beam_size * n_candidates)` per step.
+
+  Arguments:
+    beam_size : an Integer. The number of hypotheses kept after each step,
+      if non-positive, use `matrix.shape[1]`.
+    n_candidates : an Integer. The trade-off between speed and quality,
+      only the `n_candidates` highest entries of each row are expanded for
+      every beam. If non-positive, all columns are considered. If all the
+      candidates of a row are used by every beam, all columns are expanded
+      for that row.
+    prune : a Boolean. Enable the upper bound pruning of hopeless branches,
+      the result could differ from the un-pruned search (see above).
 
   Return:
     indices : array
       the columns order that give the maximum diagonal sum
   """
-  ncol = matrix.shape[1]
-  min_dim = min(matrix.shape)
+  matrix = np.asarray(matrix, dtype=np.float64)
+  nrow, ncol = matrix.shape
+  min_dim = min(nrow, ncol)
+  matrix = matrix[:min_dim]
   if beam_size <= 0:
     beam_size = ncol
-  # TODO: in theory beam_size could be larger than dictionary size, but
-  # it would complicating the implementation.
-  assert beam_size <= ncol, "Beam size must smaller than dictionary"
-  beam_seq = np.empty(shape=(beam_size, ncol), dtype=np.int64)
-  beam_score = [0. for i in range(beam_size)]
-  step_score = np.empty(shape=(beam_size * ncol, ncol + 1), dtype=np.float32)
-  # first row
-  order = np.argsort(matrix[0])[::-1]
-  beam_seq[:, 0] = order[:beam_size]
-  beam_score[:] = matrix[0][beam_seq[:, 0]]
-  # iterate each column
-  for i in range(1, min_dim):
-    row = matrix[i]
-    order = np.argsort(row)[::-1]
-    n = 0
-    for beam, score in zip(beam_seq, beam_score):
-      for col_idx in order:
-        if col_idx not in beam[:i]:
-          step_score[n, :ncol] = beam  # store the prev sequence
-          step_score[n, i] = col_idx  # next decode value
-          step_score[n, -1] = score + row[col_idx]  # total score
-          n += 1
-    # best solutions
-    for j, beam in enumerate(
-        sorted(step_score[:n], key=lambda x: x[-1], reverse=True)[:beam_size]):
-      beam_seq[j] = beam[:ncol]
-      beam_score[j] = beam[-1]
-  # add the last dimensions
-  if min_dim < ncol:
-    for beam in beam_seq:
-      idx = min_dim
-      for i in range(ncol):
-        if i not in beam[:idx]:
-          beam[idx] = i
-          idx += 1
-  return [int(i) for i in beam_seq[0]]
+  if n_candidates <= 0 or n_candidates > ncol:
+    n_candidates = ncol
+  # candidate columns for each row
+  if n_candidates < ncol:
+    candidates = np.argpartition(-matrix, n_candidates - 1,
+                                 axis=1)[:, :n_candidates]
+  else:
+    candidates = np.broadcast_to(np.arange(ncol), (min_dim, ncol))
+  if prune:
+    # upper bound of the score contributed by all the rows after row `i`
+    remain = np.zeros(shape=(min_dim + 1,), dtype=np.float64)
+    remain[:-1] = np.cumsum(np.max(matrix, axis=1)[::-1])[::-1]
+    # lower bound from the greedy solution
+    greedy = diagonal_greedy_search(matrix)[:min_dim]
+    greedy_score = np.sum(matrix[np.arange(min_dim), greedy])
+  # initialize a single empty beam
+  beam_seq = np.empty(shape=(1, min_dim), dtype=np.int64)
+  beam_used = np.zeros(shape=(1, ncol), dtype=np.bool_)
+  beam_score = np.zeros(shape=(1,), dtype=np.float64)
+  all_cols = np.arange(ncol)
+  for i in range(min_dim):
+    for cols in (candidates[i], all_cols):
+      # score of all (beam, candidate) pairs, shape: [n_beam, n_candidates]
+      scores = beam_score[:, None] + matrix[i, cols][None, :]
+      scores[beam_used[:, cols]] = -np.inf
+      if prune:
+        scores[scores + remain[i + 1] < greedy_score] = -np.inf
+      scores = scores.ravel()
+      n_valid = np.count_nonzero(np.isfinite(scores))
+      # the restricted candidates ran out, expand all columns
+      if n_valid > 0 or len(cols) == ncol:
+        break
+    # everything is pruned, nothing could do better than the greedy solution
+    if n_valid == 0:
+      return _complete_permutation(greedy, ncol)
+    k = min(beam_size, n_valid)
+    if k < scores.shape[0]:
+      top = np.argpartition(-scores, k - 1)[:k]
+    else:
+      top = np.arange(scores.shape[0])
+    top = top[np.argsort(-scores[top], kind='stable')]
+    beam_ids, cand_ids = np.divmod(top, len(cols))
+    new_cols = cols[cand_ids]
+    beam_seq = beam_seq[beam_ids]
+    beam_seq[:, i] = new_cols
+    beam_used = beam_used[beam_ids]
+    beam_used[np.arange(k), new_cols] = True
+    beam_score = scores[top]
+  if prune and beam_score[0] < greedy_score:
+    return _complete_permutation(greedy, ncol)
+  return _complete_permutation(beam_seq[0], ncol)
@@ -1,7 +1,11 @@
 import functools
 import inspect
+import json
 import os
+import pickle
 import re
+import shutil
+import socket
 import sys
 import tempfile
 import traceback
@@ -39,6 +43,9 @@ __all__ = [
     'get_overrides',
     'get_output_dir',
     'get_sweep_dir',
+    'list_jobs',
+    'load_job_result',
+    'shared_dataset',
     'run_hydra',
 ]
 
@@ -53,6 +60,9 @@ SUMMARY_PATTERN = re.compile(r"\A-{1,2}summary\Z")
 REMOVE_EXIST_PATTERN = re.compile(r"\A-{1,2}override\Z")
 RESET_PATTERN = re.compile(r"\A-+r(eset)?\Z")
 TIME_FMT = r'%d%b%y_%H%M%S'
+JOBS_DIR = 'jobs'
+JOBS_INDEX = 'index.jsonl'
+SHARED_DATA_ENV = 'ODIN_SHARED_DATA'
 HYDRA_TIME_FMT = r"${now:%d%b%y_%H%M%S}"
 logger = logging.getLogger(__name__)
 
@@ -239,22 +249,344 @@ def get_sweep_dir() -> str:
   return HydraConfig.get().sweep.dir
 
 
+# ===========================================================================
+# Jobs registry
+# ===========================================================================
+def _jobs_dir(output_dir: str) -> str:
+  path = os.path.join(output_dir, JOBS_DIR)
+  if not os.path.exists(path):
+    os.makedirs(path, exist_ok=True)
+  return path
+
+
+def _job_key(cfg: DictConfig, exclude_keys: List[str]) -> str:
+  r""" Hash of the resolved configuration, ignoring the `exclude_keys` """
+  exclude_keys = [
+      k for k in exclude_keys if OmegaConf.select(cfg, k) is not None
+  ]
+  cfg = OmegaConf.create(OmegaConf.to_container(cfg, resolve=True))
+  return hash_config(cfg, exclude_keys=exclude_keys, length=12)
+
+
+def _record_job(jobs_dir: str, key: str, status: str, **kwargs):
+  r""" Append a record to the index, a single short line is written at once
+  in append mode, so parallel jobs could safely share the index """
+  record = dict(key=key,
+                status=status,
+                time=datetime.now().strftime(TIME_FMT),
+                host=socket.gethostname(),
+                pid=os.getpid(),
+                **kwargs)
+  with open(os.path.join(jobs_dir, JOBS_INDEX), 'a') as f:
+    f.write(json.dumps(record, default=str) + '\n')
+
+
+def _remove_job_result(jobs_dir: str, key: str):
+  path = os.path.join(jobs_dir, f'{key}.done')
+  if os.path.exists(path):
+    os.remove(path)
+
+
+def _save_job_result(jobs_dir: str, key: str, result: Any) -> bool:
+  r""" Store the return value of a finished job, the job is only reused if
+  its return value could be pickled, return `False` otherwise """
+  path = os.path.join(jobs_dir, f'{key}.done')
+  tmp_path = f'{path}.{os.getpid()}.tmp'
+  try:
+    data = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+  except Exception as e:
+    logger.warning(f"Cannot pickle the return value of job {key}, "
+                   f"the job will be rerun: {e}")
+    _remove_job_result(jobs_dir, key)
+    return False
+  with open(tmp_path, 'wb') as f:
+    f.write(data)
+  os.replace(tmp_path, path)
+  return True
+
+
+def _is_process_alive(pid: int) -> bool:
+  try:
+    os.kill(int(pid), 0)
+  except ProcessLookupError:
+    return False
+  except PermissionError:  # exists, owned by another user
+    return True
+  return True
+
+
+def list_jobs(output_dir: str) -> dict:
+  r""" Return the latest record of each job in the `output_dir` of
+  `run_hydra`, a mapping from the job key (i.e. `hash_config` of the resolved
+  configuration) to a dictionary with keys: 'status' ('running', 'stale',
+  'done' or 'failed'), 'time', 'overrides', 'output_dir', 'host' and 'pid'.
+  A 'running' job whose process (on this host) no longer exists, e.g. of a
+  killed sweep, is 'stale'. The finished jobs also have 'result_saved',
+  `False` if the return value couldn't be pickled (the job will be rerun).
+
+  Only the index file is read, the logs and results are not loaded, so the
+  jobs that have never started are not listed.
+  """
+  path = os.path.join(_abspath(output_dir), JOBS_DIR, JOBS_INDEX)
+  jobs = {}
+  if not os.path.exists(path):
+    return jobs
+  with open(path, 'r') as f:
+    for line in f:
+      line = line.strip()
+      if len(line) == 0:
+        continue
+      try:
+        record = json.loads(line)
+      except ValueError:  # partially written line of a killed job
+        continue
+      key = record.pop('key')
+      if key in jobs:
+        jobs[key].update(record)
+      else:
+        jobs[key] = record
+  host = socket.gethostname()
+  for job in jobs.values():
+    if job['status'] == 'running' and job.get('host', None) == host and \
+      'pid' in job and not _is_process_alive(job['pid']):
+      job['status'] = 'stale'
+  return jobs
+
+
+def load_job_result(output_dir: str, key: str) -> Any:
+  r""" Load the return value of a finished job, raise `KeyError` if the job
+  hasn't finished """
+  path = os.path.join(_abspath(output_dir), JOBS_DIR, f'{key}.done')
+  if not os.path.exists(path):
+    raise KeyError(f"No finished job with key '{key}' in {output_dir}")
+  with open(path, 'rb') as f:
+    return pickle.load(f)
+
+
+def _reuse_job(output_dir: str, key: str, override: bool):
+  r""" Return `(True, result)` of the finished job, or `(False, None)` if
+  the job must be run, the stored result is removed if `override` """
+  if override:
+    _remove_job_result(_jobs_dir(output_dir), key)
+    return False, None
+  try:
+    return True, load_job_result(output_dir, key)
+  except KeyError:
+    return False, None
+
+
+def _execute_job(output_dir: str, key: str, meta: dict,
+                 task_function: Callable[..., Any], cfg: Any,
+                 raise_error: bool) -> Any:
+  r""" Run the task and record its status and result in the index """
+  jobs_dir = _jobs_dir(output_dir)
+  _record_job(jobs_dir, key, 'running', **meta)
+  try:
+    result = task_function(cfg)
+  except Exception as e:
+    _record_job(jobs_dir, key, 'failed', **meta)
+    _, value, tb = sys.exc_info()
+    for line in traceback.TracebackException(
+        type(value), value, tb, limit=None).format(chain=None):
+      logger.error(line)
+    if raise_error:
+      raise e
+    return None
+  saved = _save_job_result(jobs_dir, key, result)
+  _record_job(jobs_dir, key, 'done', result_saved=saved, **meta)
+  return result
+
+
+# ===========================================================================
+# Shared data residency
+# ===========================================================================
+class _SharedArray:
+  r""" Placeholder of a memory-mapped array in the pickled structure """
+
+  def __init__(self, filename):
+    self.filename = filename
+
+
+class _SharedSparse:
+
+  def __init__(self, fmt, shape, data, indices, indptr):
+    self.fmt = fmt
+    self.shape = shape
+    self.data = data
+    self.indices = indices
+    self.indptr = indptr
+
+
+def _factory_name(factory) -> str:
+  if isinstance(factory, functools.partial):
+    return (f"{_factory_name(factory.func)}"
+            f"({repr(factory.args)},{repr(sorted(factory.keywords.items()))})")
+  qualname = getattr(factory, '__qualname__', None)
+  # lambdas, closures and bound methods of different datasets share the same
+  # qualified name
+  if qualname is None or '<' in qualname or inspect.ismethod(factory):
+    raise ValueError(
+        f"Cannot identify the dataset created by {factory}, provide a `name` "
+        "or use a module-level function (or `functools.partial` of it).")
+  return f"{factory.__module__}.{qualname}"
+
+
+def _new_sequence(obj, values):
+  if isinstance(obj, tuple) and hasattr(obj, '_fields'):  # namedtuple
+    return type(obj)(*values)
+  return type(obj)(values)
+
+
+def _write_shared(obj, path: str, arrays: list):
+  r""" Store the arrays (and sparse matrices) of `obj` into `.npy` files,
+  return the picklable structure with placeholders """
+  from scipy import sparse
+  if isinstance(obj, np.ndarray) and obj.dtype != np.object_:
+    filename = f"{len(arrays)}.npy"
+    x = np.lib.format.open_memmap(os.path.join(path, filename),
+                                  mode='w+',
+                                  dtype=obj.dtype,
+                                  shape=obj.shape)
+    x[...] = obj
+    x.flush()
+    arrays.append(filename)
+    return _SharedArray(filename)
+  if isinstance(obj, (sparse.csr_matrix, sparse.csc_matrix)):
+    return _SharedSparse(obj.format, obj.shape,
+                         *[
+                             _write_shared(i, path, arrays)
+                             for i in (obj.data, obj.indices, obj.indptr)
+                         ])
+  if isinstance(obj, dict):
+    return {k: _write_shared(v, path, arrays) for k, v in obj.items()}
+  if isinstance(obj, (tuple, list)):
+    return _new_sequence(obj, [_write_shared(v, path, arrays) for v in obj])
+  return obj
+
+
+def _read_shared(obj, path: str):
+  r""" Replace the placeholders by read-only memory-mapped arrays """
+  from scipy import sparse
+  if isinstance(obj, _SharedArray):
+    return np.load(os.path.join(path, obj.filename), mmap_mode='r')
+  if isinstance(obj, _SharedSparse):
+    cls = sparse.csr_matrix if obj.fmt == 'csr' else sparse.csc_matrix
+    return cls(tuple(
+        _read_shared(i, path) for i in (obj.data, obj.indices, obj.indptr)),
+               shape=obj.shape,
+               copy=False)
+  if isinstance(obj, dict):
+    return {k: _read_shared(v, path) for k, v in obj.items()}
+  if isinstance(obj, (tuple, list)):
+    return _new_sequence(obj, [_read_shared(v, path) for v in obj])
+  return obj
+
+
+def shared_dataset(factory: Callable[[], Any],
+                   name: Optional[str] = None) -> Any:
+  r""" Prepare a dataset once per sweep and share it between all jobs of
+  `run_hydra(share_data=True)` without copying.
+
+  The first job calling this function creates the dataset with `factory()`,
+  all of its arrays (and CSR/CSC sparse matrices) are stored in `.npy` files
+  in the sweep shared folder (in `/dev/shm` if available). Every other job
+  waits for the preparation, then attaches to the files as read-only
+  memory-mapped arrays, so the dataset resides once in the page cache for
+  the whole sweep.
+
+  The dataset could be an array, a dict/list/tuple of arrays, or an object
+  (e.g. `ImageDataset` or `GeneDataset`) whose arrays are stored in its
+  attributes, the other attributes are pickled.
+
+  If the sweep doesn't share data, simply return `factory()`.
+
+  Arguments:
+    factory : a callable without arguments (e.g. the dataset class, or a
+      `functools.partial`) that creates the dataset.
+    name : a String (optional). Identity of the dataset within the sweep, by
+      default, derived from the factory and its arguments. Required if the
+      factory is a lambda, a closure or a bound method.
+
+  Example:
+  ```
+  @experimenter.run_hydra(share_data=True)
+  def run(cfg):
+    ds = experimenter.shared_dataset(partial(get_dataset, cfg.ds))
+  ```
+  """
+  name = _factory_name(factory) if name is None else str(name)
+  root = os.environ.get(SHARED_DATA_ENV, None)
+  if root is None:
+    return factory()
+  import fcntl
+  key = md5_checksum(name)
+  path = os.path.join(root, key)
+  with open(f"{path}.lock", 'a') as lock:
+    fcntl.flock(lock, fcntl.LOCK_EX)
+    try:
+      if not os.path.exists(path):
+        obj = factory()
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        os.makedirs(tmp_path)
+        if hasattr(obj, '__dict__') and not isinstance(obj, type):
+          meta = (type(obj), _write_shared(dict(obj.__dict__), tmp_path, []))
+        else:
+          meta = (None, _write_shared(obj, tmp_path, []))
+        with open(os.path.join(tmp_path, 'meta.pkl'), 'wb') as f:
+          pickle.dump(meta, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    finally:
+      fcntl.flock(lock, fcntl.LOCK_UN)
+  with open(os.path.join(path, 'meta.pkl'), 'rb') as f:
+    cls, data = pickle.load(f)
+  data = _read_shared(data, path)
+  if cls is None:
+    return data
+  obj = cls.__new__(cls)
+  obj.__dict__.update(data)
+  return obj
+
+
+def _create_shared_dir(output_dir: str) -> str:
+  root = '/dev/shm' if os.path.isdir('/dev/shm') else \
+    os.path.join(output_dir, 'shared')
+  if not os.path.exists(root):
+    os.makedirs(root)
+  path = tempfile.mkdtemp(prefix='odin_', suffix='_shared', dir=root)
+  return path
+
+
 # ===========================================================================
 # Main Function
 # ===========================================================================
 def run_hydra(output_dir: str = '/tmp/outputs',
-              exclude_keys: List[str] = []) -> Callable[[TaskFunction], Any]:
+              exclude_keys: List[str] = [],
+              share_data: bool = False) -> Callable[[TaskFunction], Any]:
   """ A modified main function of Hydra-core for flexibility
   Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved
 
   Useful commands:
     - `hydra/launcher=joblib` enable joblib launcher
     - `hydra.launcher.n_jobs=-1` set maximum number of processes
-    - `--list` or `--summary` : list all exist experiments
+    - `--list` or `--summary` : list the done, running, stale (i.e. killed
+      while running) and failed experiments, the experiments that have never
+      started are not listed
     - `-j2` : run multi-processing (with 2 processes)
     - `--override` : override existed model of the given experiment
     - `--reset` : remove all files and folder in the output_dir
 
+  Each job is identified by the `hash_config` of its resolved configuration
+  (ignoring `exclude_keys`). When a job finished, its return value is stored
+  in `output_dir/jobs`, any later job with the same configuration (e.g. a
+  re-launched interrupted sweep, or overlapped sweeps) is skipped and return
+  the stored value, unless `--override` is given. A job whose return value
+  couldn't be pickled is not reused.
+
+  With `share_data=True`, the datasets created by `shared_dataset` within
+  the task function are prepared once, and shared read-only (memory-mapped)
+  by all jobs of the sweep (including the `-jN` parallel jobs). The shared
+  data is removed when the sweep finished.
+
   Examples
   --------
   ```
@@ -325,28 +657,13 @@ def run_hydra(output_dir: str = '/tmp/outputs',
       for a in sys.argv:
         if LIST_PATTERN.match(a) or SUMMARY_PATTERN.match(a):
           print("Output dir:", output_dir)
-          all_logs = defaultdict(list)
-          for i in os.listdir(log_dir):
-            name, time_str = i.replace('.log', '').split(':')
-            all_logs[name].append((time_str, os.path.join(log_dir, i)))
-          for fname in sorted(os.listdir(output_dir)):
-            path = os.path.join(output_dir, fname)
-            # basics meta
-            print(
-                f" {fname}", f"({len(os.listdir(path))} files)"
-                if os.path.isdir(path) else "")
-            # show the log files info
-            if fname in all_logs:
-              for time_str, log_file in all_logs[fname]:
-                with open(log_file, 'r') as f:
-                  log_data = f.read()
-                  lines = log_data.split('\n')
-                  n = len(lines)
-                  print(
-                      f'  log {datetime.strptime(time_str, TIME_FMT)} ({n} lines)'
-                  )
-                  for e in [l for l in lines if '[ERROR]' in l]:
-                    print(f'   {e.split("[ERROR]")[1]}')
+          status = defaultdict(list)
+          for key, job in list_jobs(output_dir).items():
+            status[job['status']].append((key, job))
+          for name in ('done', 'running', 'stale', 'failed'):
+            print(f" {name}: {len(status[name])} jobs")
+            for key, job in sorted(status[name], key=lambda x: x[1]['time']):
+              print(f"  {key} {job['time']} {job['overrides']}")
           exit()
       ### check if overrides provided
       is_overrided = False
@@ -409,32 +726,48 @@ def run_hydra(output_dir: str = '/tmp/outputs',
         cfg_text += OmegaConf.to_yaml(_cfg)[:-1]
         cfg_text += '\n -----------'
         logger.info(cfg_text)
+        # the job identity
+        key = _job_key(_cfg, exclude_keys)
+        meta = dict(overrides=get_overrides(), output_dir=get_output_dir())
         # remove the exists
         if remove_exists:
-          output_dir = get_output_dir()
-          dir_base = os.path.dirname(output_dir)
-          dir_name = os.path.basename(output_dir)
+          job_dir = get_output_dir()
+          dir_base = os.path.dirname(job_dir)
+          dir_name = os.path.basename(job_dir)
           for folder in get_all_folder(dir_base):
             if dir_name == os.path.basename(folder):
               clear_folder(folder, verbose=True)
+        # reuse the finished job
+        found, result = _reuse_job(output_dir, key, override=remove_exists)
+        if found:
+          logger.info(f"Reuse the finished job {key}")
+          return result
         # catch exception, continue running in case
-        try:
-          task_function(_cfg)
-        except Exception as e:
-          _, value, tb = sys.exc_info()
-          for line in traceback.TracebackException(
-              type(value), value, tb, limit=None).format(chain=None):
-            logger.error(line)
-          if jobs == 1:
-            raise e
-
-      _run_hydra(
-          args_parser=args,
-          task_function=_task_function,
-          config_path=config_path,
-          config_name=config_name,
-          strict=None,
-      )
+        return _execute_job(output_dir,
+                            key,
+                            meta,
+                            task_function,
+                            _cfg,
+                            raise_error=jobs == 1)
+
+      # the joblib workers inherit the environment variable
+      if share_data and SHARED_DATA_ENV not in os.environ:
+        shared_dir = _create_shared_dir(output_dir)
+        os.environ[SHARED_DATA_ENV] = shared_dir
+      else:
+        shared_dir = None
+      try:
+        _run_hydra(
+            args_parser=args,
+            task_function=_task_function,
+            config_path=config_path,
+            config_name=config_name,
+            strict=None,
+        )
+      finally:
+        if shared_dir is not None:
+          del os.environ[SHARED_DATA_ENV]
+          shutil.rmtree(shared_dir, ignore_errors=True)
 
     return decorated_main
 
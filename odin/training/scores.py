@@ -4,6 +4,7 @@ import itertools
 import os
 import re
 import sqlite3
+import struct
 import warnings
 from collections import OrderedDict
 from contextlib import contextmanager
@@ -37,7 +38,35 @@ def _to_pytype(x):
   return str
 
 
+# raw array blob: magic, dtype string length, ndim, dtype string, shape, data
+_ARRAY_MAGIC = b'ODNA'
+_ARRAY_HEADER = struct.Struct('<4sBB')
+
+
+def _encode_array(x):
+  x = np.ascontiguousarray(x)
+  dtype = x.dtype.str.encode('ascii')
+  return b''.join([
+      _ARRAY_HEADER.pack(_ARRAY_MAGIC, len(dtype), x.ndim), dtype,
+      struct.pack('<%dq' % x.ndim, *x.shape),
+      x.tobytes()
+  ])
+
+
+def _decode_array(x):
+  _, n, ndim = _ARRAY_HEADER.unpack_from(x)
+  start = _ARRAY_HEADER.size
+  dtype = np.dtype(x[start:start + n].decode('ascii'))
+  start += n
+  shape = struct.unpack_from('<%dq' % ndim, x, start)
+  start += 8 * ndim
+  # copy, the frombuffer view of the blob is read-only
+  return np.frombuffer(x, dtype=dtype, offset=start).reshape(shape).copy()
+
+
 def _data(x):
+  if x is None:
+    return None
   if isinstance(x, string_types):
     return x
   elif isinstance(x, Number):
@@ -45,6 +74,10 @@ def _data(x):
       return int(x)
     return float(x)
   try:
+    arr = np.asarray(x)
+    # typed arrays are stored raw, only object arrays need pickling
+    if arr.dtype != np.object_:
+      return _encode_array(arr)
     b = BytesIO()
     np.savez_compressed(b, x=x)
     b.seek(0)
@@ -58,15 +91,47 @@ def _data(x):
 
 def _parse(x):
   if isinstance(x, bytes):
-    b = BytesIO(x)
-    x = np.load(b, allow_pickle=True)['x']
-    if x.dtype == np.object:
+    if x[:4] == _ARRAY_MAGIC:
+      x = _decode_array(x)
+    else:  # compressed npz container
+      b = BytesIO(x)
+      x = np.load(b, allow_pickle=True)['x']
+    if x.dtype == np.object_:
       x = x.tolist()
     elif x.shape == (0,):
       x = []
   return x
 
 
+def _to_column(values):
+  r""" Convert the values of a column to numpy array """
+  # the pickled values are parsed first, i.e. an explicit `None` stored as
+  # a pickled blob becomes a missing value
+  values = [
+      _parse(v) if isinstance(v, bytes) and v[:4] != _ARRAY_MAGIC else v
+      for v in values
+  ]
+  if all(isinstance(v, int) for v in values):
+    return np.asarray(values, dtype=np.int64)
+  if all(v is None or isinstance(v, (int, float)) for v in values):
+    return np.asarray([np.nan if v is None else v for v in values],
+                      dtype=np.float64)
+  if len(values) > 0 and \
+    all(isinstance(v, (bytes, np.ndarray)) for v in values):
+    arrays = [_parse(v) for v in values]
+    shapes = set(np.shape(a) for a in arrays)
+    if len(shapes) == 1 and all(isinstance(a, np.ndarray) for a in arrays):
+      return np.stack(arrays)
+    col = np.empty(shape=(len(arrays),), dtype=np.object_)
+    col[:] = arrays
+    return col
+  if all(isinstance(v, string_types) for v in values):
+    return np.asarray(values, dtype=np.str_)
+  col = np.empty(shape=(len(values),), dtype=np.object_)
+  col[:] = [_parse(v) for v in values]
+  return col
+
+
 # ===========================================================================
 # Main
 # ===========================================================================
@@ -74,16 +139,29 @@ class ScoreBoard:
   r""" Using SQLite database for storing the scores and configuration of
   multiple experiments.
 
-  Note: this object is not optimized for high-frequency inserting.
+  By default, every row is written immediately, except within a
+  `recording()` block, where the rows are buffered and written in a single
+  transaction at the end of the block. With `buffer_size > 1`, the rows
+  outside `recording()` are also buffered until the buffer is full, before
+  any query, or calling `flush()` (or `close()`), the buffered rows are lost
+  if the process exits before. The database is opened in WAL mode, so readers
+  (e.g. `select` from other processes) do not block the writer.
 
   Note:
     it might be easier to just use NoSQL, however, we are not dealing with
     performance critical app so SQL still a more intuitive approach.
 
     All column names are lower case
+
+  Arguments:
+    path : a String. Path to the SQLite database file, or ':memory:'
+    read_only : a Boolean. Open the database in read-only mode
+    buffer_size : an Integer. Maximum number of buffered rows outside
+      `recording()` before writing, `1` (default) to write every row
+      immediately.
   """
 
-  def __init__(self, path=":memory:", read_only=False):
+  def __init__(self, path=":memory:", read_only=False, buffer_size=1):
     if ':memory:' not in path:
       path = os.path.abspath(os.path.expanduser(path))
       if os.path.isdir(path):
@@ -92,6 +170,12 @@ class ScoreBoard:
     self._conn = None
     self._c = None
     self._read_only = bool(read_only)
+    self.buffer_size = max(1, int(buffer_size))
+    # list of (table, unique, replace, row)
+    self._buffer = []
+    self._recording = 0
+    # cached table name -> list of column names
+    self._schema = {}
 
   @property
   def read_only(self):
@@ -100,9 +184,11 @@ class ScoreBoard:
   @read_only.setter
   def read_only(self, ro):
     if ro != self._read_only:
+      self.flush()
       self._read_only = bool(ro)
       if self._conn is not None:
         self._conn.close()
+        self._conn = None
 
   @property
   def conn(self) -> sqlite3.Connection:
@@ -111,22 +197,43 @@ class ScoreBoard:
         self._conn = sqlite3.connect('file:%s?mode=ro' % self.path, uri=True)
       else:
         self._conn = sqlite3.connect(self.path)
+        if ':memory:' not in self.path:
+          self._conn.execute("PRAGMA journal_mode=WAL;")
+          self._conn.execute("PRAGMA synchronous=NORMAL;")
     return self._conn
 
   @contextmanager
   def recording(self):
-    self._c = self.conn.cursor()
-    yield self
-    self.conn.commit()
-    self._c.close()
-    self._c = None
+    r""" All rows written within this block are committed in a single
+    transaction at the end of the block. If the block raises, its rows
+    are discarded (the rows written by the queries within the block are
+    rolled back if the exception leaves the outermost block). """
+    self._recording += 1
+    buffer, start = self._buffer, len(self._buffer)
+    try:
+      yield self
+    except BaseException:
+      self._recording -= 1
+      if self._recording == 0:
+        self._buffer = []
+        if self._conn is not None:
+          self._conn.rollback()
+      elif buffer is self._buffer:  # not written yet
+        del self._buffer[start:]
+      raise
+    self._recording -= 1
+    if self._recording == 0:
+      self.flush()
 
   ######## Good old query
   @contextmanager
   def cursor(self):
+    self.flush()
     c = self.conn.cursor()
     yield c
-    self.conn.commit()
+    # committed at the end of the `recording()` block
+    if self._recording == 0:
+      self.conn.commit()
     c.close()
 
   def is_table_exist(self, name):
@@ -163,6 +270,12 @@ class ScoreBoard:
       cols = [i[1] for i in cols]
     return cols
 
+  def _get_column_types(self, c, table):
+    return {
+        i[1]: i[2]
+        for i in c.execute(f"""PRAGMA table_info('{table}');""").fetchall()
+    }
+
   def get_table(self, table, where="", distinct=False):
     r""" Get all rows from given table
 
@@ -259,6 +372,56 @@ class ScoreBoard:
       rows = [r[0] if len(r) == 1 else r for r in rows]
     return rows
 
+  def select_columns(self,
+                     table,
+                     keys='*',
+                     where="",
+                     order="",
+                     dataframe=False):
+    r""" Columnar query of a single table, return a dictionary mapping
+    from column name to numpy array (or a `pandas.DataFrame` if
+    `dataframe=True`).
+
+    The numeric columns are returned as `int64` or `float64` arrays
+    (missing values are NaN), the array columns are
+    stacked if all arrays have the same shape, otherwise, returned as an
+    object array.
+
+    Example:
+    ```
+    cols = select_columns('scores', keys=['epoch', 'llk'], where="lr>0.1")
+    cols['llk'].mean()
+    ```
+    """
+    table = str(table).strip().lower()
+    if isinstance(keys, (tuple, list)):
+      keys = ','.join([str(k).strip().lower() for k in keys])
+    where = str(where).strip()
+    if len(where) > 0 and "where" not in where.lower():
+      where = "WHERE %s" % where
+    order = str(order)
+    if len(order) > 0 and "order by" not in order.lower():
+      order = "ORDER BY %s" % order
+    query = f"""SELECT {keys} FROM '{table}' {where} {order};"""
+    with self.cursor() as c:
+      try:
+        cursor = c.execute(query)
+      except sqlite3.OperationalError as e:
+        print(query)
+        raise e
+      names = [i[0] for i in cursor.description]
+      rows = cursor.fetchall()
+    values = list(zip(*rows)) if len(rows) > 0 else [()] * len(names)
+    columns = OrderedDict([
+        (name, _to_column(list(v))) for name, v in zip(names, values)
+    ])
+    if dataframe:
+      import pandas as pd
+      return pd.DataFrame({
+          k: list(v) if v.ndim > 1 else v for k, v in columns.items()
+      })
+    return columns
+
   ######## Create and insert
   def _create_table(self, _cursor, name, row, unique):
     keys = []
@@ -284,19 +447,19 @@ class ScoreBoard:
       print(query)
       raise e
 
-  def _write_table(self, _cursor, table, unique, replace, **row):
-    if self.read_only:
-      warnings.warn("Cannot write to table: %s %s" % (table, str(row)))
-      return
-    # make sure table exist
-    row = {str(k).strip().lower(): v for k, v in row.items()}
+  def _write_rows(self, _cursor, table, unique, replace, rows):
+    r""" Write rows with the same columns to a table in one statement """
+    row = rows[0]
     self._create_table(_cursor, table, row, unique)
     table_name = str(table).strip().lower()
     new_cols = list(row.keys())
     cols = ",".join([f"'{k}'" for k in new_cols])
     fmt = ','.join(['?'] * len(row))
     # make sure all column exist
-    exist_cols = self.get_column_names(table)
+    if table_name not in self._schema:
+      self._schema[table_name] = list(
+          self._get_column_types(_cursor, table_name).keys())
+    exist_cols = self._schema[table_name]
     alter_cols = [k for k in new_cols if k not in exist_cols]
     if len(alter_cols) > 0:
       for c in alter_cols:
@@ -305,26 +468,48 @@ class ScoreBoard:
           query = f"ALTER TABLE '{table_name}' ADD COLUMN '{c}' {t};"
           _cursor.execute(query)
         except sqlite3.OperationalError as e:
-          print(query)
-          raise e
-    # prepare the query
+          # the column was added by another connection
+          if 'duplicate column' not in str(e):
+            print(query)
+            raise e
+        exist_cols.append(c)
+    # prepare the query, the duplicated rows of unique keys are ignored
     if replace:
       write_mode = "REPLACE INTO"
+    elif unique:
+      write_mode = "INSERT OR IGNORE INTO"
     else:
       write_mode = "INSERT INTO"
     query = f"""{write_mode} '{table_name}' ({cols}) VALUES({fmt});"""
     try:
-      _cursor.execute(query, [_data(v) for v in row.values()])
-    except sqlite3.IntegrityError as e:
-      if unique:
-        pass
-        # warnings.warn(f"Duplicated row for unique values: {row}")
-      else:
-        raise e
+      _cursor.executemany(query, [[_data(v) for v in r.values()] for r in rows])
     except sqlite3.OperationalError as e:
       print(query)
       raise e
 
+  def flush(self):
+    r""" Write all buffered rows in a single transaction, within a
+    `recording()` block, the rows are committed at the end of the block """
+    if len(self._buffer) == 0:
+      return self
+    buffer = self._buffer
+    self._buffer = []
+    c = self.conn.cursor()
+    try:
+      # group consecutive rows with the same table and columns
+      for (table, unique, replace, _), group in itertools.groupby(
+          buffer, key=lambda x: (x[0], x[1], x[2], tuple(x[3].keys()))):
+        self._write_rows(c, table, unique, replace, [i[3] for i in group])
+      if self._recording == 0:
+        self.conn.commit()
+    except Exception as e:
+      self.conn.rollback()
+      self._schema.clear()
+      raise e
+    finally:
+      c.close()
+    return self
+
   def write(self, table, unique=False, replace=False, **row):
     r""" Write one row of data to SQL table.
 
@@ -334,18 +519,17 @@ class ScoreBoard:
       replace : a Boolean. In case unique, replace existing row and column.
       **row : mapping key, value for the row.
     """
-    row.pop('table', None)
-    row.pop('unique', None)
-    row.pop('replace', None)
-    row.pop('_cursor', None)
-    row['table'] = table
-    row['unique'] = unique
-    row['replace'] = replace
-    if self._c is None:
-      with self.cursor() as c:
-        self._write_table(_cursor=c, **row)
-    else:
-      self._write_table(_cursor=self._c, **row)
+    if self.read_only:
+      warnings.warn("Cannot write to table: %s %s" % (table, str(row)))
+      return self
+    for key in ('table', 'unique', 'replace', '_cursor'):
+      row.pop(key, None)
+    row = OrderedDict([(str(k).strip().lower(), v) for k, v in row.items()])
+    if isinstance(unique, list):
+      unique = tuple(unique)
+    self._buffer.append((table, unique, replace, row))
+    if self._recording == 0 and len(self._buffer) >= self.buffer_size:
+      self.flush()
     return self
 
   ######## others
@@ -361,6 +545,8 @@ class ScoreBoard:
     return text[:-1]
 
   def close(self):
+    if not self.read_only:
+      self.flush()
     if self._c is not None:
       self._c.close()
     if self._conn is not None:
@@ -2,9 +2,12 @@ import glob
 import inspect
 import os
 import pickle
+import struct
 import tempfile
 from collections import defaultdict
+from collections.abc import Mapping
 from functools import partial
+from multiprocessing.pool import ThreadPool
 from typing import Any, Callable, Dict, List, Optional, Text, Tuple, Union, TextIO
 import datetime
 
@@ -13,13 +16,13 @@ from scipy import signal
 import tensorflow as tf
 from six import string_types
 from tensorflow import Tensor
+from tensorflow.core.util import event_pb2
 from tensorflow.python import keras
 from tensorflow.python.data.ops.dataset_ops import DatasetV2
 from tensorflow.python.data.ops.iterator_ops import OwnedIterator
 from tensorflow.python.eager.def_function import Function
 from tensorflow.python.keras import Model, Sequential
 from tensorflow.python.ops import summary_ops_v2
-from tensorflow.python.summary.summary_iterator import summary_iterator
 from tqdm import tqdm
 
 __all__ = ['Trainer', 'get_current_trainer']
@@ -110,6 +113,194 @@ def _process_callback_returns(print_fn: Callable,
       print_fn(f" {k}:{v}")
 
 
+class _ScalarColumns:
+  r""" Growable columnar storage `(wall_time, step, value)` of a scalar tag """
+
+  __slots__ = [
+      'wall_time', 'step', 'value', 'size', 'is_sorted', 'cache',
+      'values_cache'
+  ]
+
+  def __init__(self, capacity=256):
+    self.wall_time = np.empty(shape=(capacity,), dtype=np.float64)
+    self.step = np.empty(shape=(capacity,), dtype=np.int64)
+    self.value = np.empty(shape=(capacity,), dtype=np.float64)
+    self.size = 0
+    self.is_sorted = True
+    self.cache = None
+    self.values_cache = None
+
+  def append(self, wall_time, step, value):
+    if self.size == self.wall_time.shape[0]:
+      capacity = 2 * self.size
+      for name in ('wall_time', 'step', 'value'):
+        arr = getattr(self, name)
+        new_arr = np.empty(shape=(capacity,), dtype=arr.dtype)
+        new_arr[:self.size] = arr[:self.size]
+        setattr(self, name, new_arr)
+    if self.size > 0 and step < self.step[self.size - 1]:
+      self.is_sorted = False
+      # the records will be re-sorted, rebuild the cached records
+      self.cache = None
+      self.values_cache = None
+    self.wall_time[self.size] = wall_time
+    self.step[self.size] = step
+    self.value[self.size] = value
+    self.size += 1
+
+  def columns(self):
+    if not self.is_sorted:
+      ids = np.argsort(self.step[:self.size], kind='stable')
+      for name in ('wall_time', 'step', 'value'):
+        arr = getattr(self, name)
+        arr[:self.size] = arr[:self.size][ids]
+      self.is_sorted = True
+    return (self.wall_time[:self.size], self.step[:self.size],
+            self.value[:self.size])
+
+  def records(self):
+    r""" The list of records, only the new records are appended to the
+    cached list """
+    t, step, value = self.columns()
+    if self.cache is None:
+      self.cache = []
+    n = len(self.cache)
+    if n < self.size:
+      self.cache.extend(zip(t[n:].tolist(), step[n:].tolist(), value[n:]))
+    return self.cache
+
+  def values(self):
+    r""" The list of values, incrementally extended like `records` """
+    _, _, value = self.columns()
+    if self.values_cache is None:
+      self.values_cache = []
+    n = len(self.values_cache)
+    if n < self.size:
+      self.values_cache.extend(value[n:])
+    return self.values_cache
+
+
+class _TensorboardLogs(Mapping):
+  r""" Read-only mapping `tag -> [(wall_time, step, value)]`, the records of
+  scalar tags are materialized lazily from the columnar storage. """
+
+  def __init__(self, scalars, others, unsorted):
+    self._scalars = scalars
+    self._others = others
+    self._unsorted = unsorted
+
+  def __getitem__(self, tag):
+    if tag in self._scalars:
+      return self._scalars[tag].records()
+    records = self._others[tag]
+    if tag in self._unsorted:
+      records.sort(key=lambda x: x[1])
+      self._unsorted.discard(tag)
+    return records
+
+  def __iter__(self):
+    yield from self._scalars
+    yield from self._others
+
+  def __len__(self):
+    return len(self._scalars) + len(self._others)
+
+
+class TensorboardReader:
+  r""" Incremental reader of Tensorboard event files in a `logdir`.
+
+  The byte offset of every event file is remembered, each `update` only
+  parses the newly appended records, so the cost of a query depends on
+  the number of new events rather than the length of the run. Scalars are
+  stored in compact columnar arrays, see `scalars`.
+  """
+
+  def __init__(self, logdir: str):
+    self.logdir = logdir
+    self._offsets = {}
+    self._plugins = {}  # the plugin name is only written for the first event
+    self._scalars = {}
+    self._others = defaultdict(list)
+    self._unsorted = set()  # the tags of `_others` appended out of order
+
+  def _parse(self, event):
+    t = event.wall_time
+    step = event.step
+    for value in event.summary.value:
+      tag = value.tag
+      dtype = value.metadata.plugin_data.plugin_name
+      if len(dtype) == 0:
+        dtype = self._plugins.get(tag, '')
+      else:
+        self._plugins[tag] = dtype
+      data = tf.make_ndarray(value.tensor)
+      # scalars values
+      if dtype == "scalars":
+        if tag not in self._scalars:
+          self._scalars[tag] = _ScalarColumns()
+        self._scalars[tag].append(t, step, data)
+        continue
+      # text values
+      elif dtype == "text":
+        if len(value.tensor.tensor_shape.dim) == 0:
+          data = str(data.tolist(), 'utf-8')
+        else:
+          data = np.array([str(i, 'utf-8') for i in data])
+      # image
+      elif dtype == "images":
+        data = data  # byte string
+      # histogram
+      elif dtype == "histograms":
+        data = data  # array
+      else:
+        raise NotImplementedError(f"Unknown data type: {dtype}-{data}")
+      records = self._others[tag]
+      if len(records) > 0 and step < records[-1][1]:
+        self._unsorted.add(tag)
+      records.append((t, step, data))
+
+  def update(self) -> int:
+    r""" Parse all newly appended events, return the number of new events """
+    n_events = 0
+    files = glob.glob(f"{self.logdir}/event*")
+    for f in sorted(files, key=lambda x: int(os.path.basename(x).split('.')[3])):
+      offset = self._offsets.get(f, 0)
+      if os.path.getsize(f) <= offset:
+        continue
+      with open(f, 'rb') as fin:
+        fin.seek(offset)
+        buffer = fin.read()
+      # TFRecord: length(8) crc(4) data(length) crc(4)
+      pos = 0
+      while pos + 12 <= len(buffer):
+        length = struct.unpack('<Q', buffer[pos:pos + 8])[0]
+        end = pos + 12 + length + 4
+        if end > len(buffer):  # the record is being written
+          break
+        self._parse(event_pb2.Event.FromString(buffer[pos + 12:end - 4]))
+        pos = end
+        n_events += 1
+      self._offsets[f] = offset + pos
+    return n_events
+
+  @property
+  def tags(self) -> List[str]:
+    return list(self._scalars.keys()) + list(self._others.keys())
+
+  def scalars(self, tag: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    r""" Return the columns `(wall_time, step, value)` of a scalar tag sorted
+    by step, the arrays are views of the internal storage """
+    if tag not in self._scalars:
+      empty = np.empty(shape=(0,))
+      return empty, empty.astype(np.int64), empty
+    return self._scalars[tag].columns()
+
+  @property
+  def logs(self) -> Mapping:
+    r""" A mapping from `tag` to list of tuple `(wall_time, step, value)` """
+    return _TensorboardLogs(self._scalars, self._others, self._unsorted)
+
+
 def read_tensorboard(logdir: str) -> Dict[Text, Tuple[float, int, float]]:
   r""" Read Tensorboard event files from a `logdir`
 
@@ -117,38 +308,9 @@ def read_tensorboard(logdir: str) -> Dict[Text, Tuple[float, int, float]]:
     a dictionary mapping from `tag` (string) to list of tuple
     `(wall_time, step, value)`
   """
-  all_log = defaultdict(list)
-  for f in sorted(glob.glob(f"{logdir}/event*"),
-                  key=lambda x: int(os.path.basename(x).split('.')[3])):
-    for event in summary_iterator(f):
-      t = event.wall_time
-      step = event.step
-      summary = event.summary
-      for value in event.summary.value:
-        tag = value.tag
-        meta = value.metadata
-        dtype = meta.plugin_data.plugin_name
-        data = tf.make_ndarray(value.tensor)
-        # scalars values
-        if dtype == "scalars":
-          pass
-        # text values
-        elif dtype == "text":
-          if len(value.tensor.tensor_shape.dim) == 0:
-            data = str(data.tolist(), 'utf-8')
-          else:
-            data = np.array([str(i, 'utf-8') for i in data])
-        # image
-        elif dtype == "images":
-          data = data  # byte string
-        # histogram
-        elif dtype == "histograms":
-          data = data  # array
-        else:
-          raise NotImplementedError(f"Unknown data type: {dtype}-{data}")
-        all_log[tag].append((t, step, data))
-  all_log = {i: sorted(j, key=lambda x: x[1]) for i, j in all_log.items()}
-  return all_log
+  reader = TensorboardReader(logdir)
+  reader.update()
+  return dict(reader.logs)
 
 
 # ===========================================================================
@@ -368,7 +530,7 @@ class Trainer(object):
     self._last_train_metrics = {}
     # others
     self._current_train_progress = None
-    self._cached_tensorboard = None
+    self._tensorboard_reader = None
     self._is_training = tf.Variable(False,
                                     trainable=False,
                                     dtype=tf.bool,
@@ -395,16 +557,21 @@ class Trainer(object):
     return self._last_valid_metrics
 
   @property
-  def tensorboard(self) -> Dict[Text, Tuple[float, int, float]]:
+  def tensorboard_reader(self) -> TensorboardReader:
+    r""" The incremental reader of the Tensorboard event files, only the
+    events written since the last update are parsed """
+    if self._tensorboard_reader is None:
+      self._tensorboard_reader = TensorboardReader(self.logdir)
+    if os.path.exists(self.logdir):
+      self._tensorboard_reader.update()
+    return self._tensorboard_reader
+
+  @property
+  def tensorboard(self) -> Mapping:
     """Return data stored in the Tensorboard
     `Dict['metric_name', Tuple['time', 'step', 'values']]`
     """
-    if self._cached_tensorboard is None:
-      if not os.path.exists(self.logdir):
-        self._cached_tensorboard = dict()
-      else:
-        self._cached_tensorboard = read_tensorboard(self.logdir)
-    return self._cached_tensorboard
+    return self.tensorboard_reader.logs
 
   @property
   def log_file(self) -> TextIO:
@@ -414,32 +581,27 @@ class Trainer(object):
     return self._log_file
 
   def get_train_losses(self) -> List[float]:
-    losses = self.tensorboard.get('train/loss', [])
-    losses = [i[-1] for i in losses]
-    return losses
+    return self.tensorboard_reader.scalars('train/loss')[-1].tolist()
 
   def get_valid_losses(self) -> List[float]:
-    losses = self.tensorboard.get('valid/loss', [])
-    losses = [i[-1] for i in losses]
-    return losses
+    return self.tensorboard_reader.scalars('valid/loss')[-1].tolist()
 
-  def get_train_metrics(self) -> Dict[str, List[float]]:
+  def _get_metrics(self, prefix) -> Dict[str, List[float]]:
+    reader = self.tensorboard_reader
     metrics = dict()
-    for key, val in self.tensorboard.items():
-      if "train/" == key[:6] and key != "train/loss":
-        key = key[6:]
-        val = [i[-1] for i in val]
-        metrics[key] = val
+    for key in reader.tags:
+      if prefix == key[:6] and key != f"{prefix}loss":
+        if key in reader._scalars:
+          metrics[key[6:]] = list(reader._scalars[key].values())
+        else:
+          metrics[key[6:]] = [i[-1] for i in reader.logs[key]]
     return metrics
 
+  def get_train_metrics(self) -> Dict[str, List[float]]:
+    return self._get_metrics("train/")
+
   def get_valid_metrics(self) -> Dict[str, List[float]]:
-    metrics = dict()
-    for key, val in self.tensorboard.items():
-      if "valid/" == key[:6] and key != "valid/loss":
-        key = key[6:]
-        val = [i[-1] for i in val]
-        metrics[key] = val
-    return metrics
+    return self._get_metrics("valid/")
 
   @property
   def summary_writer(self) -> tf.summary.SummaryWriter:
@@ -464,7 +626,7 @@ class Trainer(object):
     # default attributes
     self._summary_writer = None
     self._current_train_progress = None
-    self._cached_tensorboard = None
+    self._tensorboard_reader = None
     self._is_training = tf.Variable(False,
                                     trainable=False,
                                     dtype=tf.bool,
@@ -487,6 +649,9 @@ class Trainer(object):
           logging_interval: float = 5,
           log_tag: str = '',
           max_iter: int = -1,
+          steps_per_execution: int = 1,
+          valid_in_background: bool = False,
+          valid_snapshot: Optional[Callable[[], Callable]] = None,
           callback: Union[Callback, List[Callback]] = lambda: None):
     """ A simplified fitting API
 
@@ -502,11 +667,24 @@ class Trainer(object):
     valid_freq : an Integer. The frequency of validation task, based on
       the current number of iteration.
     valid_interval : a Scalar. The number of second until next validation.
+    valid_in_background : Boolean. Run the validation in a background thread
+      while the training continues, the results are reported (and the
+      `callback` is called) at the first iteration after it finished. A new
+      validation is not started until the previous one finished.
+    valid_snapshot : Callable (optional). Called (in the training thread) at
+      the beginning of each background validation, return an `optimize`
+      function evaluated on a snapshot copy of the weights. If not given
+      (or it returns None), the background validation reads the weights
+      being trained.
     autograph : Boolean. Enable static graph for the `optimize` function.
     logging_interval : Scalar. Interval for print out log information
       (in second).
     max_iter : An Interger or `None`. Maximum number of iteration for
       training. If `max_iter <= 0`, iterate the training data until the end.
+    steps_per_execution : An Integer. Number of optimization steps run inside
+      a single compiled call over the dataset iterator, reduce the Python
+      overhead between steps for small models. The logged loss and scalar
+      metrics are averaged over the steps of each call.
     callback : Callable take no input arguments.
       The callback will be called after every fixed number of iteration
       according to `valid_freq`, or fixed duration defined by `valid_interval`
@@ -575,55 +753,230 @@ class Trainer(object):
       return None if len(results) == 0 else results
 
     ### validating function
-    def valid():
-      epoch_loss = []
-      epoch_metrics = defaultdict(list)
-      valid_progress = tqdm(
-          enumerate(valid_ds.repeat(1)),
-          desc=f"Validating {valid_freq}(it) or {valid_interval:.1f}(s)")
-      for it, inputs in valid_progress:
-        _loss, _metrics = fn_step(inputs, training=False)
-        # store for calculating average
-        epoch_loss.append(_loss)
-        for k, v in _metrics.items():
-          epoch_metrics[k].append(v)
-      epoch_loss = tf.reduce_mean(epoch_loss, axis=0)
-      epoch_metrics = {
-          k: tf.reduce_mean(v, axis=0) for k, v in epoch_metrics.items()
+    def valid_step(opt_fn, inputs):
+      if isinstance(inputs, dict):
+        loss, metrics = opt_fn(training=False, **inputs)
+      else:
+        loss, metrics = opt_fn(inputs, training=False)
+      return (tf.convert_to_tensor(loss),
+              {k: tf.convert_to_tensor(v) for k, v in metrics.items()})
+
+    def valid(opt_fn=None):
+      r""" Streaming means of the loss and floating point metrics over the
+      validation set, compiled into a single `Dataset.reduce` """
+      opt_fn = optimize if opt_fn is None else opt_fn
+      ds = valid_ds.repeat(1)
+      # the first batch defines the structure of the reduction state
+      loss, metrics = None, {}
+      for inputs in ds.take(1):
+        loss, metrics = valid_step(opt_fn, inputs)
+      if loss is None:
+        return None, {}
+      averaged = {k: v for k, v in metrics.items() if v.dtype.is_floating}
+      # integer metrics are summed then divided (i.e. `tf.reduce_mean`)
+      summed = {k: v for k, v in metrics.items() if v.dtype.is_integer}
+      others = {
+          k: v
+          for k, v in metrics.items()
+          if k not in averaged and k not in summed
+      }
+
+      def reduce_fn(state, inputs):
+        n, mean_loss, mean_metrics, sum_metrics = state
+        loss, metrics = valid_step(opt_fn, inputs)
+        n = n + 1
+        mean_loss = mean_loss + \
+          (tf.cast(loss, mean_loss.dtype) - mean_loss) / \
+            tf.cast(n, mean_loss.dtype)
+        mean_metrics = {
+            k: m + (tf.cast(metrics[k], m.dtype) - m) / tf.cast(n, m.dtype)
+            for k, m in mean_metrics.items()
+        }
+        sum_metrics = {
+            k: m + tf.cast(metrics[k], m.dtype) for k, m in sum_metrics.items()
+        }
+        return n, mean_loss, mean_metrics, sum_metrics
+
+      state = (tf.constant(1, dtype=tf.int64), loss, averaged, summed)
+      if compile_graph:
+        state = ds.skip(1).reduce(state, reduce_fn)
+      else:
+        for inputs in ds.skip(1):
+          state = reduce_fn(state, inputs)
+      n, loss, averaged, summed = state
+      averaged.update({
+          k: tf.math.truncatediv(v, tf.cast(n, v.dtype))
+          for k, v in summed.items()
+      })
+      averaged.update(others)
+      return loss, averaged
+
+    def report_valid(val_loss, val_metrics, step):
+      if val_loss is None:
+        return
+      self._last_valid_loss = val_loss
+      self._last_valid_metrics = val_metrics
+      tf.summary.experimental.set_step(step)
+      _save_summary(val_loss, val_metrics, prefix="valid/", flush=True)
+      tf.summary.experimental.set_step(self.n_iter)
+      _print_summary(self.print,
+                     log_tag,
+                     val_loss,
+                     val_metrics,
+                     step,
+                     is_valid=True)
+
+    ### background validation on a snapshot of the weights
+    valid_pool = None
+    valid_pending = []  # list of (AsyncResult, step)
+    compiled_snapshot = [None, None]  # (key, compiled function)
+    if valid_in_background and valid_ds is not None:
+      valid_pool = ThreadPool(processes=1)
+
+    def start_background_valid():
+      if len(valid_pending) > 0:  # the last validation is still running
+        return
+      opt_fn = None
+      if valid_snapshot is not None:
+        opt_fn = valid_snapshot()
+        if opt_fn is not None and compile_graph and \
+          not isinstance(opt_fn, Function):
+          # a new bound method is returned at every call, the key is the
+          # snapshot object and the function, so it is compiled once
+          key = (id(getattr(opt_fn, '__self__', None)),
+                 getattr(opt_fn, '__func__', opt_fn))
+          if compiled_snapshot[0] != key:
+            compiled_snapshot[:] = [
+                key,
+                tf.function(opt_fn,
+                            autograph=bool(autograph),
+                            experimental_compile=experimental)
+            ]
+          opt_fn = compiled_snapshot[1]
+      valid_pending.append((valid_pool.apply_async(valid,
+                                                   (opt_fn,)), self.n_iter))
+
+    def collect_background_valid(wait=False):
+      r""" Report the finished background validation, then call the
+      callback, so it sees the new validation loss """
+      if len(valid_pending) == 0:
+        return
+      result, step = valid_pending[0]
+      if wait or result.ready():
+        valid_pending.pop(0)
+        report_valid(*result.get(), step)
+        self.summary_writer.flush()
+        _process_callback_returns(self.print, log_tag, self.n_iter,
+                                  callback())
+
+    ### running multiple steps within a single call
+    steps_per_execution = max(1, int(steps_per_execution))
+
+    def fn_multi_steps(inputs, iterator, n_steps):
+      r""" Run the first step on `inputs`, then at most `n_steps - 1` steps
+      on the iterator within a `tf.while_loop`, return the number of
+      executed steps, the mean loss and the metrics """
+      loss, metrics = fn_step(inputs, training=True)
+      metrics = {k: tf.convert_to_tensor(v) for k, v in metrics.items()}
+      # only average the floating point scalars, others keep the last value
+      averaged = {
+          k: v
+          for k, v in metrics.items()
+          if v.shape.ndims == 0 and v.dtype.is_floating
       }
-      return epoch_loss, epoch_metrics
+      others = {k: v for k, v in metrics.items() if k not in averaged}
+
+      def cond(i, done, total_loss, totals, last):
+        return tf.logical_and(i < n_steps, tf.logical_not(done))
+
+      def body(i, done, total_loss, totals, last):
+        next_inputs = iterator.get_next_as_optional()
+
+        def run():
+          loss, metrics = fn_step(next_inputs.get_value(), training=True)
+          return (i + 1, tf.constant(False),
+                  total_loss + tf.cast(loss, total_loss.dtype), {
+                      k: v + tf.cast(metrics[k], v.dtype)
+                      for k, v in totals.items()
+                  }, {k: tf.convert_to_tensor(metrics[k]) for k in last})
+
+        def stop():
+          return i, tf.constant(True), total_loss, totals, last
+
+        return tf.cond(next_inputs.has_value(), run, stop)
+
+      loop_vars = (tf.constant(1), tf.constant(False),
+                   tf.convert_to_tensor(loss), averaged, others)
+      shape_invariants = tf.nest.map_structure(lambda v: v.shape, loop_vars)
+      shape_invariants = shape_invariants[:-1] + \
+        ({k: tf.TensorShape(None) for k in others},)
+      n, _, total_loss, totals, last = tf.while_loop(
+          cond, body, loop_vars, shape_invariants=shape_invariants)
+      metrics = {k: v / tf.cast(n, v.dtype) for k, v in totals.items()}
+      metrics.update(last)
+      return n, total_loss / tf.cast(n, total_loss.dtype), metrics
+
+    if compile_graph and steps_per_execution > 1:
+      fn_multi_steps = tf.function(fn_multi_steps,
+                                   autograph=False,
+                                   experimental_compile=experimental)
+
+    def iterate_steps():
+      r""" Yield `(n_steps, loss, metrics)` after each execution """
+      if steps_per_execution == 1:
+        for cur_iter, inputs in enumerate(train_ds):
+          if max_iter > 0 and cur_iter >= max_iter:
+            break
+          loss, metrics = fn_step(inputs, training=True)
+          yield 1, loss, metrics
+      else:
+        iterator = iter(train_ds)
+        cur_iter = 0
+        while max_iter <= 0 or cur_iter < max_iter:
+          n_steps = steps_per_execution
+          if max_iter > 0:
+            n_steps = min(n_steps, max_iter - cur_iter)
+          try:
+            inputs = next(iterator)
+          except (StopIteration, tf.errors.OutOfRangeError):
+            break
+          n, loss, metrics = fn_multi_steps(inputs, iterator, n_steps)
+          # the iterator is exhausted within the execution
+          n = int(n)
+          cur_iter += n
+          yield n, loss, metrics
+          if n < n_steps:
+            break
 
     ### training function
     def train():
       global _CURRENT_TRAINER
       _CURRENT_TRAINER = self
       self._is_training.assign(True)
-      progress = tqdm(train_ds, desc=f"Traning {max_iter}(its)")
+      progress = tqdm(total=max_iter if max_iter > 0 else None,
+                      desc=f"Traning {max_iter}(its)")
       self._current_train_progress = progress
       start_time = progress.start_t
       last_print_time = 0
       last_valid_time = start_time
       self.print("*** Start training: "
                  f"{datetime.datetime.now().strftime(r'%H:%M:%S %d/%m/%Y')}")
-      for cur_iter, inputs in enumerate(progress):
-        self._n_iter += 1
+      cur_iter = 0
+      for n_steps, loss, metrics in iterate_steps():
+        last_iter = self.n_iter
+        self._n_iter += n_steps
+        cur_iter += n_steps
+        progress.update(n_steps)
         tf.summary.experimental.set_step(self.n_iter)
-        # ====== check maximum iteration ====== #
-        if max_iter > 0 and cur_iter >= max_iter:
-          break
-        # the tensorboard will change after each iteration
-        self._cached_tensorboard = None
-        # ====== train ====== #
-        loss, metrics = fn_step(inputs, training=True)
         self._last_train_loss = loss
-        self._last_train_metrics = dict(metrics)
-        # metric could be hiden by add '_' to the beginning
-        metrics = {k: v for k, v in metrics.items() if '_' != k[0]}
+        self._last_train_metrics = metrics
         # do not record the loss and metrics at every iteration, the
         # performance will drop about 40%
         # ====== logging ====== #
         interval = progress._time() - last_print_time
         if interval >= logging_interval:
+          # metric could be hiden by add '_' to the beginning
+          metrics = {k: v for k, v in metrics.items() if '_' != k[0]}
           self.log_file.flush()
           # summarize the batch loss and metrics
           _save_summary(loss, metrics, prefix="train/")
@@ -634,33 +987,37 @@ class Trainer(object):
                          self.n_iter,
                          is_valid=False)
           last_print_time = progress._time()
+        # the callback is called once the background validation finished
+        collect_background_valid()
         # ====== validation ====== #
         interval = progress._time() - last_valid_time
-        if cur_iter == 0 or \
-          (self.n_iter % valid_freq == 0 and interval >= valid_interval):
-          if valid_ds is not None:
-            # finish the validation
-            val_loss, val_metrics = valid()
-            self._last_valid_loss = val_loss
-            self._last_valid_metrics = val_metrics
-            _save_summary(val_loss, val_metrics, prefix="valid/", flush=True)
-            _print_summary(self.print,
-                           log_tag,
-                           val_loss,
-                           val_metrics,
-                           self.n_iter,
-                           is_valid=True)
-          # callback always called
-          _process_callback_returns(self.print, log_tag, self.n_iter,
-                                    callback())
+        if cur_iter == n_steps or \
+          (self.n_iter // valid_freq > last_iter // valid_freq and
+           interval >= valid_interval):
+          if valid_pool is not None:
+            start_background_valid()
+          else:
+            if valid_ds is not None:
+              # finish the validation
+              report_valid(*valid(), self.n_iter)
+            # callback always called, and see the latest summaries
+            self.summary_writer.flush()
+            _process_callback_returns(self.print, log_tag, self.n_iter,
+                                      callback())
           last_valid_time = progress._time()
         # ====== terminate training ====== #
         if not self.is_training:
+          metrics = {k: v for k, v in metrics.items() if '_' != k[0]}
           self.print('Terminate training!')
           self.print(f' Loss: {np.asarray(loss)}')
           for k, v in metrics.items():
             self.print(f' {k}: {np.asarray(v)}')
           break
+      # wait for the last background validation
+      if valid_pool is not None:
+        collect_background_valid(wait=True)
+        valid_pool.close()
+        valid_pool.join()
       # Final callback to signal train ended
       self._is_training.assign(False)
       _process_callback_returns(self.print, log_tag, self.n_iter, callback())
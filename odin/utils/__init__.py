@@ -26,7 +26,8 @@ import numpy
 
 from odin.utils import crypto, decorators, mpi
 from odin.utils.cache_utils import *
-from odin.utils.crypto import md5_checksum, md5_folder, MD5object
+from odin.utils.crypto import (MD5Cache, MD5object, md5_checksum, md5_folder,
+                               md5_folder_parallel)
 from odin.utils.mpi import (MPI, SharedCounter, async_process, async_thread,
                             segment_list)
 from odin.utils.net_utils import *
@@ -5,9 +5,11 @@ import hashlib
 import os
 import pickle
 import struct
+import threading
 import zipfile
 from collections import Sequence
 from io import BytesIO
+from multiprocessing.pool import ThreadPool
 from numbers import Number
 
 import numpy as np
@@ -72,19 +74,57 @@ def _is_dictionary(obj):
     'omegaconf.dictconfig.DictConfig' in str(type(obj))
 
 
-def md5_folder(path,
-               chunksize=512 * 1024,
-               base64_encode=False,
-               file_filter=lambda path: True,
-               verbose=False):
-  r""" Calculate md5 checksum of all files in a folder and all its subfolders
+def _md5_update_file(hash_md5, path, chunksize):
+  r""" Stream a file into the hash using a single reusable buffer """
+  buffer = bytearray(chunksize)
+  view = memoryview(buffer)
+  with open(path, 'rb', buffering=0) as f:
+    while True:
+      n = f.readinto(buffer)
+      if not n:
+        break
+      hash_md5.update(view[:n])
+
+
+def _md5_update_array(hash_md5, arr, chunksize):
+  r""" Hash the C-order bytes of an array (i.e. identical to `arr.tobytes()`)
+  without copying the whole array.
+
+  A C-contiguous array (including memory-mapped array) is hashed directly
+  from its buffer, otherwise, the array is copied in blocks of rows so the
+  peak memory is bounded by `chunksize`.
   """
-  # a folder (then read all files in order)
-  path = str(path)
-  assert os.path.isdir(path), "'%s' is not path to a folder" % path
-  chunksize = int(chunksize)
-  hash_md5 = hashlib.md5()
-  # ====== get all files ====== #
+  if arr.dtype.hasobject:
+    hash_md5.update(arr.tobytes())
+  elif arr.flags['C_CONTIGUOUS']:
+    buffer = arr.reshape(-1).view(np.uint8)
+    for start in range(0, buffer.shape[0], chunksize):
+      hash_md5.update(buffer[start:start + chunksize])
+  elif arr.ndim == 0:
+    hash_md5.update(arr.tobytes())
+  else:
+    row_size = max(arr.itemsize * int(np.prod(arr.shape[1:])), 1)
+    batch_size = max(chunksize // row_size, 1)
+    for start in range(0, arr.shape[0], batch_size):
+      hash_md5.update(
+          np.ascontiguousarray(arr[start:start + batch_size]).reshape(-1).view(
+              np.uint8))
+
+
+def _md5_update_sparse(hash_md5, mat, chunksize):
+  r""" Hash a sparse matrix from its compressed components (the shape, data,
+  indices and index pointers) without densifying the matrix """
+  if not isinstance(mat, (sp.sparse.csr_matrix, sp.sparse.csc_matrix)):
+    mat = mat.tocsr()
+  if not mat.has_canonical_format:
+    mat = mat.copy()
+    mat.sum_duplicates()
+  hash_md5.update(f"<{mat.format}:{mat.shape}:{mat.dtype}>".encode('utf-8'))
+  for arr in (mat.data, mat.indices, mat.indptr):
+    _md5_update_array(hash_md5, np.asarray(arr), chunksize)
+
+
+def _list_files(path, file_filter):
   folders = [path]
   files = []
   while len(folders) > 0:
@@ -98,15 +138,174 @@ def md5_folder(path,
           '._' != os.path.basename(path)[:2] and \
             file_filter(path):
         files.append(path)
+  return sorted(files)
+
+
+class MD5Cache:
+  r""" A persistent mapping `(path, mtime, size) -> digest`, files that are
+  unchanged since the last visit are never re-read.
+
+  The cache is thread-safe and stored as a pickled dictionary, call `save`
+  (or use the cache as a context manager) to flush it to disk.
+
+  Arguments:
+    path : a String (optional). Path to the cache file, if None, the cache
+      is kept in memory only.
+  """
+
+  def __init__(self, path=None):
+    self.path = None if path is None else \
+      os.path.abspath(os.path.expanduser(str(path)))
+    self._lock = threading.Lock()
+    self._modified = False
+    # mapping: path -> (mtime, size, digest)
+    self._cache = {}
+    if self.path is not None and os.path.isfile(self.path):
+      try:
+        with open(self.path, 'rb') as f:
+          cache = dict(pickle.load(f))
+        for key, val in cache.items():
+          # the old format: (path, mtime, size) -> digest
+          if isinstance(key, tuple):
+            key, val = key[0], key[1:] + (val,)
+          self._cache[key] = tuple(val)
+      except Exception:  # corrupted cache, start from scratch
+        self._cache = {}
+
+  def get(self, path, stat=None):
+    stat = os.stat(path) if stat is None else stat
+    with self._lock:
+      entry = self._cache.get(os.path.abspath(path), None)
+    if entry is None or entry[:2] != (stat.st_mtime_ns, stat.st_size):
+      return None
+    return entry[2]
+
+  def set(self, path, digest, stat=None):
+    stat = os.stat(path) if stat is None else stat
+    with self._lock:
+      # the outdated entry of the same file is replaced
+      self._cache[os.path.abspath(path)] = (stat.st_mtime_ns, stat.st_size,
+                                            digest)
+      self._modified = True
+
+  def save(self):
+    if self.path is None or not self._modified:
+      return self
+    with self._lock:
+      folder = os.path.dirname(self.path)
+      if not os.path.exists(folder):
+        os.makedirs(folder)
+      tmp_path = f"{self.path}.{os.getpid()}.tmp"
+      with open(tmp_path, 'wb') as f:
+        pickle.dump(self._cache, f)
+      os.replace(tmp_path, self.path)
+      self._modified = False
+    return self
+
+  def __len__(self):
+    return len(self._cache)
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *args):
+    self.save()
+
+
+def md5_folder(path,
+               chunksize=512 * 1024,
+               base64_encode=False,
+               file_filter=lambda path: True,
+               verbose=False):
+  r""" Calculate md5 checksum of all files in a folder and all its subfolders
+
+  The files are read one after another and the digest is the MD5 of all
+  files' content concatenated in order, see `md5_folder_parallel` for
+  the concurrent (and cached) version.
+  """
+  # a folder (then read all files in order)
+  path = str(path)
+  assert os.path.isdir(path), "'%s' is not path to a folder" % path
+  chunksize = int(chunksize)
+  hash_md5 = hashlib.md5()
+  # ====== get all files ====== #
+  all_files = _list_files(path, file_filter)
   # ====== update the hash ====== #
-  all_files = sorted(files)
   if verbose:
     from tqdm import tqdm
     all_files = tqdm(all_files, desc="MD5 reading files")
   for path in all_files:
-    with open(path, 'rb') as f:
-      for chunk in iter(lambda: f.read(chunksize), b""):
-        hash_md5.update(chunk)
+    _md5_update_file(hash_md5, path, chunksize)
+  # ====== encoding ====== #
+  digest = hash_md5.hexdigest()
+  if base64_encode:
+    digest = base64.urlsafe_b64encode(digest.encode('utf-8')).decode('ascii')
+  return digest
+
+
+def md5_folder_parallel(path,
+                        n_threads=None,
+                        cache=None,
+                        chunksize=512 * 1024,
+                        base64_encode=False,
+                        file_filter=lambda path: True,
+                        verbose=False):
+  r""" Calculate md5 checksum of all files in a folder and all its subfolders,
+  the files are stat-ed and hashed concurrently.
+
+  The digest is the MD5 of the sorted list of `(relative path, file digest)`,
+  hence, it is independent of `n_threads` and `cache` but different from
+  the digest of `md5_folder`.
+
+  Arguments:
+    n_threads : an Integer. Number of hashing threads (MD5 releases the GIL),
+      if None, use the number of CPUs.
+    cache : {None, String, `MD5Cache`}. Path to a persistent cache file or
+      an instance of `MD5Cache`, unchanged files (same path, modification
+      time and size) are never re-read.
+  """
+  path = str(path)
+  assert os.path.isdir(path), "'%s' is not path to a folder" % path
+  chunksize = int(chunksize)
+  if n_threads is None:
+    n_threads = os.cpu_count() or 1
+  n_threads = max(int(n_threads), 1)
+  if cache is not None and not isinstance(cache, MD5Cache):
+    cache = MD5Cache(cache)
+  all_files = _list_files(path, file_filter)
+
+  def _hash(fpath):
+    stat = os.stat(fpath)
+    if cache is not None:
+      digest = cache.get(fpath, stat)
+      if digest is not None:
+        return digest
+    hash_md5 = hashlib.md5()
+    _md5_update_file(hash_md5, fpath, chunksize)
+    digest = hash_md5.hexdigest()
+    if cache is not None:
+      cache.set(fpath, digest, stat)
+    return digest
+
+  if n_threads == 1 or len(all_files) <= 1:
+    digests = map(_hash, all_files)
+  else:
+    pool = ThreadPool(processes=min(n_threads, len(all_files)))
+    digests = pool.imap(_hash, all_files, chunksize=1)
+  if verbose:
+    from tqdm import tqdm
+    digests = tqdm(digests, desc="MD5 reading files", total=len(all_files))
+  hash_md5 = hashlib.md5()
+  try:
+    for fpath, digest in zip(all_files, digests):
+      name = os.path.relpath(fpath, path).replace(os.sep, '/')
+      hash_md5.update(f"{name}\0{digest}\n".encode('utf-8'))
+  finally:
+    if n_threads > 1 and len(all_files) > 1:
+      pool.close()
+      pool.join()
+  if cache is not None:
+    cache.save()
   # ====== encoding ====== #
   digest = hash_md5.hexdigest()
   if base64_encode:
@@ -160,27 +359,24 @@ def md5_checksum(file_or_path,
    all(isinstance(i, (np.ndarray, Number, str, bool)) for i in file_or_path)):
     if not isinstance(file_or_path, (tuple, list)):
       file_or_path = (file_or_path,)
-    # copy data
-    f = BytesIO()
+    # hash directly from the array buffer, no copy
     for arr in file_or_path:
-      if hasattr(arr, 'tobytes'):
-        f.write(arr.tobytes())
+      if isinstance(arr, np.ndarray):
+        _md5_update_array(hash_md5, arr, chunksize)
+      # numpy scalar
+      elif isinstance(arr, np.generic):
+        hash_md5.update(arr.tobytes())
       else:
+        f = BytesIO()
         np.save(file=f, arr=arr, allow_pickle=False)
-    f.seek(0)
-    # update hash
-    for chunk in iter(lambda: f.read(chunksize), b""):
-      hash_md5.update(chunk)
-    f.close()
+        hash_md5.update(f.getbuffer())
+        f.close()
   # ======  path to file or folder ====== #
   elif isinstance(file_or_path, string_types):
     # TODO: sometimes the folder or file "accidently" exists
     # a file
     if os.path.isfile(file_or_path):
-      f = open(file_or_path, 'rb')
-      for chunk in iter(lambda: f.read(chunksize), b""):
-        hash_md5.update(chunk)
-      f.close()
+      _md5_update_file(hash_md5, file_or_path, chunksize)
     # just string or text
     else:
       hash_md5.update(file_or_path.encode('utf-8'))
@@ -194,15 +390,26 @@ def md5_checksum(file_or_path,
       hash_md5.update(chunk)
   # ====== special case big custom array with shape attribute ====== #
   elif hasattr(file_or_path, 'shape'):
+    # COO matrix is hashed as its dense version (block of rows at a time)
     if isinstance(file_or_path, sp.sparse.coo_matrix):
-      file_or_path = file_or_path.todense()
-    itemsize = np.dtype(file_or_path.dtype).itemsize
-    batch_size = int(
-        max(chunksize // (itemsize * np.prod(file_or_path.shape[1:])), 8))
-    indices = range(0, file_or_path.shape[0] + batch_size, batch_size)
-    for start, end in zip(indices, indices[1:]):
-      x = file_or_path[start:end].tobytes()
-      hash_md5.update(x)
+      file_or_path = file_or_path.tocsr()
+      row_size = max(file_or_path.dtype.itemsize * file_or_path.shape[1], 1)
+      batch_size = max(chunksize // row_size, 8)
+      for start in range(0, file_or_path.shape[0], batch_size):
+        _md5_update_array(hash_md5,
+                          file_or_path[start:start + batch_size].toarray(),
+                          chunksize)
+    # other sparse matrices are hashed from their compressed components
+    elif sp.sparse.issparse(file_or_path):
+      _md5_update_sparse(hash_md5, file_or_path, chunksize)
+    else:
+      itemsize = np.dtype(file_or_path.dtype).itemsize
+      batch_size = int(
+          max(chunksize // (itemsize * np.prod(file_or_path.shape[1:])), 8))
+      for start in range(0, file_or_path.shape[0], batch_size):
+        _md5_update_array(hash_md5,
+                          np.asarray(file_or_path[start:start + batch_size]),
+                          chunksize)
   # ====== NO support ====== #
   else:
     raise ValueError(f"MD5 checksum has NO support for input: {file_or_path} "
@@ -6,6 +6,7 @@ from __future__ import print_function, division, absolute_import
 
 import sys
 import time
+import random
 import inspect
 from numbers import Number
 from datetime import datetime
@@ -81,8 +82,62 @@ class _FuncWrap(object):
     import dill
     self.func = dill.loads(states)
 
-def _default_dict_list_creator():
-  return defaultdict(list)
+class RunningStats(object):
+  """ Bounded-memory history of a reported key within one epoch: the count,
+  running mean, min and max of numbers, the running sum of numpy arrays,
+  the last value, and a uniform reservoir sample of at most
+  `reservoir_size` values (Vitter's algorithm R).
+  """
+
+  def __init__(self, reservoir_size=128):
+    self.reservoir_size = int(reservoir_size)
+    self.count = 0
+    self.total = None
+    self.min = None
+    self.max = None
+    self.last = None
+    self.sample = []
+
+  def add(self, value, rand=random):
+    self.count += 1
+    self.last = value
+    # accumulate the floating point values in float64, the reported values
+    # are often float32 (e.g. from tensorflow)
+    if isinstance(value, Number):
+      x = float(value) if isinstance(value, (float, np.floating)) else value
+      self.total = x if self.total is None else self.total + x
+      self.min = value if self.min is None else min(self.min, value)
+      self.max = value if self.max is None else max(self.max, value)
+    elif isinstance(value, np.ndarray):
+      if self.total is None:
+        self.total = np.array(
+            value,
+            dtype=np.float64 if np.issubdtype(value.dtype, np.floating) else
+            None)
+      else:
+        self.total = self.total + value
+    # reservoir sampling
+    if len(self.sample) < self.reservoir_size:
+      self.sample.append(value)
+    elif self.reservoir_size > 0:
+      i = rand.randrange(self.count)
+      if i < self.reservoir_size:
+        self.sample[i] = value
+    return self
+
+  @property
+  def mean(self):
+    if self.total is None or self.count == 0:
+      return None
+    return self.total / self.count
+
+  def __len__(self):
+    return self.count
+
+  def __repr__(self):
+    return "<RunningStats count:%d mean:%s min:%s max:%s sample:%d>" % \
+      (self.count, str(self.mean), str(self.min), str(self.max),
+       len(self.sample))
 
 # ===========================================================================
 # Progress bar
@@ -125,6 +180,15 @@ class Progbar(object):
   name: str or None
       specific name for the progress bar
 
+  reservoir_size: int
+      the history of each reported key is kept as running aggregates
+      (see `RunningStats`) with a uniform sample of at most this number of
+      values, `0` to disable the sampling.
+
+  max_overhead: float
+      maximum fraction of the loop time spent on rendering the report,
+      the report is redrawn less frequently if rendering is slow.
+
   Examples
   --------
   >>> import numpy as np
@@ -139,13 +203,17 @@ class Progbar(object):
       * any report key contain "confusionmatrix" will be printed out using
       `print_confusion`
       * any report key
+      * the summarizer of a key (see `set_summarizer`) receives the
+      `RunningStats` of the epoch, i.e. `stats.last` is the latest reported
+      value, `stats.sample` is only a uniform sample of at most
+      `reservoir_size` values
   """
   FP = sys.stderr
 
   def __init__(self, target, interval=0.08, keep=False,
                print_progress=True, print_report=True, print_summary=False,
                count_func=None, report_func=None, progress_func=None,
-               name=None):
+               name=None, reservoir_size=128, max_overhead=0.05):
     self.__pb = None # tqdm object
     if isinstance(target, Number):
       self.target = int(target)
@@ -175,10 +243,14 @@ class Progbar(object):
     self._report = OrderedDict()
     self._last_report = None
     self._last_print_time = None
+    self._render_time = 0.
+    self._max_overhead = float(max_overhead)
     self._epoch_summarizer_func = {}
     # ====== recording history ====== #
-    # dictonary: {epoch_id: {key: [value1, value2, ...]}}
-    self._epoch_hist = defaultdict(_default_dict_list_creator)
+    # dictonary: {epoch_id: {key: RunningStats}}
+    self._reservoir_size = int(reservoir_size)
+    self._rand = random.Random(8)
+    self._epoch_hist = defaultdict(dict)
     self._epoch_summary = defaultdict(dict)
     self._epoch_idx = 0
     self._epoch_start_time = None
@@ -203,7 +275,10 @@ class Progbar(object):
     return self._report.__getitem__(key)
 
   def __setitem__(self, key, val):
-    self._epoch_hist[self.epoch_idx][key].append(val)
+    hist = self._epoch_hist[self.epoch_idx]
+    if key not in hist:
+      hist[key] = RunningStats(self._reservoir_size)
+    hist[key].add(val, self._rand)
     return self._report.__setitem__(key, val)
 
   def __delitem__(self, key):
@@ -247,19 +322,19 @@ class Progbar(object):
   def history(self):
     """ Return
     dictonary:
-      {epoch_id : {tensor_name0: [batch_return1, batch_return2, ...],
-                   tensor_name1: [batch_return1, batch_return2, ...],
+      {epoch_id : {tensor_name0: RunningStats,
+                   tensor_name1: RunningStats,
                    ...},
-       1 : {tensor_name0: [batch_return1, batch_return2, ...],
-                  tensor_name1: [batch_return1, batch_return2, ...],
-                  ...},
+       1 : {tensor_name0: RunningStats,
+            tensor_name1: RunningStats,
+            ...},
        ... }
 
     Example
     -------
     >>> for epoch_id, results in task.history.items():
-    >>>   for tensor_name, values in results.items():
-    >>>     print(tensor_name, len(values))
+    >>>   for tensor_name, stats in results.items():
+    >>>     print(tensor_name, stats.count, stats.mean, stats.sample)
     """
     return self._epoch_hist
 
@@ -274,8 +349,15 @@ class Progbar(object):
     report for given key, and summarize all the stored values
     of each epoch into a readable format
 
-    i.e. the input arguments is a list of stored epoch report,
-    the output is a string.
+    i.e. the input argument is the `RunningStats` of the key for the epoch
+    (with the exact `count`, `total`, `mean`, `min`, `max` and `last`
+    value), the output is a string.
+
+    Note
+    ----
+    Only a uniform sample of at most `reservoir_size` values is kept per
+    epoch in `RunningStats.sample`, it is not in the reported order, use
+    `stats.last` for the latest value (e.g. `fn=lambda x: x.last`).
     """
     if not hasattr(fn, '__call__'):
       raise ValueError('`fn` must be call-able.')
@@ -414,17 +496,17 @@ class Progbar(object):
       self.__pb.moveto(-(nlines * 2))
     self.__pb.close()
     # ====== create epoch summary ====== #
-    for key, values in self._epoch_hist[self._epoch_idx].items():
-      values = [v for v in values]
+    for key, stats in self._epoch_hist[self._epoch_idx].items():
       # provided summarizer function
       if key in self._epoch_summarizer_func:
-        self._epoch_summary[self._epoch_idx][key] = self._epoch_summarizer_func[key](values)
+        self._epoch_summary[self._epoch_idx][key] = \
+          self._epoch_summarizer_func[key](stats)
       # very heuristic way to deal with sequence of numbers
-      elif isinstance(values[0], Number):
-        self._epoch_summary[self._epoch_idx][key] = np.mean(values)
+      elif isinstance(stats.last, Number):
+        self._epoch_summary[self._epoch_idx][key] = stats.mean
       # numpy array
-      elif isinstance(values[0], np.ndarray):
-        self._epoch_summary[self._epoch_idx][key] = sum(v for v in values)
+      elif isinstance(stats.last, np.ndarray):
+        self._epoch_summary[self._epoch_idx][key] = stats.total
     # total epoch time
     total_time = time.time() - self._epoch_start_time
     self._epoch_summary[self._epoch_idx]['__total_time__'] = total_time
@@ -497,11 +579,13 @@ class Progbar(object):
     # ====== show report ====== #
     if self.print_report:
       curr_time = time.time()
-      # update the report
+      # update the report, rate-limited so the rendering takes at most
+      # `max_overhead` fraction of the loop time
+      min_interval = self.__interval if self._max_overhead <= 0 else \
+        max(self.__interval, self._render_time / self._max_overhead)
       if self._last_print_time is None or \
-      time.time() - self._last_print_time > self.__interval or\
+      curr_time - self._last_print_time > min_interval or\
       seen_so_far >= self.target:
-        self._last_print_time = curr_time
         # move the cursor to last point
         if self._last_report is not None:
           nlines = len(self._last_report.split('\n'))
@@ -520,6 +604,8 @@ class Progbar(object):
         fp.flush()
         self._last_report = report
         self.progress_bar.moveto(1)
+        self._last_print_time = time.time()
+        self._render_time = self._last_print_time - curr_time
     # ====== show progress ====== #
     if self.print_progress:
       self.progress_bar.update(n=n)
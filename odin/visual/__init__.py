@@ -1,4 +1,4 @@
 from odin.visual.animation import *
-from odin.visual.base import Visualizer
+from odin.visual.base import FigureExport, Visualizer, export_figures
 from odin.visual.bashplot import *
 from odin.visual.figures import *
@@ -1,14 +1,140 @@
 from __future__ import absolute_import, division, print_function
 
 import os
+import sys
+import threading
 from collections import defaultdict
-from typing import Dict, Text
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
+from typing import Dict, List, Optional, Sequence, Text, Tuple
 
 from matplotlib import pyplot as plt
 
 _FIGURE_LIST = defaultdict(dict)
 _FIGURE_COUNT = defaultdict(lambda: defaultdict(int))
 
+# ===========================================================================
+# Figure export queue
+# ===========================================================================
+_EXPORT_POOL = None
+_EXPORT_LOCK = threading.Lock()
+
+
+def _export_pool() -> ThreadPool:
+  global _EXPORT_POOL
+  with _EXPORT_LOCK:
+    if _EXPORT_POOL is None:
+      _EXPORT_POOL = ThreadPool(processes=max(1, min(8, cpu_count())))
+  return _EXPORT_POOL
+
+
+def _savefig(fig, out, **kwargs):
+  # render on a temporary Agg canvas, so different figures could be
+  # rasterized in worker threads without touching the (possibly interactive)
+  # canvas of the figure, its canvas is restored once saved.
+  # Note: Agg holds the GIL while rasterizing, the workers mostly overlap
+  # the compression and file I/O, and free the calling thread.
+  from matplotlib.backends.backend_agg import FigureCanvasAgg
+  canvas = fig.canvas
+  if isinstance(canvas, FigureCanvasAgg):
+    return fig.savefig(out, **kwargs)
+  try:
+    FigureCanvasAgg(fig).print_figure(out, **kwargs)
+  finally:
+    fig.set_canvas(canvas)
+
+
+def _render_figure(fig, out, name, verbose, kwargs):
+  try:
+    _savefig(fig, out, **kwargs)
+    if verbose:
+      print(f" - Saved '{name}' to {out}")
+  except Exception as e:
+    sys.stderr.write(f"Cannot save figure '{name}', error:{str(e)}\n")
+    out = None
+  return [] if out is None else [out]
+
+
+def _render_pdf(figures, path, verbose, kwargs):
+  from matplotlib.backends.backend_pdf import PdfPages
+  pp = PdfPages(path)
+  for name, fig in figures:
+    try:
+      _savefig(fig, pp, format='pdf', **kwargs)
+      if verbose:
+        print(f" - Saved '{name}' to pdf file")
+    except Exception as e:
+      sys.stderr.write(f"Cannot save figure '{name}' to pdf, "
+                       f"error:{str(e)}\n")
+  pp.close()
+  return [path]
+
+
+class FigureExport(object):
+  r""" The future of a figure export, see `export_figures` """
+
+  def __init__(self, results):
+    self._results = list(results)
+
+  def ready(self) -> bool:
+    return all(r.ready() for r in self._results)
+
+  def wait(self, timeout: Optional[float] = None) -> 'FigureExport':
+    for r in self._results:
+      r.wait(timeout)
+    return self
+
+  def result(self, timeout: Optional[float] = None) -> List[str]:
+    r""" Block until all figures are saved, return the saved paths """
+    return sum([r.get(timeout) for r in self._results], [])
+
+
+def export_figures(figures: Sequence[Tuple[str, plt.Figure]],
+                   path: Optional[str] = None,
+                   outputs: Optional[Sequence[str]] = None,
+                   close: bool = True,
+                   background: bool = False,
+                   verbose: bool = False,
+                   **kwargs) -> FigureExport:
+  r""" Render and save the figures in the worker threads of the export queue
+
+  Arguments:
+    figures : list of tuple `(name, figure)`
+    path : a String (optional). Path to a pdf file, all figures are saved
+      as the pages of the pdf (rendered sequentially by a single worker).
+    outputs : list of String (optional). Path to the separated output file of
+      each figure, the figures are rendered in parallel.
+    close : close the figures, they are detached from pyplot on the calling
+      thread when the export is queued (pyplot is not thread-safe), the
+      closed figures are still rendered by the workers
+    background : if True, return immediately, otherwise, wait until all
+      figures are saved
+    kwargs : keyword arguments for `Figure.savefig`
+
+  Return:
+    `FigureExport`, the future of the saved paths
+  """
+  figures = list(figures)
+  if close:
+    for _, fig in figures:
+      plt.close(fig)
+  pool = _export_pool()
+  if path is not None:
+    results = [
+        pool.apply_async(_render_pdf, (figures, path, verbose, kwargs))
+    ]
+  else:
+    assert outputs is not None and len(outputs) == len(figures), \
+      "Require an output path for each figure"
+    results = [
+        pool.apply_async(_render_figure, (fig, out, name, verbose, kwargs))
+        for (name, fig), out in zip(figures, outputs)
+    ]
+  export = FigureExport(results)
+  if not background:
+    export.wait()
+  return export
+
 
 class Visualizer(object):
   r""" Visualizer """
@@ -46,6 +172,7 @@ class Visualizer(object):
                    dpi: int = 100,
                    separate_files: bool = True,
                    clear_figures: bool = True,
+                   background: bool = False,
                    verbose: bool = False) -> 'Visualizer':
     r""" Saving all stored figures to path
 
@@ -56,11 +183,12 @@ class Visualizer(object):
       dpi : dot-per-inch
       separate_files : save each figure in separated file
       clear_figures : remove and close all stored figures
+      background : if True, the figures are rendered by the worker threads of
+        the export queue while the caller continues, and return the
+        `FigureExport` future instead of the Visualizer. The stored
+        figures shouldn't be modified until the export is done.
       verbose : print out the log
     """
-    from matplotlib import pyplot as plt
-    from odin.utils import ctext
-
     # checking arguments
     if os.path.isfile(path) or '.pdf' == path[-4:].lower():
       separate_files = False
@@ -69,7 +197,7 @@ class Visualizer(object):
     figures = _FIGURE_LIST[id(self)]
     n_figures = len(figures)
     if n_figures == 0:
-      return self
+      return FigureExport([]) if background else self
     # ====== saving PDF file ====== #
     if verbose:
       print(f"Saving {n_figures} figures to: {path}")
@@ -78,18 +206,13 @@ class Visualizer(object):
         dpi = 48
       if '.pdf' not in path:
         path = path + '.pdf'
-      from matplotlib.backends.backend_pdf import PdfPages
-      pp = PdfPages(path)
-      for key, fig in figures.items():
-        try:
-          fig.savefig(pp, dpi=dpi, format='pdf', bbox_inches="tight")
-          if verbose:
-            print(" - Saved '%s' to pdf file" % ctext(key, 'cyan'))
-        except Exception as e:
-          if verbose:
-            print(" - Error '%s'" % ctext(key, 'cyan'))
-            print("  ", e)
-      pp.close()
+      export = export_figures(list(figures.items()),
+                              path=path,
+                              close=clear_figures,
+                              background=background,
+                              verbose=verbose,
+                              dpi=dpi,
+                              bbox_inches="tight")
     # ====== saving PNG file ====== #
     else:
       if dpi is None:
@@ -97,21 +220,15 @@ class Visualizer(object):
       if not os.path.exists(path):
         os.mkdir(path)
       assert os.path.isdir(path), "'%s' must be path to a folder" % path
-      kwargs = dict(dpi=dpi, bbox_inches="tight")
-      for key, fig in figures.items():
-        out_path = os.path.join(path, key + '.png')
-        try:
-          fig.savefig(out_path, **kwargs)
-          if verbose:
-            print(" - Saved '%s' to %s" %
-                  (ctext(key, 'cyan'), ctext(out_path, 'yellow')))
-        except Exception as e:
-          if verbose:
-            print(" - Error '%s'" % ctext(key, 'cyan'))
-            print("  ", e)
+      export = export_figures(
+          list(figures.items()),
+          outputs=[os.path.join(path, key + '.png') for key in figures],
+          close=clear_figures,
+          background=background,
+          verbose=verbose,
+          dpi=dpi,
+          bbox_inches="tight")
     # ====== clear figures ====== #
     if clear_figures:
-      for fig in figures.values():
-        plt.close(fig)
       figures.clear()
-    return self
+    return export if background else self
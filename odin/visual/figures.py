@@ -1263,19 +1263,42 @@ def plot_close():
   plt.close('all')
 
 
-def plot_to_image(figure: plt.Figure,
+def _figure_to_png(figure, dpi):
+  from odin.visual.base import _savefig
+  buf = io.BytesIO()
+  _savefig(figure, buf, format='png', dpi=dpi)
+  return buf.getvalue()
+
+
+def plot_to_image(figure: Union[plt.Figure, List[plt.Figure]],
                   close_figure: bool = True,
                   dpi: int = 150):
-  """Convert the figure to png image for tensorboard"""
-  # Save the plot to a PNG in memory.
-  buf = io.BytesIO()
-  figure.savefig(buf, format='png', dpi=dpi)
-  # Closing the figure prevents it from being displayed directly inside
-  # the notebook.
-  plt.close(figure)
-  buf.seek(0)
+  """Convert the figure to png image for tensorboard
+
+  If a list of figures is given, they are rasterized in parallel by the
+  export queue, and returned as a single batch `[n_figures, height, width, 4]`
+  (zero padded to the largest figure) for one image summary.
+  """
+  if isinstance(figure, (tuple, list)):
+    from odin.visual.base import _export_pool
+    pngs = _export_pool().starmap(_figure_to_png,
+                                  [(fig, dpi) for fig in figure])
+    # Closing the figure prevents it from being displayed directly inside
+    # the notebook (closed here, pyplot is not thread-safe).
+    if close_figure:
+      for fig in figure:
+        plt.close(fig)
+    images = [tf.image.decode_png(png, channels=4) for png in pngs]
+    height = max(int(i.shape[0]) for i in images)
+    width = max(int(i.shape[1]) for i in images)
+    return tf.stack([
+        tf.image.pad_to_bounding_box(i, 0, 0, height, width) for i in images
+    ],
+                    axis=0)
   # Convert PNG buffer to TF image
-  image = tf.image.decode_png(buf.getvalue(), channels=4)
+  image = tf.image.decode_png(_figure_to_png(figure, dpi), channels=4)
+  if close_figure:
+    plt.close(figure)
   # Add the batch dimension
   image = tf.expand_dims(image, 0)
   return image
@@ -1287,52 +1310,57 @@ def plot_save(path: str = '/tmp/tmp.pdf',
               tight_plot: bool = False,
               clear_all: bool = True,
               verbose: bool = False,
-              transparent: bool = False):
+              transparent: bool = False,
+              background: bool = False):
   """
   Parameters
   ----------
   clear_all: bool
       if True, remove all saved figures from current figure list
       in matplotlib
+  background: bool
+      if True, the figures are rendered by the worker threads of the export
+      queue while the caller continues, return the `FigureExport` future
+      of the saved paths
   """
+  from odin.visual.base import export_figures
   if tight_plot:
     plt.tight_layout()
   if os.path.exists(path) and os.path.isfile(path):
     os.remove(path)
   if figs is None:
     figs = [plt.figure(n) for n in plt.get_fignums()]
+  figs = [(str(idx), fig) for idx, fig in enumerate(figs)]
   # ====== saving PDF file ====== #
   if '.pdf' in path.lower():
-    saved_path = [path]
-    try:
-      from matplotlib.backends.backend_pdf import PdfPages
-      pp = PdfPages(path)
-      for fig in figs:
-        fig.savefig(pp,
-                    dpi=dpi,
-                    transparent=transparent,
-                    format='pdf',
-                    bbox_inches="tight")
-      pp.close()
-    except Exception as e:
-      sys.stderr.write(f'Cannot save figures to pdf, error:{str(e)}\n')
+    export = export_figures(figs,
+                            path=path,
+                            close=clear_all,
+                            background=background,
+                            dpi=dpi,
+                            transparent=transparent,
+                            bbox_inches="tight")
   # ====== saving PNG file ====== #
   else:
-    saved_path = []
     path = os.path.splitext(path)
     ext = path[-1][1:].lower()
     path = path[0]
-    kwargs = dict(dpi=dpi, bbox_inches="tight")
-    for idx, fig in enumerate(figs):
-      if len(figs) > 1:
-        out_path = path + (f'{idx}') + ext
-      else:
-        out_path = path + '.' + ext
-      fig.savefig(out_path, transparent=transparent, **kwargs)
-      saved_path.append(out_path)
+    if len(figs) > 1:
+      outputs = [path + f'{idx}.' + ext for idx in range(len(figs))]
+    else:
+      outputs = [path + '.' + ext]
+    export = export_figures(figs,
+                            outputs=outputs,
+                            close=clear_all,
+                            background=background,
+                            dpi=dpi,
+                            transparent=transparent,
+                            bbox_inches="tight")
   # ====== clean ====== #
+  if background:
+    return export
   if verbose:
-    sys.stdout.write(f"Saved figures to:{', '.join(saved_path)} \n")
+    sys.stdout.write(f"Saved figures to:{', '.join(export.result())} \n")
   if clear_all:
     plt.close('all')
 
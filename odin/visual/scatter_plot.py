@@ -179,6 +179,87 @@ def _downsample_scatter_points(x, y, z, max_n_points, *args):
   return [len(x), x, y, z] + args
 
 
+def _centroid_style(fontsize):
+  return dict(horizontalalignment='center',
+              verticalalignment='center',
+              fontsize=fontsize + 2,
+              weight="bold",
+              bbox=dict(boxstyle="circle",
+                        facecolor="black",
+                        alpha=0.48,
+                        pad=0.,
+                        edgecolor='none'))
+
+
+def _add_colorbar(ax, cmap, color_normalizer, vmin, vmax, cbar_horizontal,
+                  cbar_nticks, cbar_ticks_rotation, cbar_title, cbar_fontsize):
+  from matplotlib import pyplot as plt
+  mappable = plt.cm.ScalarMappable(norm=color_normalizer, cmap=cmap)
+  mappable.set_clim(vmin, vmax)
+  cba = plt.colorbar(
+      mappable,
+      ax=ax,
+      shrink=0.99,
+      pad=0.01,
+      orientation='horizontal' if cbar_horizontal else 'vertical')
+  if isinstance(cbar_nticks, Number):
+    cbar_range = np.linspace(vmin, vmax, num=int(cbar_nticks))
+    cbar_nticks = [f'{i:.2g}' for i in cbar_range]
+  elif isinstance(cbar_nticks, (tuple, list, np.ndarray)):
+    cbar_range = np.linspace(vmin, vmax, num=len(cbar_nticks))
+    cbar_nticks = [str(i) for i in cbar_nticks]
+  else:
+    raise ValueError(f"No support for cbar_nticks='{cbar_nticks}'")
+  cba.set_ticks(cbar_range)
+  cba.set_ticklabels(cbar_nticks)
+  if cbar_title is not None:
+    if cbar_horizontal:  # horizontal colorbar
+      cba.ax.set_xlabel(str(cbar_title), fontsize=cbar_fontsize)
+    else:  # vertical colorbar
+      cba.ax.set_ylabel(str(cbar_title), fontsize=cbar_fontsize)
+  cba.ax.tick_params(labelsize=cbar_fontsize,
+                     labelrotation=cbar_ticks_rotation)
+  return cba
+
+
+def _add_legend(ax, artist, legend_name, markerscale, legend_loc, legend_ncol,
+                legend_colspace, fontsize):
+  # sort the legends
+  legend_name, artist = zip(*sorted(zip(legend_name, artist),
+                                    key=lambda t: t[0]))
+  return ax.legend(artist,
+                   legend_name,
+                   markerscale=markerscale,
+                   scatterpoints=1,
+                   scatteryoffsets=[0.375, 0.5, 0.3125],
+                   loc=legend_loc,
+                   bbox_to_anchor=(0.5, -0.01),
+                   ncol=int(legend_ncol),
+                   columnspacing=float(legend_colspace),
+                   labelspacing=0.,
+                   fontsize=fontsize,
+                   handletextpad=0.1)
+
+
+def _configure_axis(ax, ticks_off, grid, xlabel, ylabel, title, fontsize,
+                    is_3D_mode, elev, azim):
+  if ticks_off:
+    ax.set_xticklabels([])
+    ax.set_yticklabels([])
+    if is_3D_mode:
+      ax.set_zticklabels([])
+  ax.grid(grid)
+  if xlabel is not None:
+    ax.set_xlabel(str(xlabel), fontsize=fontsize - 1)
+  if ylabel is not None:
+    ax.set_ylabel(str(ylabel), fontsize=fontsize - 1)
+  if title is not None:
+    ax.set_title(str(title), fontsize=fontsize, fontweight='regular')
+  if is_3D_mode and (elev is not None or azim is not None):
+    ax.view_init(elev=ax.elev if elev is None else elev,
+                 azim=ax.azim if azim is None else azim)
+
+
 def _plot_scatter_points(*, x, y, z, val, color, marker, size, size_range,
                          alpha, max_n_points, cbar, cbar_horizontal,
                          cbar_nticks, cbar_ticks_rotation, cbar_title,
@@ -223,15 +304,7 @@ def _plot_scatter_points(*, x, y, z, val, color, marker, size, size_range,
       is_colormap=is_colormap,
       size_range=size_range)
   ### centroid style
-  centroid_style = dict(horizontalalignment='center',
-                        verticalalignment='center',
-                        fontsize=fontsize + 2,
-                        weight="bold",
-                        bbox=dict(boxstyle="circle",
-                                  facecolor="black",
-                                  alpha=0.48,
-                                  pad=0.,
-                                  edgecolor='none'))
+  centroid_style = _centroid_style(fontsize)
   ### plotting
   artist = []
   legend_name = []
@@ -291,31 +364,9 @@ def _plot_scatter_points(*, x, y, z, val, color, marker, size, size_range,
   if len(artist) == len(legend):
     ## colorbar (only enable when colormap is provided)
     if is_colormap and cbar:
-      mappable = plt.cm.ScalarMappable(norm=color_normalizer, cmap=cm)
-      mappable.set_clim(vmin, vmax)
-      cba = plt.colorbar(
-          mappable,
-          ax=ax,
-          shrink=0.99,
-          pad=0.01,
-          orientation='horizontal' if cbar_horizontal else 'vertical')
-      if isinstance(cbar_nticks, Number):
-        cbar_range = np.linspace(vmin, vmax, num=int(cbar_nticks))
-        cbar_nticks = [f'{i:.2g}' for i in cbar_range]
-      elif isinstance(cbar_nticks, (tuple, list, np.ndarray)):
-        cbar_range = np.linspace(vmin, vmax, num=len(cbar_nticks))
-        cbar_nticks = [str(i) for i in cbar_nticks]
-      else:
-        raise ValueError(f"No support for cbar_nticks='{cbar_nticks}'")
-      cba.set_ticks(cbar_range)
-      cba.set_ticklabels(cbar_nticks)
-      if cbar_title is not None:
-        if cbar_horizontal:  # horizontal colorbar
-          cba.ax.set_xlabel(str(cbar_title), fontsize=cbar_fontsize)
-        else:  # vertical colorbar
-          cba.ax.set_ylabel(str(cbar_title), fontsize=cbar_fontsize)
-      cba.ax.tick_params(labelsize=cbar_fontsize,
-                         labelrotation=cbar_ticks_rotation)
+      _add_colorbar(ax, cm, color_normalizer, vmin, vmax, cbar_horizontal,
+                    cbar_nticks, cbar_ticks_rotation, cbar_title,
+                    cbar_fontsize)
     ## plot the legend
     if len(legend_name) > 0 and bool(legend_enable):
       markerscale = 1.5
@@ -330,37 +381,114 @@ def _plot_scatter_points(*, x, y, z, val, color, marker, size, size_range,
             c = art._color
           artist[i] = ax.scatter(*pos, c=c, s=0.1)
           markerscale = 25
-      # sort the legends
-      legend_name, artist = zip(
-          *sorted(zip(legend_name, artist), key=lambda t: t[0]))
-      legend = ax.legend(artist,
-                         legend_name,
-                         markerscale=markerscale,
-                         scatterpoints=1,
-                         scatteryoffsets=[0.375, 0.5, 0.3125],
-                         loc=legend_loc,
-                         bbox_to_anchor=(0.5, -0.01),
-                         ncol=int(legend_ncol),
-                         columnspacing=float(legend_colspace),
-                         labelspacing=0.,
-                         fontsize=fontsize,
-                         handletextpad=0.1)
+      _add_legend(ax, artist, legend_name, markerscale, legend_loc,
+                  legend_ncol, legend_colspace, fontsize)
     ## tick configuration
-    if ticks_off:
-      ax.set_xticklabels([])
-      ax.set_yticklabels([])
-      if is_3D_mode:
-        ax.set_zticklabels([])
-    ax.grid(grid)
-    if xlabel is not None:
-      ax.set_xlabel(str(xlabel), fontsize=fontsize - 1)
-    if ylabel is not None:
-      ax.set_ylabel(str(ylabel), fontsize=fontsize - 1)
-    if title is not None:
-      ax.set_title(str(title), fontsize=fontsize, fontweight='regular')
-    if is_3D_mode and (elev is not None or azim is not None):
-      ax.view_init(elev=ax.elev if elev is None else elev,
-                   azim=ax.azim if azim is None else azim)
+    _configure_axis(ax, ticks_off, grid, xlabel, ylabel, title, fontsize,
+                    is_3D_mode, elev, azim)
+
+
+def _plot_scatter_density(*, x, y, z, val, color, marker, size, alpha,
+                          density, cbar, cbar_horizontal, cbar_nticks,
+                          cbar_ticks_rotation, cbar_title, cbar_fontsize,
+                          legend_enable, legend_loc, legend_ncol,
+                          legend_colspace, ticks_off, grid, fontsize,
+                          centroids, xlabel, ylabel, title, ax, **kwargs):
+  r""" Rasterized scatter plot: the points are binned into an image buffer
+  with vectorized NumPy and the opacity increases with the (log) number of
+  points, so the render time barely depends on the number of points.
+
+  The color of a pixel is the average of `val` mapped through the colormap,
+  or, for categorical `color`, the color of the category with the most
+  points in that pixel (colors are never blended across categories).
+  """
+  from matplotlib import pyplot as plt
+  import matplotlib as mpl
+  from matplotlib.colors import to_rgb
+  x, y, z = _parse_scatterXYZ(x, y, z)
+  if z is not None:
+    raise ValueError("Density scatter plot only support 2D points")
+  x = np.asarray(x, dtype=np.float64)
+  y = np.asarray(y, dtype=np.float64)
+  assert len(x) == len(y), "Number of samples mismatch"
+  ax = to_axis(ax, False)
+  resolution = 512 if isinstance(density, bool) else int(density)
+  ### pixel index of every point
+  extent = []
+  pixels = []
+  for v in (x, y):
+    vmin, vmax = np.min(v), np.max(v)
+    if vmax - vmin < 1e-12:
+      vmin, vmax = vmin - 0.5, vmax + 0.5
+    extent += [vmin, vmax]
+    pixels.append(
+        np.minimum(((v - vmin) / (vmax - vmin) * resolution).astype(np.int64),
+                   resolution - 1))
+  pixels = pixels[1] * resolution + pixels[0]
+  n_pixels = resolution * resolution
+  counts = np.bincount(pixels, minlength=n_pixels).astype(np.float64)
+  norm = np.maximum(counts, 1.)[:, None]
+  ### color of every pixel
+  codes, labels, class_colors = None, None, None
+  if val is not None:
+    val = np.asarray(val, dtype=np.float64).ravel()
+    vmin, vmax = np.min(val), np.max(val)
+    color_normalizer = mpl.colors.Normalize(vmin=vmin, vmax=vmax)
+    cmap = plt.cm.get_cmap(color)
+    mean_val = np.bincount(pixels, weights=val, minlength=n_pixels) / norm[:, 0]
+    rgb = cmap(color_normalizer(mean_val))[:, :3]
+  elif isinstance(color, string_types) or color is None:
+    color = 'b' if color in (None, 'bwr') else color
+    rgb = np.tile(np.asarray(to_rgb(color)), (n_pixels, 1))
+  else:
+    labels, codes = np.unique(np.asarray(color), return_inverse=True)
+    if len(labels) == 1:
+      palette = ['b']
+    else:
+      palette = generate_palette_colors(len(labels), seed=1)
+    class_colors = np.array([to_rgb(c) for c in palette])
+    # one count buffer per category, each pixel takes the color of its
+    # majority category (ties go to the first label), so every pixel color
+    # is one of the legend colors
+    class_counts = np.bincount(codes * n_pixels + pixels,
+                               minlength=len(labels) * n_pixels)
+    class_counts = np.reshape(class_counts, (len(labels), n_pixels))
+    rgb = class_colors[np.argmax(class_counts, axis=0)]
+  ### opacity from the log density
+  opacity = np.log1p(counts) / np.log1p(max(np.max(counts), 1.))
+  opacity = np.where(counts > 0, alpha * (0.3 + 0.7 * opacity), 0.)
+  image = np.concatenate([rgb, opacity[:, None]], axis=-1)
+  image = np.reshape(image, (resolution, resolution, 4))
+  ax.imshow(image,
+            origin='lower',
+            extent=extent,
+            aspect='auto',
+            interpolation='nearest')
+  ### centroids and legends of the categories
+  if codes is not None:
+    n_points = np.bincount(codes, minlength=len(labels))
+    cx = np.bincount(codes, weights=x, minlength=len(labels)) / n_points
+    cy = np.bincount(codes, weights=y, minlength=len(labels)) / n_points
+    if centroids:
+      style = _centroid_style(fontsize)
+      for name, c, a, b in zip(labels, class_colors, cx, cy):
+        ax.text(a, b, s=str(name), color=c, **style)
+    if bool(legend_enable):
+      artist = [
+          ax.scatter([], [],
+                     c=[c],
+                     marker=marker if isinstance(marker, string_types) else 'o',
+                     s=size if isinstance(size, Number) else 25.)
+          for c in class_colors
+      ]
+      _add_legend(ax, artist, [str(i) for i in labels], 1.5, legend_loc,
+                  legend_ncol, legend_colspace, fontsize)
+  elif val is not None and cbar:
+    _add_colorbar(ax, cmap, color_normalizer, vmin, vmax, cbar_horizontal,
+                  cbar_nticks, cbar_ticks_rotation, cbar_title, cbar_fontsize)
+  _configure_axis(ax, ticks_off, grid, xlabel, ylabel, title, fontsize, False,
+                  None, None)
+  return ax
 
 
 # ===========================================================================
@@ -395,6 +523,7 @@ def plot_scatter(x,
                  legend_colspace=0.4,
                  centroids=False,
                  max_n_points=None,
+                 density=False,
                  fontsize=10,
                  xlabel=None,
                  ylabel=None,
@@ -444,12 +573,20 @@ def plot_scatter(x,
     This can be used to rotate the axes programatically.
   centroids : Boolean. If True, annotate the labels on centroid of
     each cluster.
+  density : {Boolean, Integer} (default: False)
+    if not False, rasterized rendering for millions of points (2D only),
+    the points of each category are binned into an image of
+    `density x density` pixels (512 if True), each pixel has the color of
+    its majority category and the opacity shows the number of points,
+    `max_n_points` is ignored.
   xlabel, ylabel: str (optional)
     label for x-axis and y-axis
   title : {None, string} (default: None)
     specific title for the subplot
   """
   from matplotlib import pyplot as plt
+  if density:
+    return _plot_scatter_density(**locals())
   for ax, artist, x, y, z, \
     (color, marker, size) in _plot_scatter_points(**locals()):
     kwargs = dict(
@@ -0,0 +1,168 @@
+from __future__ import absolute_import, division, print_function
+
+import os
+import shutil
+import tempfile
+import unittest
+import warnings
+
+import numpy as np
+from scipy.linalg import sqrtm
+from sklearn.metrics import roc_curve
+
+from odin.backend.metrics import (FrechetStatistics, StreamingDetectionMetric,
+                                  compute_EER, compute_minDCF,
+                                  frechet_inception_distance)
+
+np.random.seed(8)
+
+
+def _sklearn_det(y_true, y_score, sample_weight=None):
+  fpr, tpr, _ = roc_curve(y_true,
+                          y_score,
+                          sample_weight=sample_weight,
+                          drop_intermediate=False)
+  # increasing thresholds
+  return fpr[::-1], 1 - tpr[::-1]
+
+
+class StreamingDetectionMetricTest(unittest.TestCase):
+
+  def test_against_roc_curve(self):
+    # integer scores, one bin per score value, the operating points of the
+    # histogram are exactly the points of the ROC curve
+    for _ in range(5):
+      n = 5000
+      y_true = np.random.randint(0, 2, size=n)
+      y_score = np.random.randint(-20, 21, size=n) + 6 * y_true
+      weights = np.random.rand(n)
+      for w in (None, weights):
+        metric = StreamingDetectionMetric(score_range=(-30.5, 30.5), n_bins=61)
+        for start in range(0, n, 999):
+          metric.update(y_true[start:start + 999],
+                        y_score[start:start + 999],
+                        sample_weight=None if w is None else w[start:start +
+                                                               999])
+        Pfa, Pmiss = _sklearn_det(y_true, y_score, sample_weight=w)
+        self.assertAlmostEqual(metric.compute_EER(), compute_EER(Pfa, Pmiss))
+        for Ptrue in (0.01, 0.5):
+          self.assertTrue(
+              np.allclose(metric.compute_minDCF(Ptrue=Ptrue),
+                          compute_minDCF(Pfa, Pmiss, Ptrue=Ptrue)))
+
+  def test_continuous_scores(self):
+    n = 20000
+    y_true = np.random.randint(0, 2, size=n)
+    y_score = np.random.randn(n) + 2 * y_true
+    Pfa, Pmiss = _sklearn_det(y_true, y_score)
+    metric = StreamingDetectionMetric(score_range=(-10, 10), n_bins=10000)
+    metric.update(y_true, y_score)
+    eer, bound = metric.compute_EER(return_bound=True)
+    self.assertLessEqual(abs(eer - compute_EER(Pfa, Pmiss)), bound + 1e-8)
+    # merging
+    a = StreamingDetectionMetric(score_range=(-10, 10), n_bins=10000)
+    b = StreamingDetectionMetric(score_range=(-10, 10), n_bins=10000)
+    a.update(y_true[:n // 2], y_score[:n // 2])
+    b.update(y_true[n // 2:], y_score[n // 2:])
+    self.assertAlmostEqual((a + b).compute_EER(), eer)
+
+  def test_out_of_range_and_nan(self):
+    n = 5000
+    y_true = np.random.randint(0, 2, size=n)
+    y_score = np.random.randint(-20, 21, size=n) + 6 * y_true
+    Pfa, Pmiss = _sklearn_det(y_true, y_score)
+    eer = compute_EER(Pfa, Pmiss)
+    # the range only covers the scores around the EER
+    metric = StreamingDetectionMetric(score_range=(-4.5, 9.5), n_bins=14)
+    with warnings.catch_warnings(record=True) as w:
+      warnings.simplefilter('always')
+      metric.update(y_true, y_score)
+      self.assertEqual(len(w), 1)
+    self.assertAlmostEqual(metric.compute_EER(), eer)
+    self.assertEqual(metric.n_target + metric.n_nontarget, n)
+    # NaN scores are ignored
+    metric = StreamingDetectionMetric(score_range=(-30.5, 30.5), n_bins=61)
+    y_nan = np.array(y_score, dtype=np.float64)
+    y_nan[:100] = np.nan
+    with warnings.catch_warnings(record=True) as w:
+      warnings.simplefilter('always')
+      metric.update(y_true, y_nan)
+      self.assertEqual(len(w), 1)
+    self.assertEqual(metric.n_target + metric.n_nontarget, n - 100)
+    Pfa, Pmiss = _sklearn_det(y_true[100:], y_score[100:])
+    self.assertAlmostEqual(metric.compute_EER(), compute_EER(Pfa, Pmiss))
+
+
+def _fid_reference(x1, x2):
+  mu1, mu2 = np.mean(x1, axis=0), np.mean(x2, axis=0)
+  c1, c2 = np.cov(x1, rowvar=False), np.cov(x2, rowvar=False)
+  covmean = sqrtm(c1.dot(c2)).real
+  diff = mu1 - mu2
+  return diff.dot(diff) + np.trace(c1) + np.trace(c2) - 2 * np.trace(covmean)
+
+
+class FrechetStatisticsTest(unittest.TestCase):
+
+  def setUp(self):
+    self.folder = tempfile.mkdtemp()
+
+  def tearDown(self):
+    shutil.rmtree(self.folder, ignore_errors=True)
+
+  def test_streaming(self):
+    x1 = np.random.randn(1000, 16).dot(np.random.rand(16, 16)) + 3
+    x2 = np.random.randn(800, 16).dot(np.random.rand(16, 16))
+    stats = FrechetStatistics()
+    for start in range(0, len(x1), 97):
+      stats.update(x1[start:start + 97])
+    self.assertEqual(stats.n, len(x1))
+    self.assertTrue(np.allclose(stats.mean, np.mean(x1, axis=0)))
+    self.assertTrue(np.allclose(stats.covariance, np.cov(x1, rowvar=False)))
+    ref = _fid_reference(x1, x2)
+    self.assertTrue(
+        np.allclose(frechet_inception_distance(x1, x2, batch_size=128), ref))
+    self.assertTrue(
+        np.allclose(
+            frechet_inception_distance(stats, FrechetStatistics().update(x2)),
+            ref))
+    self.assertAlmostEqual(frechet_inception_distance(x1, x1), 0., places=6)
+
+  def test_merge(self):
+    x = np.random.randn(500, 8) * 2 + 1
+    a = FrechetStatistics().update(x[:123])
+    b = FrechetStatistics().update(x[123:400])
+    c = FrechetStatistics().update(x[400:])
+    full = FrechetStatistics().update(x)
+    for stats in (a + b + c, FrechetStatistics().merge(a).merge(b).merge(c)):
+      self.assertEqual(stats.n, full.n)
+      self.assertTrue(np.allclose(stats.mean, full.mean))
+      self.assertTrue(np.allclose(stats.covariance, full.covariance))
+    # `+` doesn't modify the operands
+    self.assertEqual(a.n, 123)
+    a += FrechetStatistics()
+    self.assertEqual(a.n, 123)
+    a += b
+    self.assertEqual(a.n, 400)
+
+  def test_save_load(self):
+    x = np.random.randn(300, 6)
+    path = os.path.join(self.folder, 'stats')
+    batches = [x[:100], x[100:]]
+    stats = FrechetStatistics.cached(path, iter(batches))
+    self.assertTrue(os.path.exists(path + '.npz'))
+    # loaded from the cache, the batches are not read
+    loaded = FrechetStatistics.cached(path, None)
+    self.assertEqual(loaded.n, stats.n)
+    self.assertTrue(np.array_equal(loaded.mean, stats.mean))
+    self.assertTrue(np.array_equal(loaded.covariance, stats.covariance))
+    # empty statistics are not cached
+    path = os.path.join(self.folder, 'empty')
+    with self.assertRaises(ValueError):
+      FrechetStatistics.cached(path, [])
+    self.assertFalse(os.path.exists(path + '.npz'))
+    with self.assertRaises(ValueError):
+      FrechetStatistics().distance(stats)
+
+
+if __name__ == '__main__':
+  unittest.main()
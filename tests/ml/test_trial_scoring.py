@@ -0,0 +1,58 @@
+from __future__ import absolute_import, division, print_function
+
+import unittest
+
+import numpy as np
+
+from odin.ml import PLDA, Scorer
+from odin.ml.trial_scoring import TrialScorer
+
+np.random.seed(8)
+
+
+def _prepare(n_classes=12, n_sessions=8, feat_dim=20):
+  centers = np.random.randn(n_classes, feat_dim) * 2
+  y = np.repeat(np.arange(n_classes), n_sessions)
+  X = centers[y] + np.random.randn(len(y), feat_dim)
+  X_test = centers[np.random.randint(0, n_classes, size=50)] + \
+    np.random.randn(50, feat_dim)
+  return X, y, X_test
+
+
+class TrialScorerTest(unittest.TestCase):
+
+  def test_plda(self):
+    X, y, X_test = _prepare()
+    plda = PLDA(n_phi=8, n_iter=5, random_state=8)
+    plda.fit(X, y)
+    scorer = TrialScorer(plda, block_size=7, dtype='float64')
+    scorer.enroll(X, model_ids=y).test(X_test)
+    scores = plda.predict_log_proba(X_test).T
+    self.assertTrue(np.allclose(scorer.score_matrix(), scores))
+    # single session enrollment
+    scorer.enroll(X[:5])
+    self.assertTrue(
+        np.allclose(scorer.score_matrix(),
+                    plda.predict_log_proba(X_test, X_model=X[:5]).T))
+    # trial list
+    trials = np.stack([
+        np.random.randint(0, 5, size=100),
+        np.random.randint(0, len(X_test), size=100)
+    ],
+                      axis=1)
+    self.assertTrue(
+        np.allclose(scorer.score_trials(trials),
+                    scorer.score_matrix()[trials[:, 0], trials[:, 1]]))
+
+  def test_cosine(self):
+    X, y, X_test = _prepare()
+    cosine = Scorer(method='cosine').fit(X, y)
+    scorer = TrialScorer(cosine, block_size=7, dtype='float64')
+    scorer.enroll(X, model_ids=y).test(X_test)
+    self.assertTrue(
+        np.allclose(scorer.score_matrix(),
+                    cosine.predict_log_proba(X_test).T))
+
+
+if __name__ == '__main__':
+  unittest.main()
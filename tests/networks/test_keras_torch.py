@@ -93,3 +93,14 @@ x = torch.Tensor(np.random.rand(12, 32, 32, 32, 3))
 f = nt.Conv3D(filters=128, kernel_size=3)
 y = f(x)
 print(x.shape, y.shape)
+
+# ===========================================================================
+# TorchScript
+# ===========================================================================
+x = torch.Tensor(np.random.rand(12, 25, 8))
+f = torch.nn.Sequential(nt.Dense(units=32, activation='relu'),
+                        nt.Conv1D(filters=16, kernel_size=3),
+                        nt.Dense(units=4))
+f_traced = nt.trace_layers(f, x)
+assert torch.allclose(f(x), f_traced(x))
+print(x.shape, f_traced(x).shape)
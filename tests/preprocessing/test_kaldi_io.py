@@ -1,7 +1,18 @@
 from __future__ import absolute_import, division, print_function
 
+import os
+import shutil
+import struct
+import tempfile
 import unittest
 
+import numpy as np
+
+from odin.preprocessing.kaldi_io import (_FRAME_INDEX_EXT, _read_ark_rows,
+                                         count_frames, read_ark)
+
+np.random.seed(8)
+
 
 def _check_pykaldi():
   try:
@@ -11,8 +22,150 @@ def _check_pykaldi():
     return False
 
 
+def _write_matrix(f, x, token):
+  """ Write a binary Kaldi matrix (or 'FV' vector) to an ark, return its
+  offset, the compressed matrices are quantized naively """
+  f.write(b'utt ')
+  offset = f.tell()
+  f.write(b'\0B')
+  if token == 'FV':
+    f.write(b'FV ' + struct.pack('<bi', 4, len(x)))
+    f.write(x.astype('<f4').tobytes())
+    return offset
+  rows, cols = x.shape
+  if token == 'FM':
+    f.write(b'FM ' + struct.pack('<bi', 4, rows) + struct.pack('<bi', 4, cols))
+    f.write(x.astype('<f4').tobytes())
+    return offset
+  min_value, max_value = float(x.min()), float(x.max())
+  value_range = max(max_value - min_value, 1e-8)
+  f.write(token.encode('ascii') + b' ' +
+          struct.pack('<ffii', min_value, value_range, rows, cols))
+  if token == 'CM2':
+    q = np.round((x - min_value) / value_range * 65535).astype('<u2')
+    f.write(q.tobytes())
+  elif token == 'CM3':
+    q = np.round((x - min_value) / value_range * 255).astype('u1')
+    f.write(q.tobytes())
+  else:  # 'CM' with per-column percentiles, column-major
+    p = np.percentile(x, [0, 25, 75, 100], axis=0).T
+    f.write(
+        np.round((p - min_value) / value_range * 65535).astype('<u2').tobytes())
+    f.write(np.random.randint(0, 256, size=(cols, rows)).astype('u1').tobytes())
+  return offset
+
+
+def _write_ark(path, matrices, token):
+  with open(path, 'wb') as f:
+    return [_write_matrix(f, x, token) for x in matrices]
+
+
 class KaldiIOTest(unittest.TestCase):
 
+  def setUp(self):
+    self.folder = tempfile.mkdtemp()
+
+  def tearDown(self):
+    shutil.rmtree(self.folder, ignore_errors=True)
+
   def test_feature_loader(self):
     if not _check_pykaldi():
       return
+
+  def test_read_rows(self):
+    matrices = [
+        np.random.randn(n, 13).astype('float32') for n in (1, 7, 50, 123)
+    ]
+    for token in ('FM', 'CM', 'CM2', 'CM3'):
+      path = os.path.join(self.folder, 'feats_%s.ark' % token)
+      offsets = _write_ark(path, matrices, token)
+      with open(path, 'rb') as f:
+        for x, offset in zip(matrices, offsets):
+          full = _read_ark_rows(f, offset)
+          self.assertEqual(full.shape, x.shape)
+          self.assertEqual(full.dtype, np.float32)
+          if token == 'FM':
+            self.assertTrue(np.array_equal(full, x))
+          elif token in ('CM2', 'CM3'):
+            scale = 65535. if token == 'CM2' else 255.
+            atol = (x.max() - x.min()) / scale
+            self.assertTrue(np.allclose(full, x, atol=atol * 1.01))
+          n = len(x)
+          for start, end in [(0, n), (0, 1), (n - 1, n), (n // 3, n // 2),
+                             (2, n + 10), (n + 5, n + 10), (n // 2, 0)]:
+            part = _read_ark_rows(f, offset, start, end)
+            self.assertTrue(np.array_equal(part, full[start:max(start, end)]),
+                            msg="%s rows [%d, %d)" % (token, start, end))
+          self.assertTrue(
+              np.array_equal(read_ark('%s:%d' % (path, offset), 2, 5),
+                             full[2:5]))
+
+  def test_read_concatenated(self):
+    matrices = [np.random.randn(n, 5).astype('float32') for n in (4, 9, 6)]
+    path = os.path.join(self.folder, 'feats.ark')
+    offsets = _write_ark(path, matrices, 'FM')
+    specifier = '&'.join('%s:%d' % (path, o) for o in offsets)
+    x = np.concatenate(matrices, axis=0)
+    n = len(x)
+    self.assertTrue(np.array_equal(read_ark(specifier), x))
+    for start, end in [(0, 4), (3, 5), (4, 13), (2, n), (12, None), (18, 19),
+                       (n, n + 3), (5, 5)]:
+      self.assertTrue(
+          np.array_equal(read_ark(specifier, start, end), x[start:end]),
+          msg="rows [%s, %s)" % (start, end))
+
+  def test_count_frames(self):
+    lengths = [5, 17, 3, 40]
+    path = os.path.join(self.folder, 'vad.ark')
+    sad = [np.random.rand(n) > 0.5 for n in lengths]
+    offsets = _write_ark(path, sad, 'FV')
+    specifiers = ['%s:%d' % (path, o) for o in offsets]
+    # duplicated and concatenated specifiers
+    specifiers += [specifiers[1], '&'.join(specifiers[:3])]
+    speech = [int(np.sum(i)) for i in sad]
+    speech += [speech[1], sum(speech[:3])]
+    rows = lengths + [lengths[1], sum(lengths[:3])]
+    self.assertEqual(count_frames(specifiers, is_bool_index=True), speech)
+    self.assertTrue(os.path.isfile(path + _FRAME_INDEX_EXT))
+    self.assertEqual(count_frames(specifiers, is_bool_index=False), rows)
+    self.assertEqual(count_frames(specifiers, is_bool_index=True), speech)
+    self.assertEqual(
+        count_frames(specifiers, is_bool_index=True, cache=False), speech)
+
+  def test_count_frames_invalidation(self):
+    lengths = [8, 20, 13]
+    path = os.path.join(self.folder, 'vad.ark')
+    specifiers = [
+        '%s:%d' % (path, o)
+        for o in _write_ark(path, [np.ones(n) for n in lengths], 'FV')
+    ]
+    self.assertEqual(count_frames(specifiers), lengths)
+    mtime = os.path.getmtime(path)
+    # same offsets, different speech frames
+    _write_ark(path, [np.zeros(n) for n in lengths], 'FV')
+    os.utime(path, (mtime, mtime))
+    # the sidecar is trusted while the ark mtime is unchanged
+    self.assertEqual(count_frames(specifiers), lengths)
+    os.utime(path, (mtime + 10, mtime + 10))
+    self.assertEqual(count_frames(specifiers), [0] * len(lengths))
+
+  def test_count_frames_readonly(self):
+    lengths = [8, 20, 13]
+    path = os.path.join(self.folder, 'feats.ark')
+    specifiers = [
+        '%s:%d' % (path, o) for o in _write_ark(
+            path, [np.random.randn(n, 3).astype('float32')
+                   for n in lengths], 'FM')
+    ]
+    os.chmod(self.folder, 0o555)
+    try:
+      if os.access(self.folder, os.W_OK):
+        self.skipTest("The folder is still writable (e.g. running as root)")
+      self.assertEqual(count_frames(specifiers, is_bool_index=False), lengths)
+      self.assertEqual(os.listdir(self.folder), ['feats.ark'])
+    finally:
+      os.chmod(self.folder, 0o755)
+
+
+if __name__ == '__main__':
+  unittest.main()
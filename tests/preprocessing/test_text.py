@@ -0,0 +1,153 @@
+from __future__ import absolute_import, division, print_function
+
+import unittest
+from collections import Counter
+
+import numpy as np
+from scipy import sparse
+
+from odin.preprocessing.signal import pad_sequences
+from odin.preprocessing.text import (Tokenizer, _count_docs, _flatten_sequences,
+                                     _length_buckets, _pad_ragged,
+                                     _pool_initializer, _preprocess_func)
+
+np.random.seed(8)
+
+_WORDS = ['alpha', 'beta', 'gamma', 'delta', 'epsilon', 'zeta', 'eta', 'theta']
+
+
+def _random_texts(n):
+  return [
+      ' '.join(np.random.choice(_WORDS, size=np.random.randint(1, 20)))
+      for _ in range(n)
+  ]
+
+
+class TokenizerTest(unittest.TestCase):
+
+  def test_fit_equal_serial(self):
+    texts = _random_texts(500)
+    tokenizer = Tokenizer(batch_size=16,
+                          nb_processors=2,
+                          stopwords=True,
+                          print_progress=False)
+    # serial path, tokenize and count in this process
+    _pool_initializer(tokenizer.filters, tokenizer.preprocessors,
+                      tokenizer.language, tokenizer.lemmatization,
+                      tokenizer.char_level, tokenizer.stopwords)
+    nb_docs, word_counts, word_docs, _, longest = _count_docs(
+        _preprocess_func(doc) for doc in texts)
+    # fit
+    tokenizer.fit(texts)
+    self.assertEqual(tokenizer.nb_docs, nb_docs)
+    self.assertEqual(Counter(tokenizer._word_counts), word_counts)
+    self.assertEqual(Counter(tokenizer._word_docs), word_docs)
+    self.assertEqual(tokenizer.longest_document_length, longest)
+    dictionary = list(tokenizer.dictionary.items())
+    # fitting twice doesn't accumulate the counts
+    tokenizer.fit(texts)
+    self.assertEqual(tokenizer.nb_docs, nb_docs)
+    self.assertEqual(list(tokenizer.dictionary.items()), dictionary)
+    # partial_fit
+    tokenizer = Tokenizer(batch_size=16,
+                          nb_processors=2,
+                          stopwords=True,
+                          print_progress=False)
+    tokenizer.partial_fit(texts[:123])
+    tokenizer.partial_fit(texts[123:])
+    self.assertEqual(tokenizer.nb_docs, nb_docs)
+    self.assertEqual(Counter(tokenizer._word_counts), word_counts)
+    self.assertEqual(Counter(tokenizer._word_docs), word_docs)
+    self.assertEqual(list(tokenizer.dictionary.items()), dictionary)
+
+  def _reference_matrix(self, tokenizer, texts, mode):
+    # dense per-document counting
+    tokens, offsets = tokenizer.transform(texts, mode='seq', ragged=True)
+    X = np.zeros(shape=(len(texts), tokenizer.nb_words))
+    for i in range(len(texts)):
+      seq = tokens[offsets[i]:offsets[i + 1]]
+      for tok, n in Counter(seq.tolist()).items():
+        if mode == 'binary':
+          X[i, tok] = 1
+        elif mode == 'count':
+          X[i, tok] = n
+        elif mode == 'freq':
+          X[i, tok] = n / float(len(seq))
+        elif mode == 'tfidf':
+          docs_freq = tokenizer._word_dictionary_info.get(tok, (0, 0))[-1]
+          X[i, tok] = (1 + np.log(n)) * \
+            np.log(1 + tokenizer.nb_docs / (1 + docs_freq))
+    return X
+
+  def test_document_term_matrix(self):
+    texts = _random_texts(200)
+    tokenizer = Tokenizer(batch_size=16,
+                          nb_processors=2,
+                          stopwords=True,
+                          print_progress=False)
+    tokenizer.fit(texts[:150])
+    for nb_words in (None, 4):
+      if nb_words is not None:
+        # refreshing the dictionary invalidates the cached idf
+        idf = tokenizer.idf
+        tokenizer.nb_words = nb_words
+        self.assertEqual(len(tokenizer.idf), nb_words + 1)
+        self.assertTrue(np.allclose(tokenizer.idf, idf[:nb_words + 1]))
+      for mode in ('binary', 'count', 'freq', 'tfidf'):
+        X = tokenizer.transform(texts, mode=mode)
+        self.assertTrue(sparse.isspmatrix_csr(X))
+        self.assertEqual(X.shape, (len(texts), tokenizer.nb_words))
+        self.assertEqual(X.dtype, np.float64)
+        ref = self._reference_matrix(tokenizer, texts, mode)
+        self.assertTrue(np.allclose(X.toarray(), ref), msg=mode)
+        X = tokenizer.transform(texts, mode=mode, dense=True, dtype='float32')
+        self.assertIsInstance(X, np.ndarray)
+        self.assertEqual(X.dtype, np.float32)
+        self.assertTrue(np.allclose(X, ref, atol=1e-5), msg=mode)
+    # the idf is updated with the new documents
+    idf = tokenizer.idf
+    tokenizer.partial_fit(texts[150:])
+    self.assertFalse(np.array_equal(tokenizer.idf, idf))
+    self.assertTrue(
+        np.allclose(tokenizer.transform(texts, mode='tfidf').toarray(),
+                    self._reference_matrix(tokenizer, texts, 'tfidf')))
+
+  def test_pad_ragged(self):
+    sequences = [
+        list(np.random.randint(1, 100, size=n))
+        for n in [0, 1, 5, 12, 3, 20, 7, 0, 9]
+    ]
+    tokens, offsets = _flatten_sequences(sequences)
+    self.assertEqual(tokens.dtype, np.int32)
+    self.assertEqual(offsets.tolist(),
+                     [0] + np.cumsum([len(s) for s in sequences]).tolist())
+    for maxlen in (None, 1, 6, 20, 25):
+      for padding in ('pre', 'post'):
+        for truncating in ('pre', 'post'):
+          kw = dict(maxlen=maxlen,
+                    padding=padding,
+                    truncating=truncating,
+                    value=-1)
+          self.assertTrue(
+              np.array_equal(_pad_ragged(tokens, offsets, **kw),
+                             pad_sequences(sequences, **kw)))
+          # each bucket is padded to its longest document
+          lengths = np.diff(offsets)
+          buckets = _length_buckets(lengths, 3)
+          self.assertEqual(sorted(np.concatenate(buckets).tolist()),
+                           list(range(len(sequences))))
+          for ids in buckets:
+            length = int(lengths[ids].max())
+            if maxlen is not None:
+              length = min(length, maxlen)
+            kw['maxlen'] = length
+            self.assertTrue(
+                np.array_equal(
+                    Tokenizer._pad_documents(tokens, offsets, ids, length,
+                                             'int32', padding, truncating,
+                                             -1),
+                    pad_sequences([sequences[i] for i in ids], **kw)))
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -2,12 +2,14 @@ from __future__ import absolute_import, division, print_function
 
 import itertools
 import os
+import unittest
 
 import numpy as np
 import tensorflow as tf
 
 from odin.search import (diagonal_beam_search, diagonal_bruteforce_search,
-                         diagonal_greedy_search, diagonal_hillclimb_search)
+                         diagonal_greedy_search, diagonal_hillclimb_search,
+                         diagonal_linear_assignment)
 from odin.utils import UnitTimer
 
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
@@ -43,3 +45,44 @@ with UnitTimer():
 print(ids)
 print(mat[:, ids])
 print(np.sum(np.diag(mat[:, ids])))
+
+
+# ===========================================================================
+# Beam search with pruning and restricted candidates
+# ===========================================================================
+def _diag_score(matrix, ids):
+  n = min(matrix.shape)
+  return np.sum(matrix[np.arange(n), np.asarray(ids)[:n]])
+
+
+class DiagonalSearchTest(unittest.TestCase):
+
+  def test_beam_search(self):
+    rand = np.random.RandomState(8)
+    for shape in [(8, 8), (6, 10), (10, 6), (32, 32), (64, 48)]:
+      for _ in range(5):
+        mat = rand.rand(*shape)**8
+        greedy = _diag_score(mat,
+                             diagonal_greedy_search(mat[:min(shape)]))
+        exact = _diag_score(mat, diagonal_linear_assignment(mat))
+        for beam_size, n_candidates, prune in [(1, -1, False), (1, -1, True),
+                                               (1, 2, False), (1, 2, True),
+                                               (4, 3, True), (8, -1, True),
+                                               (-1, -1, False)]:
+          ids = diagonal_beam_search(mat,
+                                     beam_size=beam_size,
+                                     n_candidates=n_candidates,
+                                     prune=prune)
+          # valid permutation of the columns
+          self.assertEqual(sorted(ids), list(range(shape[1])))
+          score = _diag_score(mat, ids)
+          self.assertLessEqual(score, exact + 1e-8)
+          if prune:
+            self.assertGreaterEqual(score, greedy - 1e-8)
+        # hill climbing is the un-pruned beam search with beam_size=1
+        self.assertEqual(diagonal_hillclimb_search(mat),
+                         diagonal_beam_search(mat, beam_size=1, prune=False))
+
+
+if __name__ == '__main__':
+  unittest.main()
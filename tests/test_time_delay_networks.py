@@ -9,7 +9,7 @@ from tensorflow.python.keras.layers import Dense
 
 from odin import networks_torch as nt
 from odin.networks import (TimeDelay, TimeDelayConv, TimeDelayConvTied,
-                           TimeDelayDense)
+                           TimeDelayDense, TimeDelayFused)
 
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
 os.environ['TF_FORCE_GPU_ALLOW_GROWTH'] = 'true'
@@ -64,3 +64,30 @@ for _ in range(20):
   tdct = nt.TimeDelayConvTied(units=128)
   y = tdct(x)
   print(y.shape)
+
+# ====== fused shared-projection ====== #
+for _ in range(10):
+  ctx = sorted(set(int(i) for i in np.random.randint(-5, 5, size=4)))
+  for pooling in ('sum', 'max', 'stat', 'none'):
+    for activation in ('linear', 'relu'):
+      tdd = TimeDelayDense(units=32,
+                           delay_context=ctx,
+                           pooling=pooling,
+                           activation=activation,
+                           use_bias=True)
+      y = tdd(x)
+      y_fused = TimeDelayFused.from_time_delay(tdd)(x)
+      assert y.shape == y_fused.shape
+      assert np.allclose(y.numpy(), y_fused.numpy(), atol=1e-4)
+
+      tdd = nt.TimeDelayDense(units=32,
+                              delay_context=ctx,
+                              pooling=pooling,
+                              activation=activation,
+                              use_bias=True)
+      y = tdd(x)
+      y_fused = nt.TimeDelayFused.from_time_delay(tdd)(x)
+      assert y.shape == y_fused.shape
+      assert np.allclose(y.detach().numpy(),
+                         y_fused.detach().numpy(),
+                         atol=1e-4)
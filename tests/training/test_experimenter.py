@@ -0,0 +1,242 @@
+from __future__ import absolute_import, division, print_function
+
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import unittest
+from collections import namedtuple
+from functools import partial
+
+import numpy as np
+from omegaconf import OmegaConf
+from scipy import sparse
+
+from odin.training.experimenter import (JOBS_DIR, JOBS_INDEX,
+                                        SHARED_DATA_ENV, _execute_job,
+                                        _job_key, _jobs_dir, _read_shared,
+                                        _reuse_job, _write_shared, list_jobs,
+                                        load_job_result, shared_dataset)
+
+np.random.seed(8)
+
+_Pair = namedtuple('_Pair', ['x', 'y'])
+_N_CALLS = [0]
+
+
+class _Dataset:
+
+  def __init__(self, n):
+    self.n = n
+    self.name = 'ds%d' % n
+    self.train = np.random.rand(n, 3).astype('float32')
+    self.labels = sparse.random(n, 5, density=0.3, format='csr')
+
+
+def _create_dataset(n):
+  _N_CALLS[0] += 1
+  return _Dataset(n)
+
+
+def _create_arrays(n):
+  _N_CALLS[0] += 1
+  return dict(x=np.arange(n), pair=_Pair(np.ones(n), [np.zeros(2), 'a']))
+
+
+class _Task:
+
+  def __init__(self, result):
+    self.result = result
+    self.n_calls = 0
+
+  def __call__(self, cfg):
+    self.n_calls += 1
+    if isinstance(self.result, Exception):
+      raise self.result
+    return self.result
+
+
+def _run(output_dir, key, task, override=False):
+  found, result = _reuse_job(output_dir, key, override=override)
+  if found:
+    return result
+  return _execute_job(output_dir,
+                      key,
+                      dict(overrides='', output_dir=output_dir),
+                      task,
+                      None,
+                      raise_error=False)
+
+
+class JobsTest(unittest.TestCase):
+
+  def setUp(self):
+    self.output_dir = tempfile.mkdtemp()
+
+  def tearDown(self):
+    shutil.rmtree(self.output_dir, ignore_errors=True)
+
+  def test_job_key(self):
+    cfg1 = OmegaConf.create(dict(lr=0.1, ds=dict(name='mnist', bs=32), seed=1))
+    cfg2 = OmegaConf.create(dict(seed=1, ds=dict(bs=32, name='mnist'), lr=0.1))
+    cfg3 = OmegaConf.create(dict(lr=0.1, ds=dict(name='mnist', bs=32), seed=2))
+    cfg4 = OmegaConf.create(dict(lr=0.1, ds=dict(name='mnist', bs=64), seed=1))
+    self.assertEqual(_job_key(cfg1, []), _job_key(cfg2, []))
+    self.assertNotEqual(_job_key(cfg1, []), _job_key(cfg3, []))
+    self.assertNotEqual(_job_key(cfg1, []), _job_key(cfg4, []))
+    # excluded keys, missing keys are ignored
+    self.assertEqual(_job_key(cfg1, ['seed', 'epochs']),
+                     _job_key(cfg3, ['seed', 'epochs']))
+    self.assertEqual(_job_key(cfg1, ['ds.bs']), _job_key(cfg4, ['ds.bs']))
+    # interpolations are resolved
+    cfg5 = OmegaConf.create(dict(lr=0.1, ds=dict(name='mnist', bs=32),
+                                 seed='${ds.bs}'))
+    cfg6 = OmegaConf.create(dict(lr=0.1, ds=dict(name='mnist', bs=32),
+                                 seed=32))
+    self.assertEqual(_job_key(cfg5, []), _job_key(cfg6, []))
+
+  def test_reuse_and_override(self):
+    task = _Task(dict(acc=0.9))
+    with self.assertRaises(KeyError):
+      load_job_result(self.output_dir, 'job1')
+    self.assertEqual(_run(self.output_dir, 'job1', task), dict(acc=0.9))
+    self.assertEqual(load_job_result(self.output_dir, 'job1'), dict(acc=0.9))
+    # reused
+    self.assertEqual(_run(self.output_dir, 'job1', task), dict(acc=0.9))
+    self.assertEqual(task.n_calls, 1)
+    # override
+    task.result = dict(acc=0.95)
+    self.assertEqual(_run(self.output_dir, 'job1', task, override=True),
+                     dict(acc=0.95))
+    self.assertEqual(task.n_calls, 2)
+    self.assertEqual(load_job_result(self.output_dir, 'job1'), dict(acc=0.95))
+    # the stale result is removed even if the job fails
+    task.result = ValueError()
+    self.assertIsNone(_run(self.output_dir, 'job1', task, override=True))
+    with self.assertRaises(KeyError):
+      load_job_result(self.output_dir, 'job1')
+    # unpicklable result, not reused
+    task = _Task(lambda: None)
+    _run(self.output_dir, 'job2', task)
+    _run(self.output_dir, 'job2', task)
+    self.assertEqual(task.n_calls, 2)
+    jobs = list_jobs(self.output_dir)
+    self.assertEqual(jobs['job1']['status'], 'failed')
+    self.assertEqual(jobs['job2']['status'], 'done')
+    self.assertFalse(jobs['job2']['result_saved'])
+
+  def test_list_jobs(self):
+    self.assertEqual(list_jobs(self.output_dir), {})
+    _run(self.output_dir, 'job1', _Task(1))
+    _run(self.output_dir, 'job2', _Task(RuntimeError()))
+    # a running job of a killed sweep
+    proc = subprocess.Popen([sys.executable, '-c', 'pass'])
+    proc.wait()
+    path = os.path.join(_jobs_dir(self.output_dir), JOBS_INDEX)
+    with open(path, 'a') as f:
+      for key, pid in (('job3', proc.pid), ('job4', os.getpid())):
+        f.write(
+            json.dumps(
+                dict(key=key,
+                     status='running',
+                     time='',
+                     host=socket.gethostname(),
+                     pid=pid,
+                     overrides='',
+                     output_dir='')) + '\n')
+      # partially written line
+      f.write('{"key": "job5", "sta')
+    jobs = list_jobs(self.output_dir)
+    self.assertEqual(sorted(jobs), ['job1', 'job2', 'job3', 'job4'])
+    self.assertEqual(jobs['job1']['status'], 'done')
+    self.assertTrue(jobs['job1']['result_saved'])
+    self.assertEqual(jobs['job2']['status'], 'failed')
+    self.assertEqual(jobs['job3']['status'], 'stale')
+    self.assertEqual(jobs['job4']['status'], 'running')
+    self.assertTrue(
+        os.path.isdir(os.path.join(self.output_dir, JOBS_DIR)))
+
+
+class SharedDatasetTest(unittest.TestCase):
+
+  def setUp(self):
+    self.folder = tempfile.mkdtemp()
+    _N_CALLS[0] = 0
+
+  def tearDown(self):
+    os.environ.pop(SHARED_DATA_ENV, None)
+    shutil.rmtree(self.folder, ignore_errors=True)
+
+  def test_write_read_shared(self):
+    obj = dict(x=np.random.rand(4, 2),
+               pair=_Pair(np.arange(3), (np.ones(2), 'b')),
+               items=[np.zeros(1), 1, None],
+               csr=sparse.random(6, 4, density=0.5, format='csr'),
+               csc=sparse.random(6, 4, density=0.5, format='csc'),
+               objects=np.array([[1], 'a'], dtype=object))
+    arrays = []
+    data = _read_shared(_write_shared(obj, self.folder, arrays), self.folder)
+    self.assertEqual(len(arrays), 1 + 1 + 1 + 1 + 3 + 3)
+    self.assertTrue(np.array_equal(data['x'], obj['x']))
+    self.assertFalse(data['x'].flags.writeable)
+    self.assertIsInstance(data['pair'], _Pair)
+    self.assertTrue(np.array_equal(data['pair'].x, obj['pair'].x))
+    self.assertIsInstance(data['pair'].y, tuple)
+    self.assertEqual(data['pair'].y[1], 'b')
+    self.assertIsInstance(data['items'], list)
+    self.assertEqual(data['items'][1:], [1, None])
+    for key in ('csr', 'csc'):
+      self.assertEqual(data[key].format, obj[key].format)
+      self.assertTrue(np.array_equal(data[key].toarray(), obj[key].toarray()))
+    self.assertEqual(data['objects'].tolist(), obj['objects'].tolist())
+
+  def test_shared_dataset(self):
+    # not shared
+    ds = shared_dataset(partial(_create_dataset, 5))
+    self.assertIsInstance(ds, _Dataset)
+    self.assertTrue(ds.train.flags.writeable)
+    # shared within the sweep
+    os.environ[SHARED_DATA_ENV] = self.folder
+    _N_CALLS[0] = 0
+    ds1 = shared_dataset(partial(_create_dataset, 5))
+    ds2 = shared_dataset(partial(_create_dataset, 5))
+    self.assertEqual(_N_CALLS[0], 1)
+    for ds in (ds1, ds2):
+      self.assertIsInstance(ds, _Dataset)
+      self.assertEqual(ds.name, 'ds5')
+      self.assertIsInstance(ds.train, np.memmap)
+      self.assertFalse(ds.train.flags.writeable)
+    self.assertTrue(np.array_equal(ds1.train, ds2.train))
+    self.assertTrue(np.array_equal(ds1.labels.toarray(),
+                                   ds2.labels.toarray()))
+    # different arguments, different dataset
+    ds = shared_dataset(partial(_create_dataset, n=7))
+    self.assertEqual(_N_CALLS[0], 2)
+    self.assertEqual(ds.train.shape, (7, 3))
+    data = shared_dataset(partial(_create_arrays, 3))
+    self.assertEqual(_N_CALLS[0], 3)
+    self.assertIsInstance(data['pair'], _Pair)
+    self.assertTrue(np.array_equal(data['x'], np.arange(3)))
+
+  def test_factory_name(self):
+    for factory in (lambda: _create_arrays(2),
+                    partial(lambda n: _create_arrays(n), 2),
+                    _Dataset(2).__init__):
+      with self.assertRaises(ValueError):
+        shared_dataset(factory)
+    os.environ[SHARED_DATA_ENV] = self.folder
+    # an explicit name
+    x1 = shared_dataset(lambda: _create_arrays(2), name='arrays2')
+    x2 = shared_dataset(lambda: _create_arrays(3), name='arrays3')
+    x3 = shared_dataset(lambda: _create_arrays(4), name='arrays2')
+    self.assertEqual(_N_CALLS[0], 2)
+    self.assertEqual(len(x1['x']), 2)
+    self.assertEqual(len(x2['x']), 3)
+    self.assertEqual(len(x3['x']), 2)
+
+
+if __name__ == '__main__':
+  unittest.main()
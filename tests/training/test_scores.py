@@ -0,0 +1,130 @@
+from __future__ import absolute_import, division, print_function
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+import numpy as np
+
+from odin.training.scores import ScoreBoard
+
+np.random.seed(8)
+
+
+def _count(path, table):
+  # read from another connection, only the committed rows are visible
+  conn = sqlite3.connect(path)
+  try:
+    return conn.execute(f"SELECT count() FROM '{table}'").fetchone()[0]
+  except sqlite3.OperationalError:  # table not created
+    return 0
+  finally:
+    conn.close()
+
+
+class ScoreBoardTest(unittest.TestCase):
+
+  def setUp(self):
+    self.folder = tempfile.mkdtemp()
+    self.path = os.path.join(self.folder, 'scores.db')
+
+  def tearDown(self):
+    shutil.rmtree(self.folder, ignore_errors=True)
+
+  def test_buffering(self):
+    sb = ScoreBoard(self.path)
+    # written immediately by default
+    sb.write('t1', epoch=0, llk=0.1)
+    self.assertEqual(_count(self.path, 't1'), 1)
+    self.assertEqual(
+        sb.conn.execute("PRAGMA journal_mode;").fetchone()[0].lower(), 'wal')
+    # a single transaction for the recording block
+    with sb.recording():
+      for i in range(1, 10):
+        sb.write('t1', epoch=i, llk=0.1 * i)
+      self.assertEqual(_count(self.path, 't1'), 1)
+    self.assertEqual(_count(self.path, 't1'), 10)
+    # buffered rows outside recording
+    sb = ScoreBoard(self.path, buffer_size=5)
+    for i in range(4):
+      sb.write('t2', epoch=i)
+    self.assertEqual(_count(self.path, 't2'), 0)
+    sb.write('t2', epoch=4)
+    self.assertEqual(_count(self.path, 't2'), 5)
+    sb.write('t2', epoch=5)
+    self.assertEqual(sb.get_nrow('t2'), 6)  # flushed before the query
+    sb.close()
+
+  def test_recording_exception(self):
+    sb = ScoreBoard(self.path)
+    sb.write('t1', epoch=0)
+    with self.assertRaises(RuntimeError):
+      with sb.recording():
+        sb.write('t1', epoch=1)
+        self.assertEqual(sb.get_nrow('t1'), 2)  # flushed, not committed
+        sb.write('t1', epoch=2)
+        raise RuntimeError()
+    self.assertEqual(_count(self.path, 't1'), 1)
+    self.assertEqual(sb.get_nrow('t1'), 1)
+    # an exception caught within the outer block only discards the rows of
+    # the inner block
+    with sb.recording():
+      sb.write('t1', epoch=3)
+      try:
+        with sb.recording():
+          sb.write('t1', epoch=4)
+          raise RuntimeError()
+      except RuntimeError:
+        pass
+    self.assertEqual(sb.select_columns('t1')['epoch'].tolist(), [0, 3])
+    sb.close()
+
+  def test_unique(self):
+    sb = ScoreBoard(self.path, buffer_size=8)
+    for i in range(3):
+      sb.write('t1', unique='epoch', epoch=0, llk=i)
+    self.assertEqual(sb.get_table('t1'), [[0, 0]])
+    sb.write('t1', unique='epoch', replace=True, epoch=0, llk=5)
+    self.assertEqual(sb.get_table('t1'), [[0, 5]])
+    sb.close()
+
+  def test_select_columns(self):
+    sb = ScoreBoard(self.path)
+    arrays = np.random.rand(4, 2, 3).astype('float32')
+    with sb.recording():
+      for i in range(4):
+        sb.write('t1',
+                 epoch=i,
+                 llk=None if i == 1 else 0.5 * i,
+                 name='exp%d' % i,
+                 weights=arrays[i],
+                 ragged=np.arange(i + 1),
+                 info={'lr': i})
+    cols = sb.select_columns('t1')
+    self.assertEqual(cols['epoch'].dtype, np.int64)
+    self.assertEqual(cols['epoch'].tolist(), [0, 1, 2, 3])
+    # a float column with None
+    self.assertEqual(cols['llk'].dtype, np.float64)
+    self.assertTrue(np.isnan(cols['llk'][1]))
+    self.assertEqual(cols['llk'][[0, 2, 3]].tolist(), [0., 1., 1.5])
+    self.assertEqual(cols['name'].tolist(), ['exp0', 'exp1', 'exp2', 'exp3'])
+    # raw array round trip
+    self.assertEqual(cols['weights'].dtype, np.float32)
+    self.assertTrue(np.array_equal(cols['weights'], arrays))
+    self.assertEqual(cols['ragged'].dtype, np.object_)
+    for i, x in enumerate(cols['ragged']):
+      self.assertTrue(np.array_equal(x, np.arange(i + 1)))
+    self.assertEqual(cols['info'].tolist(), [{'lr': i} for i in range(4)])
+    # the decoded arrays are writable
+    x = sb.select('SELECT weights FROM t1 WHERE epoch=0')[0]
+    x[:] = 0
+    cols = sb.select_columns('t1', keys=['epoch', 'llk'], where='epoch>1')
+    self.assertEqual(list(cols.keys()), ['epoch', 'llk'])
+    self.assertEqual(cols['epoch'].tolist(), [2, 3])
+    sb.close()
+
+
+if __name__ == '__main__':
+  unittest.main()
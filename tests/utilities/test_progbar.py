@@ -0,0 +1,45 @@
+from __future__ import absolute_import, division, print_function
+
+import unittest
+
+import numpy as np
+
+from odin.utils.progbar import Progbar, RunningStats
+
+np.random.seed(8)
+
+
+class ProgbarTest(unittest.TestCase):
+
+  def test_running_stats(self):
+    values = np.random.rand(1000).astype('float32')
+    stats = RunningStats(reservoir_size=16)
+    for v in values:
+      stats.add(v)
+    self.assertEqual(stats.count, 1000)
+    self.assertEqual(len(stats.sample), 16)
+    self.assertEqual(stats.last, values[-1])
+    self.assertEqual(stats.min, values.min())
+    self.assertEqual(stats.max, values.max())
+    self.assertAlmostEqual(stats.mean, np.mean(values.astype('float64')))
+
+  def test_summarizer_last_value(self):
+    prog = Progbar(target=1000,
+                   print_progress=False,
+                   print_report=False,
+                   reservoir_size=16)
+    prog.set_summarizer('#Files', fn=lambda x: x.last)
+    for i in range(1000):
+      prog['#Files'] = i
+      prog['loss'] = np.float32(0.1)
+      prog.add(1)
+    stats = prog.history[0]['#Files']
+    self.assertEqual(stats.count, 1000)
+    self.assertEqual(len(stats.sample), 16)
+    summary = prog._epoch_summary[0]
+    self.assertEqual(summary['#Files'], 999)
+    self.assertAlmostEqual(summary['loss'], 0.1, places=6)
+
+
+if __name__ == '__main__':
+  unittest.main()
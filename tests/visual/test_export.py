@@ -0,0 +1,82 @@
+from __future__ import absolute_import, division, print_function
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+import numpy as np
+from matplotlib import pyplot as plt
+
+from odin.visual.base import Visualizer, export_figures
+
+np.random.seed(8)
+
+
+def _figure():
+  fig = plt.figure(figsize=(2, 2))
+  plt.plot(np.random.rand(10))
+  return fig
+
+
+class FigureExportTest(unittest.TestCase):
+
+  def setUp(self):
+    self.folder = tempfile.mkdtemp()
+    plt.close('all')
+
+  def tearDown(self):
+    shutil.rmtree(self.folder, ignore_errors=True)
+    plt.close('all')
+
+  def test_background_export(self):
+    exports = []
+    outputs = []
+    for i in range(3):
+      figures = [('fig%d_%d' % (i, j), _figure()) for j in range(4)]
+      paths = [
+          os.path.join(self.folder, '%s.png' % name) for name, _ in figures
+      ]
+      exports.append(
+          export_figures(figures, outputs=paths, close=True, background=True))
+      outputs.append(paths)
+      # the figures are detached from pyplot when queued
+      self.assertEqual(len(plt.get_fignums()), 0)
+    for export, paths in zip(exports, outputs):
+      self.assertEqual(export.result(), paths)
+      for path in paths:
+        self.assertTrue(os.path.isfile(path))
+        self.assertGreater(os.path.getsize(path), 0)
+    # pdf export
+    figures = [('fig%d' % i, _figure()) for i in range(3)]
+    path = os.path.join(self.folder, 'figures.pdf')
+    export = export_figures(figures, path=path, background=True)
+    self.assertEqual(len(plt.get_fignums()), 0)
+    self.assertEqual(export.result(), [path])
+    self.assertTrue(os.path.isfile(path))
+
+  def test_visualizer_background(self):
+    vs = Visualizer()
+    for i in range(4):
+      vs.add_figure('fig', _figure())
+    export = vs.save_figures(self.folder, background=True)
+    self.assertEqual(len(plt.get_fignums()), 0)
+    self.assertEqual(len(vs.figures), 0)
+    paths = export.result()
+    self.assertEqual(
+        sorted(os.path.basename(p) for p in paths),
+        ['fig.png', 'fig_1.png', 'fig_2.png', 'fig_3.png'])
+    # keep the figures open
+    fig = _figure()
+    export_figures([('fig', fig)],
+                   outputs=[os.path.join(self.folder, 'open.png')],
+                   close=False)
+    self.assertEqual(plt.get_fignums(), [fig.number])
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,61 @@
+from __future__ import absolute_import, division, print_function
+
+import unittest
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+import numpy as np
+from matplotlib import pyplot as plt
+from matplotlib.colors import to_rgb
+
+from odin.visual.scatter_plot import plot_scatter
+
+np.random.seed(8)
+
+
+class ScatterDensityTest(unittest.TestCase):
+
+  def tearDown(self):
+    plt.close('all')
+
+  def test_categorical_density(self):
+    # two overlapping clusters, 'b' dominates the shared region
+    x = np.concatenate([np.random.randn(300), np.random.randn(100) + 0.5])
+    y = np.concatenate([np.random.randn(300), np.random.randn(100) + 0.5])
+    labels = np.array(['a'] * 300 + ['b'] * 100)
+    plt.figure()
+    ax = plot_scatter(x, y, color=labels, density=32, ticks_off=False)
+    self.assertEqual(len(ax.images), 1)
+    image = np.asarray(ax.images[0].get_array())
+    self.assertEqual(image.shape, (32, 32, 4))
+    # the legend lists every category once
+    legend = ax.get_legend()
+    self.assertEqual([t.get_text() for t in legend.get_texts()], ['a', 'b'])
+    # the legend handles are the (empty) scatter artists of each category
+    legend_colors = [
+        tuple(np.round(c.get_facecolor()[0][:3], 6)) for c in ax.collections
+    ]
+    self.assertEqual(len(legend_colors), 2)
+    # every non empty pixel has exactly one of the legend colors
+    occupied = image[..., 3] > 0
+    self.assertTrue(np.any(occupied))
+    pixel_colors = {tuple(c) for c in np.round(image[occupied][:, :3], 6)}
+    self.assertTrue(pixel_colors.issubset(set(legend_colors)))
+    self.assertEqual(len(pixel_colors), 2)
+
+  def test_single_color_density(self):
+    x, y = np.random.rand(2, 1000)
+    plt.figure()
+    ax = plot_scatter(x, y, color='r', density=16)
+    image = np.asarray(ax.images[0].get_array())
+    self.assertEqual(image.shape, (16, 16, 4))
+    occupied = image[..., 3] > 0
+    np.testing.assert_allclose(image[occupied][:, :3],
+                               np.tile(to_rgb('r'), (np.sum(occupied), 1)))
+    self.assertIsNone(ax.get_legend())
+
+
+if __name__ == '__main__':
+  unittest.main()